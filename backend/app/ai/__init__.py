@@ -7,11 +7,19 @@
 
 from app.database import settings
 
-# Initialize OpenAI client when OPENAI_API_KEY is available
+# OpenAI client, created on first access when OPENAI_API_KEY is available;
+# importing the SDK at package import slowed every cold start
 openai_client = None
-if settings.OPENAI_API_KEY:
-    from openai import OpenAI
-    openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+_openai_client_loaded = False
 
-# TODO: Initialize LangChain and Qdrant clients
+def get_openai_client():
+    """Return the shared OpenAI client, or None without an OPENAI_API_KEY"""
+    global openai_client, _openai_client_loaded
+    if not _openai_client_loaded:
+        _openai_client_loaded = True
+        if settings.OPENAI_API_KEY:
+            from openai import OpenAI
+            openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    return openai_client
 
+# TODO: Initialize LangChain and Qdrant clients
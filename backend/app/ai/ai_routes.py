@@ -1,191 +1,197 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import SessionLocal, get_db, settings
 from app.models.models import Donor
 from app.services.cache import get_available_donors
+from app.services.compatibility import compatible_donor_groups, compatibility_rank
+from app.services.geo import bounding_box, donors_near, haversine_km
+from app.ai import llm, gazetteer, intent_router, response_cache
+from app.ai.parse_cache import get_cached_parse, store_parse, parse_cache_stats
+from app.ai.streaming import StreamTimer, sse_event, stream_stats
+from app.ai.recommender import get_recommendations
+from app.ai.sessions import detect_follow_up, is_valid_conversation_id, load_session, new_conversation_id, save_session
+from app.services.log import get_logger
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import AsyncIterator, Dict, Optional, List
+import asyncio
 import re
 import random
+import time
+from dataclasses import dataclass, field
+
+log = get_logger("ai")
 
 router = APIRouter()
 
 # ============ Pydantic Models ============
 
+MAX_BATCH_MESSAGES = 100
+MAX_BATCH_CONCURRENCY = 32
+
 class ChatRequest(BaseModel):
     """Request model for AI chat"""
     message: str = Field(..., min_length=1, description="User message to the AI assistant")
+    conversation_id: Optional[str] = Field(
+        None,
+        description="Conversation to continue (from a previous response); follow-ups like 'list them' use its last search"
+    )
 
 class ChatResponse(BaseModel):
     """Response model for AI chat"""
     answer: str = Field(..., description="AI-generated answer with donor information")
+    conversation_id: Optional[str] = Field(None, description="Pass back on the next message to continue the conversation")
+
+class ChatBatchRequest(BaseModel):
+    """Request model for batch chat"""
+    messages: List[ChatRequest] = Field(..., min_length=1, max_length=MAX_BATCH_MESSAGES, description="Messages to answer")
+    concurrency: Optional[int] = Field(
+        None, ge=1, le=MAX_BATCH_CONCURRENCY,
+        description="Messages processed at once (default CHAT_BATCH_CONCURRENCY)"
+    )
+
+class ChatBatchItem(BaseModel):
+    """Result for one message of a batch"""
+    index: int = Field(..., description="Position of the message in the request")
+    answer: Optional[str] = Field(None, description="Reply (None if processing failed)")
+    conversation_id: Optional[str] = None
+    intent: Optional[str] = None
+    confidence: Optional[float] = None
+    blood_group: Optional[str] = None
+    region: Optional[str] = None
+    donor_count: int = 0
+    duration_ms: float = Field(..., description="Processing time of this message")
+    error: Optional[str] = Field(None, description="Exception raised while processing, if any")
+
+class ChatBatchResponse(BaseModel):
+    """Response model for batch chat"""
+    results: List[ChatBatchItem]
+    errors: int = Field(..., description="Number of messages that failed")
+    duration_ms: float = Field(..., description="Wall-clock time of the whole batch")
 
 class LocationRecommendation(BaseModel):
     """Model for a single location recommendation"""
     location: str = Field(..., description="Recommended location name")
     score: float = Field(..., ge=0, le=100, description="Recommendation score (0-100)")
     reason: str = Field(..., description="Reason for recommendation")
+    lat: Optional[float] = Field(None, description="Latitude of the recommended area's centre")
+    lng: Optional[float] = Field(None, description="Longitude of the recommended area's centre")
+    donor_count: Optional[int] = Field(None, description="Donors in the area")
+    eligible_count: Optional[int] = Field(None, description="Available donors not in their post-donation interval")
 
 class LocationRecommendationResponse(BaseModel):
     """Response model for location recommendation"""
     recommendations: List[LocationRecommendation] = Field(..., description="Top 3 recommended locations")
+    version: Optional[int] = Field(None, description="Version stamp of the analysis snapshot")
+    computed_at: Optional[str] = Field(None, description="When the analysis ran (UTC)")
+    donors_analyzed: Optional[int] = Field(None, description="Donors considered by the analysis")
 
 # ============ LangChain + OpenAI Setup ============
 
 def get_llm_client():
     """
-    Get LangChain LLM client or return None if API key is not available.
+    Get the shared LangChain LLM client (built once, see app.ai.llm) or None
+    if no provider is configured.
     """
-    try:
-        from app.database import settings
-        
-        # Check if OpenAI API key is available
-        api_key = settings.OPENAI_API_KEY
-        
-        if not api_key or api_key == "dummy_key" or api_key.startswith("your_api_key"):
-            return None
-        
-        # Try to import LangChain components
-        try:
-            from langchain_openai import ChatOpenAI
-        except ImportError:
-            print("Warning: langchain_openai not installed. Using simulated responses.")
-            return None
-        
-        # Initialize LangChain with OpenAI
-        llm = ChatOpenAI(
-            model_name="gpt-4o-mini",
-            temperature=0.7,
-            openai_api_key=api_key
-        )
-        
-        return llm
-    except Exception as e:
-        print(f"Warning: Could not initialize OpenAI client: {e}")
-        return None
+    return llm.get_llm()
 
 # ============ Message Parsing ============
 
-def parse_message_with_llm(message: str) -> dict:
+async def parse_message_with_llm(message: str) -> dict:
     """
     Parse user message to extract blood group and region using LangChain.
-    Falls back to regex parsing if LLM is not available.
+    Repeat queries are answered from the parse cache without calling the LLM.
+    Falls back to regex parsing if the LLM is not available, fails or times out.
     
     Returns:
         dict with 'blood_group' and 'region' keys
     """
-    llm = get_llm_client()
-    
-    if llm is None:
-        # Fallback to regex-based parsing
+    if get_llm_client() is None:
+        # Fallback to regex-based parsing (cheap enough not to cache)
         return parse_message_regex(message)
     
+    cached = await get_cached_parse(message)
+    if cached is not None:
+        return cached
+    
     try:
-        from langchain.prompts import ChatPromptTemplate
-        from langchain.output_parsers import PydanticOutputParser
-        from pydantic import BaseModel as PydanticBaseModel
-        
-        # Define output structure
-        class MessageInfo(PydanticBaseModel):
-            blood_group: Optional[str] = None
-            region: Optional[str] = None
-        
-        parser = PydanticOutputParser(pydantic_object=MessageInfo)
-        
-        # Create prompt
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are a parser that extracts information from blood donation queries.
-            Extract:
-            1. Blood group (format: A+, B-, O+, AB+, etc.) - if mentioned
-            2. Region/location (e.g., "AIIMS", "Delhi", "South Delhi", "near hospital name") - if mentioned
-            
-            Return JSON with blood_group and region fields. If not found, use null.
-            {format_instructions}"""),
-            ("human", "Message: {message}")
-        ])
-        
-        # Create chain
-        chain = prompt | llm | parser
-        
-        # Parse message
-        result = chain.invoke({
-            "message": message,
-            "format_instructions": parser.get_format_instructions()
-        })
-        
-        return {
-            "blood_group": result.blood_group,
-            "region": result.region
-        }
-        
+        result = await llm.parse_message(message)
+    except llm.LLMTimeout as e:
+        log.warning("llm.timeout", "LLM parse timed out, using regex", operation="parse", error=str(e))
+        result = None
     except Exception as e:
-        print(f"Error parsing with LLM: {e}")
-        # Fallback to regex
+        log.error("llm.error", "Error parsing with LLM", operation="parse", error=str(e))
+        result = None
+    
+    if result is None:
+        # Regex results are not cached so the next attempt can still use the LLM
         return parse_message_regex(message)
+    
+    await store_parse(message, result)
+    return result
+
+# Blood group mentions like "O+", "o +", "O positive", "A pos", "AB negative", "B neg", "A plus".
+# Lookarounds instead of \b so a trailing "+"/"-" followed by a space still matches.
+BLOOD_GROUP_PATTERN = re.compile(
+    r"(?<![A-Za-z])(AB|A|B|O)\s*(\+|-|PLUS|MINUS|POSITIVE|NEGATIVE|POS|NEG)(?![A-Za-z])",
+    re.IGNORECASE,
+)
+POSITIVE_SIGNS = {"+", "PLUS", "POSITIVE", "POS"}
+
+# Free-form "near X" / "around X" location phrases
+NEAR_PATTERN = re.compile(
+    r"\b(?:near|around|in|at|nearby)\s+([A-Za-z0-9\-\s]+?)($|\.|,|\?|!|\band\b|\bfor\b)",
+    re.IGNORECASE,
+)
 
 def parse_message_regex(message: str) -> dict:
     """
     Parse message using regex patterns to extract blood group and region.
+    Hospitals and regions are found with the gazetteer (single pass over the
+    message); `location` carries the matched entity's id and coordinates.
     """
     message_clean = message.strip()
-    message_upper = message_clean.upper()
 
-    # Robust blood-group extraction supporting variations like:
-    # "O+", "o +", "O positive", "A pos", "AB negative", "B neg", "A plus"
     blood_group = None
-
-    # Combined pattern for letter + sign/word
-    blood_pattern = re.compile(r"\b(AB|A|B|O)\s*(?:\+|\-|PLUS|MINUS|POSITIVE|NEGATIVE|POS|NEG)\b", re.IGNORECASE)
-    m = blood_pattern.search(message_clean)
+    m = BLOOD_GROUP_PATTERN.search(message_clean)
     if m:
-        grp = m.group(1).upper()
-        # determine sign by searching nearby tokens in the match span
-        span = m.group(0)
-        if re.search(r'\+', span) or re.search(r'PLUS|POSITIVE|POS', span, re.IGNORECASE):
-            blood_group = grp + '+'
-        elif re.search(r'-', span) or re.search(r'MINUS|NEGATIVE|NEG', span, re.IGNORECASE):
-            blood_group = grp + '-'
-
-    # As a fallback, try to match compact forms like 'A+' or 'AB-'
-    if not blood_group:
-        compact = re.search(r"\b(AB|A|B|O)[+-]\b", message_clean, re.IGNORECASE)
-        if compact:
-            blood_group = compact.group(0).upper()
-
-    # Extract region (look for common location keywords)
-    region = None
+        sign = "+" if m.group(2).upper() in POSITIVE_SIGNS else "-"
+        blood_group = m.group(1).upper() + sign
 
-    # Check for hospital names (case-insensitive)
-    hospitals = ["AIIMS", "APOLLO", "MAX", "FORTIS", "SAFDARJUNG", "BLK"]
-    for hospital in hospitals:
-        if hospital.lower() in message_clean.lower():
-            region = hospital
-            break
-
-    # Check for known regions
-    regions = ["SOUTH DELHI", "NORTH DELHI", "EAST DELHI", "WEST DELHI", "CENTRAL DELHI",
-               "DWARKA", "ROHINI", "NOIDA", "GURGAON", "CONNAUGHT PLACE", "SECTOR"]
-    for r in regions:
-        if r.lower() in message_clean.lower():
-            region = r.title()
-            break
+    # Known hospitals and regions (hospitals are preferred: they are more precise)
+    region = None
+    place = gazetteer.best_place(message_clean)
+    if place is not None:
+        region = place.name
 
     # Check for "near" or "around" patterns to capture freeform location names
     if not region:
-        near_pattern = re.search(r"(?:near|around|in|at|nearby)\s+([A-Za-z0-9\-\s]+?)($|\.|,|\?|!|\band\b|\bfor\b)", message_clean, re.IGNORECASE)
+        near_pattern = NEAR_PATTERN.search(message_clean)
         if near_pattern:
             region = near_pattern.group(1).strip()
 
     return {
         "blood_group": blood_group,
-        "region": region
+        "region": region,
+        "location": place.as_dict() if place is not None else None,
     }
 
 
 def detect_intent(message: str, parsed: dict = None) -> tuple:
     """Detect user intent from message. Returns (intent, confidence).
 
-    Intents supported: 'compatibility_info', 'recommend_location', 'help', 'find_donor'
+    Uses the embedding intent router (app.ai.intent_router) when it is
+    confident, otherwise the keyword rules below.
+    """
+    routed = intent_router.route(message)
+    if routed is not None and routed[0] not in intent_router.CONVERSATION_INTENTS:
+        return routed
+    return detect_intent_rules(message, parsed)
+
+def detect_intent_rules(message: str, parsed: dict = None) -> tuple:
+    """Keyword/regex intent rules. Returns (intent, confidence).
+
+    Intents supported: 'compatibility_info', 'recommend_location', 'help', 'list_donor_names', 'find_donor'
     """
     if parsed is None:
         parsed = parse_message_regex(message)
@@ -221,6 +227,13 @@ def detect_conversation_intent(message: str) -> Optional[str]:
 
     Returns one of: 'greeting', 'thanks', 'small_talk', or None
     """
+    routed = intent_router.route(message)
+    if routed is not None:
+        return routed[0] if routed[0] in intent_router.CONVERSATION_INTENTS else None
+    return detect_conversation_intent_rules(message)
+
+def detect_conversation_intent_rules(message: str) -> Optional[str]:
+    """Keyword rules for greeting / thanks / small_talk (None if no match)"""
     if not message:
         return None
     t = message.lower().strip()
@@ -270,63 +283,138 @@ def compose_assistant_reply(text: str, offer: Optional[str] = None, emoji: bool
 
 # ============ Donor Querying ============
 
-async def query_donors(db: Session, blood_group: Optional[str] = None, region: Optional[str] = None) -> List[dict]:
+MAX_AI_RESULTS = 10
+MAX_GEO_CANDIDATES = 500  # nearest donors considered before the DB filter
+
+def resolve_location(region: Optional[str], location: Optional[dict] = None) -> Optional[gazetteer.Entity]:
     """
-    Query donors from database based on blood group and region.
+    Turn a parsed region into a place with coordinates.
+    Uses the parser's gazetteer match when present, otherwise resolves the
+    free-form name (e.g. from the LLM) against hospitals and regions.
+    """
+    if location and location.get("lat") is not None and location.get("lng") is not None:
+        return gazetteer.Entity(**location)
+    entity = gazetteer.resolve(region)
+    if entity is None or entity.lat is None or entity.lng is None:
+        return None
+    return entity
+
+def _donor_dict(donor: Donor, distance_km: Optional[float] = None) -> dict:
+    return {
+        "id": donor.id,
+        "name": donor.name,
+        "blood_group": donor.blood_group,
+        "lat": donor.lat,
+        "lng": donor.lng,
+        "available": donor.available,
+        "email": donor.email,
+        "phone": donor.phone,
+        "distance_km": round(distance_km, 3) if distance_km is not None else None,
+    }
+
+def _donors_within(db: Session, lat: float, lng: float, km: float, groups: Optional[List[str]]) -> List[tuple]:
+    """Available donors within `km` from the database: bounding box on lat/lng, then haversine"""
+    lat_lo, lat_hi, lng_lo, lng_hi = bounding_box(lat, lng, km)
+    query = db.query(Donor).filter(
+        Donor.available == True,
+        Donor.lat.between(lat_lo, lat_hi),
+        Donor.lng.between(lng_lo, lng_hi),
+    )
+    if groups:
+        query = query.filter(Donor.blood_group.in_(groups))
+    within = []
+    for donor in query.all():
+        distance = haversine_km(lat, lng, donor.lat, donor.lng)
+        if distance <= km:
+            within.append((donor, distance))
+    return within
+
+async def query_donors(
+    db: Session,
+    blood_group: Optional[str] = None,
+    region: Optional[str] = None,
+    location: Optional[dict] = None,
+) -> List[dict]:
+    """
+    Query available donors who can give to `blood_group`, nearest first when
+    a region is given.
+    
+    With a resolvable region the candidates come from the Redis GEO index
+    (donors_near, registered locations without a freshness window) and only
+    those ids are loaded from the database; when the index has nothing there
+    (or is down) the donors table is searched by bounding box instead. The
+    plain SQL query is used when there is no region.
     
     Args:
         db: Database session
-        blood_group: Filter by blood group (optional)
-        region: Filter by region (optional, uses location field)
+        blood_group: Recipient blood group (optional); compatible groups are included, exact matches first
+        region: Parsed region/hospital name (optional)
+        location: Gazetteer entity dict from the regex parser (optional)
         
     Returns:
         List of donor dictionaries
     """
     try:
-        query = db.query(Donor).filter(Donor.available == True)
-        
-        # Filter by blood group if provided
-        if blood_group:
-            query = query.filter(Donor.blood_group == blood_group)
+        groups = compatible_donor_groups(blood_group) if blood_group else None
+        place = resolve_location(region, location) if region or location else None
+        donors: List[dict] = []
         
-        # Filter by region (simplified - using lat/lng ranges for demo)
-        # In production, you'd use proper geospatial queries
-        if region:
-            # Mock region-based filtering (in production, use actual geocoding)
-            # For now, we'll just return available donors
-            pass
+        candidates = None  # [(donor, km)] when searching around a place
+        if place is not None:
+            km = settings.AI_SEARCH_HOSPITAL_KM if place.kind == "hospital" else settings.AI_SEARCH_REGION_KM
+            pairs = []
+            try:
+                # Registered locations, however old: the freshness window is
+                # for live-location queries (/donors/nearby), not "donors near X"
+                pairs = await donors_near(place.lat, place.lng, km=km, fresh_ms=None, count=MAX_GEO_CANDIDATES)
+            except Exception as e:
+                log.error("geo.error", "Error querying donor GEO index, using database", error=str(e))
+            
+            if pairs:
+                # Nearest candidates from Redis, then one indexed lookup by primary key
+                id_to_km: Dict[int, float] = dict(pairs)
+                query = db.query(Donor).filter(Donor.id.in_(list(id_to_km)), Donor.available == True)
+                if groups:
+                    query = query.filter(Donor.blood_group.in_(groups))
+                candidates = [(d, id_to_km[d.id]) for d in query.all()]
+            else:
+                # Nothing indexed near the place (index down, or not rebuilt yet after a flush)
+                candidates = _donors_within(db, place.lat, place.lng, km, groups)
         
-        donors = query.limit(10).all()
+        if candidates is not None:
+            candidates.sort(key=lambda c: (compatibility_rank(blood_group, c[0].blood_group), c[1]))
+            donors = [_donor_dict(d, dist) for d, dist in candidates[:MAX_AI_RESULTS]]
+        else:
+            query = db.query(Donor).filter(Donor.available == True)
+            if groups:
+                query = query.filter(Donor.blood_group.in_(groups))
+            rows = query.limit(MAX_AI_RESULTS * 3).all()
+            rows.sort(key=lambda d: compatibility_rank(blood_group, d.blood_group))
+            donors = [_donor_dict(d) for d in rows[:MAX_AI_RESULTS]]
         
-        # Convert to dictionaries
-        donor_list = []
-        for donor in donors:
-            donor_list.append({
-                "id": donor.id,
-                "name": donor.name,
-                "blood_group": donor.blood_group,
-                "lat": donor.lat,
-                "lng": donor.lng,
-                "available": donor.available,
-            })
+        # End the read transaction so the pooled connection is not held while
+        # the (slow, concurrent) LLM formatting call runs
+        db.rollback()
         
-        return donor_list
+        return donors
         
     except Exception as e:
-        print(f"Error querying donors: {e}")
+        log.exception("ai.query_failed", "Error querying donors", error=str(e))
         return []
 
-async def format_donor_response(message: str, donors: List[dict]) -> str:
+DONORS_NAMED_IN_REPLY = 5
+NO_DONORS_REPLY = "I couldn't find any available donors matching your criteria. Please try a different blood group or location."
+
+def _donor_summary(message: str, donors: List[dict]) -> tuple:
     """
-    Format donor query results into a natural language response using LLM if available.
+    Deterministic parts of a donor reply.
+
+    Returns:
+        (count, donor_list_text, fallback_summary, wants_details) where
+        fallback_summary is used whenever the LLM is unavailable or fails
     """
-    llm = get_llm_client()
-    
-    if not donors:
-        return "I couldn't find any available donors matching your criteria. Please try a different blood group or location."
-    
     # Build donor list text (limit to 5 for readability)
-    donor_names = [f"{donor['name']} ({donor['blood_group']})" for donor in donors[:5]]
+    donor_names = [f"{donor['name']} ({donor['blood_group']})" for donor in donors[:DONORS_NAMED_IN_REPLY]]
     donor_list_text = ", ".join(donor_names)
     count = len(donors)
 
@@ -344,11 +432,8 @@ async def format_donor_response(message: str, donors: List[dict]) -> str:
 
     wants_details = user_requested_details(message)
 
-    # If LLM is not available, return a concise, conversational summary and offer follow-up
-    if llm is None:
-        if count == 0:
-            return "I couldn't find any available donors matching your criteria. Would you like me to broaden the search?"
-
+    def fallback_summary() -> str:
+        # Concise, conversational summary that offers follow-up
         if wants_details:
             if count == 1:
                 return f"I found {count} available donor near your location: {donor_list_text}. If you'd like contact details or directions, tell me which donor you'd like to reach out to."
@@ -360,109 +445,276 @@ async def format_donor_response(message: str, donors: List[dict]) -> str:
             return f"I found 1 available donor nearby. I can share their name and contact details if you want."
         else:
             return f"I found {count} available donors nearby. I can list their names or provide contact/directions for any specific donor — which would you prefer?"
+
+    return count, donor_list_text, fallback_summary(), wants_details
+
+async def format_donor_response(message: str, donors: List[dict], intent: str = "find_donor") -> str:
+    """
+    Format donor query results into a natural language response using LLM if available.
+    LLM answers are cached by (intent, donor set, wants-details) fingerprint,
+    so repeat searches with the same result skip the LLM call.
+    """
+    if not donors:
+        return NO_DONORS_REPLY
     
-    try:
-        try:
-            from langchain.prompts import ChatPromptTemplate
+    count, donor_list_text, fallback, wants_details = _donor_summary(message, donors)
+    if get_llm_client() is None:
+        return fallback
 
-            # If user didn't request details explicitly, instruct LLM to be conversational
-            system_instructions = (
-                "You are a friendly assistant for a blood donation platform. Keep responses concise and conversational. "
-                "Only include full donor names and contact details if the user explicitly requests them. "
-                "Otherwise, give a short summary and offer follow-up options (e.g., 'Would you like names, contact info, or directions?')."
-            )
+    fp = response_cache.fingerprint(intent, donors, DONORS_NAMED_IN_REPLY, wants_details)
+    cached = await response_cache.get_cached_reply(fp)
+    if cached is not None:
+        return cached
+    generations = await response_cache.donor_generations([d["id"] for d in donors])
 
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", system_instructions),
-                ("human", "Original query: {message}\nFound {count} donors: {donor_list}\n\nProvide a friendly, concise response. If the user didn't ask for details, offer follow-ups instead of listing full details.")
-            ])
+    try:
+        reply = await llm.format_donors(message, count, donor_list_text)
+    except llm.LLMTimeout as e:
+        log.warning("llm.timeout", "LLM formatting timed out, using summary", operation="format", error=str(e))
+        reply = None
+    except Exception as e:
+        log.error("llm.error", "Error formatting with LLM", operation="format", error=str(e))
+        reply = None
 
-            chain = prompt | llm
+    # If LLM is not available (or failed), return the deterministic summary
+    if not reply:
+        return fallback
+    await response_cache.store_reply(fp, [d["id"] for d in donors], reply, generations)
+    return reply
 
-            response = await chain.ainvoke({
-                "message": message,
-                "count": count,
-                "donor_list": donor_list_text
-            })
+async def stream_donor_response(
+    message: str,
+    donors: List[dict],
+    timer: StreamTimer,
+    intent: str = "find_donor",
+) -> AsyncIterator[tuple]:
+    """
+    Streaming variant of format_donor_response.
 
-            if hasattr(response, 'content'):
-                return response.content
-            else:
-                return str(response)
-        except Exception as e:
-            print(f"Error formatting with LLM: {e}")
-            # Fallback to simple, conversational formatting
-            if wants_details:
-                if count == 1:
-                    return f"I found {count} available donor near your location: {donor_list_text}. If you'd like contact details or directions, tell me which donor you'd like to reach out to."
-                else:
-                    return f"I found {count} available donors near your location: {donor_list_text}. Would you like full contact details or directions for any of them?"
-            if count == 1:
-                return f"I found 1 available donor nearby. I can share their name and contact details if you want."
-            else:
-                return f"I found {count} available donors nearby. I can list their names or provide contact/directions for any specific donor — which would you prefer?"
-            
+    Yields:
+        (source, text) chunks where source is "llm", "cache" or "fallback";
+        the fallback summary is only sent if the LLM produced nothing
+    """
+    if not donors:
+        yield ("fallback", NO_DONORS_REPLY)
+        return
+
+    count, donor_list_text, fallback, wants_details = _donor_summary(message, donors)
+    if get_llm_client() is None:
+        yield ("fallback", fallback)
+        return
+
+    fp = response_cache.fingerprint(intent, donors, DONORS_NAMED_IN_REPLY, wants_details)
+    cached = await response_cache.get_cached_reply(fp)
+    if cached is not None:
+        timer.mark_first_token()
+        yield ("cache", cached)
+        return
+    generations = await response_cache.donor_generations([d["id"] for d in donors])
+
+    parts: List[str] = []
+    completed = False
+    try:
+        chunks = await llm.stream_format_donors(message, count, donor_list_text)
+        if chunks is not None:
+            async for text in chunks:
+                timer.mark_first_token()
+                parts.append(text)
+                yield ("llm", text)
+            completed = True
+    except llm.LLMTimeout as e:
+        log.warning("llm.timeout", "LLM streaming timed out, using summary", operation="stream", error=str(e))
     except Exception as e:
-        print(f"Error formatting with LLM: {e}")
-        # Fallback to simple formatting
-        if count == 1:
-            return f"I found {count} available donor: {donor_list_text}."
-        else:
-            return f"I found {count} available donors: {donor_list_text}."
+        log.error("llm.error", "Error streaming with LLM", operation="stream", error=str(e))
+
+    if not parts:
+        yield ("fallback", fallback)
+    elif completed:
+        # Only complete generations are cached
+        await response_cache.store_reply(fp, [d["id"] for d in donors], "".join(parts), generations)
 
 # ============ Location Analysis ============
 
-def analyze_donor_density() -> List[dict]:
+async def analyze_donor_density() -> List[dict]:
     """
-    Analyze donor density by region (mock implementation with static values).
-    In production, this would query the database and calculate actual density.
+    Top camp locations from the latest recommender snapshot (see app.ai.recommender).
     
     Returns:
-        List of location dictionaries with density scores
-    """
-    # Mock data - in production, calculate from actual donor locations
-    locations = [
-        {
-            "location": "South Delhi",
-            "score": 92.5,
-            "reason": "High donor density (156 donors), excellent accessibility, active engagement",
-            "donor_count": 156,
-        },
-        {
-            "location": "Dwarka",
-            "score": 87.3,
-            "reason": "Growing population with high engagement rates, strong volunteer network",
-            "donor_count": 124,
-        },
-        {
-            "location": "Rohini",
-            "score": 85.1,
-            "reason": "Excellent volunteer network, consistent donor participation",
-            "donor_count": 98,
-        },
-        {
-            "location": "Noida Sector 62",
-            "score": 82.7,
-            "reason": "Corporate hub with active donors, good infrastructure",
-            "donor_count": 89,
-        },
-        {
-            "location": "Gurgaon Sector 15",
-            "score": 79.4,
-            "reason": "High potential donor activity, community engagement",
-            "donor_count": 67,
-        },
-        {
-            "location": "Connaught Place",
-            "score": 76.2,
-            "reason": "Central location, moderate donor base",
-            "donor_count": 54,
-        },
-    ]
+        List of location dictionaries with scores, best first
+    """
+    snapshot = await get_recommendations()
+    return snapshot.get("recommendations", []) if snapshot else []
+
+# ============ Chat Pipeline ============
+
+CHAT_ERROR_REPLY = compose_assistant_reply("Sorry — I couldn't process that right now. Would you like me to try again later?", offer="Want me to retry?")
+
+@dataclass
+class ChatPlan:
+    """Everything about a chat reply that does not need the LLM formatting call"""
+    intent: str
+    confidence: float = 1.0
+    parsed: dict = field(default_factory=dict)
+    donors: List[dict] = field(default_factory=list)
+    # Final reply for deterministic intents; None means "format `donors` with the LLM"
+    answer: Optional[str] = None
+    conversation_id: Optional[str] = None
+
+    def meta(self) -> dict:
+        return {
+            "conversation_id": self.conversation_id,
+            "intent": self.intent,
+            "confidence": self.confidence,
+            "blood_group": self.parsed.get("blood_group"),
+            "region": self.parsed.get("region"),
+            "donor_count": len(self.donors),
+        }
+
+def _describe_donor(donor: dict) -> str:
+    text = f"{donor['name']} ({donor['blood_group']})"
+    if donor.get("distance_km") is not None:
+        text += f", {donor['distance_km']:.1f} km away"
+    return text
+
+def _contact_line(donor: dict) -> str:
+    contacts = [c for c in (donor.get("phone"), donor.get("email")) if c]
+    return f"{_describe_donor(donor)}: " + (" / ".join(contacts) if contacts else "no contact details on file")
+
+def answer_follow_up(follow_up: tuple, session: dict) -> str:
+    """Reply to a follow-up from the conversation's stored result set (no DB or LLM calls)"""
+    kind, index = follow_up
+    donors = session.get("donors") or []
+    if not donors:
+        return compose_assistant_reply(
+            "My last search didn't find any donors, so there's no one to list yet.",
+            offer="Want me to search with a different blood group or location?"
+        )
+
+    if kind == "contact":
+        if index is None:
+            lines = [_contact_line(d) for d in donors[:3]]
+            return compose_assistant_reply("\n".join(lines), offer="Want directions to any of them?")
+        if not -len(donors) <= index < len(donors):
+            return compose_assistant_reply(
+                f"I only found {len(donors)} donor{'s' if len(donors) != 1 else ''} last time.",
+                offer="Which one would you like to contact?"
+            )
+        return compose_assistant_reply(_contact_line(donors[index]), offer="Want directions or another donor's details?")
+
+    names = ", ".join(_describe_donor(d) for d in donors[:10])
+    return compose_assistant_reply(f"Here are the donors I found: {names}.", offer="Would you like contact details for any of these?")
+
+async def plan_chat(message: str, db: Session, conversation_id: Optional[str] = None) -> ChatPlan:
+    """
+    Parse the message, detect intent and run the donor query.
+    Shared by /ai/chat and /ai/chat/stream; only the final formatting differs.
     
-    # Sort by score (descending) and return top 3
-    sorted_locations = sorted(locations, key=lambda x: x["score"], reverse=True)
-    return sorted_locations[:3]
+    Follow-ups ("list them", "contact the first one") in a known conversation
+    are answered from its stored result set without parsing, querying or the LLM.
+    """
+    if is_valid_conversation_id(conversation_id):
+        session = await load_session(conversation_id)
+        follow_up = detect_follow_up(message) if session is not None else None
+        if follow_up is not None:
+            new_filters = parse_message_regex(message)
+            if not (new_filters.get("blood_group") or new_filters.get("region")):
+                plan = ChatPlan(f"follow_up_{follow_up[0]}", 0.9, session.get("filters") or {}, session.get("donors") or [])
+                plan.answer = answer_follow_up(follow_up, session)
+                plan.conversation_id = conversation_id
+                return plan
+    else:
+        conversation_id = new_conversation_id()
+
+    plan = await _plan_new_message(message, db)
+    plan.conversation_id = conversation_id
+    if plan.intent in ("find_donor", "list_donor_names"):
+        await save_session(conversation_id, plan.intent, plan.parsed, plan.donors)
+    return plan
+
+async def _plan_new_message(message: str, db: Session) -> ChatPlan:
+    # First handle simple conversational intents
+    conv_intent = detect_conversation_intent(message)
+    if conv_intent == 'greeting':
+        text = "Hi there! 😊 How can I help with blood donors or camps today?"
+        return ChatPlan(conv_intent, answer=compose_assistant_reply(text, offer="Want me to find nearby donors?"))
+    if conv_intent == 'thanks':
+        text = "You're welcome! Happy to help."
+        return ChatPlan(conv_intent, answer=compose_assistant_reply(text, offer="Anything else I can do?"))
+    if conv_intent == 'small_talk':
+        text = "I'm NSS BloodLink's assistant — here to help with donor searches, compatibility, and camps. 😊"
+        return ChatPlan(conv_intent, answer=compose_assistant_reply(text))
+
+    # Parse message to extract blood group and region (LLM or regex)
+    parsed_info = await parse_message_with_llm(message)
+    blood_group = parsed_info.get("blood_group")
+    region = parsed_info.get("region")
+
+    # Detect intent
+    intent, confidence = detect_intent(message, parsed=parsed_info)
+    plan = ChatPlan(intent, confidence, parsed_info)
+
+    # Handle compatibility info intent
+    if intent == "compatibility_info":
+        compatibility = (
+            "Here’s a quick compatibility guide:\n"
+            "- O-: universal donor\n"
+            "- O+: donates to all + types\n"
+            "- A/B types: donate to same letter or AB types\n"
+            "- AB+: universal recipient"
+        )
+        if blood_group:
+            compatibility += f"\n\nYou asked about {blood_group}. I can search for available {blood_group} donors near {region or 'your area'} if you want."
+        plan.answer = compose_assistant_reply(compatibility, offer="Want me to search for donors now?")
+        return plan
+
+    # Recommend location intent
+    if intent == "recommend_location":
+        top_locations = await analyze_donor_density()
+        if not top_locations:
+            plan.answer = compose_assistant_reply("I don't have enough donor data yet to recommend camp locations.", offer="Want me to search for donors instead?")
+            return plan
+        reasons = "; ".join([f"{loc['location']} ({int(loc['score'])})" for loc in top_locations])
+        answer = f"Top locations: {reasons}."
+        plan.answer = compose_assistant_reply(answer, offer="Want details on any location?")
+        return plan
+
+    # Help intent
+    if intent == "help":
+        help_text = (
+            "I can find donors, explain compatibility, or recommend locations for camps.\n"
+            "Try: 'Find O+ donors near AIIMS' or 'Who can donate to B-?'")
+        plan.answer = compose_assistant_reply(help_text, offer="Want me to try an example?")
+        return plan
+
+    plan.donors = await query_donors(db, blood_group=blood_group, region=region, location=parsed_info.get("location"))
+
+    # If user explicitly requested a list of donor names, return them deterministically
+    if intent == "list_donor_names":
+        if not plan.donors:
+            plan.answer = compose_assistant_reply("I couldn't find any donors to list. Would you like me to broaden the search?")
+            return plan
+        names = [d['name'] + f" ({d['blood_group']})" for d in plan.donors[:10]]
+        names_text = ", ".join(names)
+        answer = f"Here are the donors I found: {names_text}." if len(names) <= 10 else f"I found many donors; here are the first 10: {names_text}."
+        plan.answer = compose_assistant_reply(answer, offer="Would you like contact details or directions for any of these?")
+        return plan
+
+    # Default: find donors (reply formatted by the LLM)
+    return plan
+
+async def run_chat(message: str, db: Session, conversation_id: Optional[str] = None) -> tuple:
+    """
+    Full one-shot pipeline: plan, then format the donor reply if needed.
+    Exceptions propagate (the endpoints decide how to report them).
+
+    Returns:
+        (plan, answer)
+    """
+    plan = await plan_chat(message, db, conversation_id)
+    if plan.answer is not None:
+        return plan, plan.answer
+    raw_answer = await format_donor_response(message, plan.donors, plan.intent)
+    return plan, compose_assistant_reply(raw_answer)
 
 # ============ API Endpoints ============
 
@@ -518,71 +770,141 @@ async def chat(
     ```
     """
     try:
-        # First handle simple conversational intents
-        conv_intent = detect_conversation_intent(request.message)
-        if conv_intent == 'greeting':
-            text = "Hi there! 😊 How can I help with blood donors or camps today?"
-            return ChatResponse(answer=compose_assistant_reply(text, offer="Want me to find nearby donors?"))
-        if conv_intent == 'thanks':
-            text = "You're welcome! Happy to help."
-            return ChatResponse(answer=compose_assistant_reply(text, offer="Anything else I can do?"))
-        if conv_intent == 'small_talk':
-            text = "I'm NSS BloodLink's assistant — here to help with donor searches, compatibility, and camps. 😊"
-            return ChatResponse(answer=compose_assistant_reply(text))
-
-        # Parse message to extract blood group and region (LLM or regex)
-        parsed_info = parse_message_with_llm(request.message)
-        blood_group = parsed_info.get("blood_group")
-        region = parsed_info.get("region")
-
-        # Detect intent
-        intent, confidence = detect_intent(request.message, parsed=parsed_info)
-
-        # Handle compatibility info intent
-        if intent == "compatibility_info":
-            compatibility = (
-                "Here’s a quick compatibility guide:\n"
-                "- O-: universal donor\n"
-                "- O+: donates to all + types\n"
-                "- A/B types: donate to same letter or AB types\n"
-                "- AB+: universal recipient"
-            )
-            if blood_group:
-                compatibility += f"\n\nYou asked about {blood_group}. I can search for available {blood_group} donors near {region or 'your area'} if you want."
-            return ChatResponse(answer=compose_assistant_reply(compatibility, offer="Want me to search for donors now?"))
-
-        # Recommend location intent
-        if intent == "recommend_location":
-            top_locations = analyze_donor_density()
-            reasons = "; ".join([f"{loc['location']} ({int(loc['score'])})" for loc in top_locations])
-            answer = f"Top locations: {reasons}."
-            return ChatResponse(answer=compose_assistant_reply(answer, offer="Want details on any location?"))
-
-        # Help intent
-        if intent == "help":
-            help_text = (
-                "I can find donors, explain compatibility, or recommend locations for camps.\n"
-                "Try: 'Find O+ donors near AIIMS' or 'Who can donate to B-?'")
-            return ChatResponse(answer=compose_assistant_reply(help_text, offer="Want me to try an example?"))
-
-        # If user explicitly requested a list of donor names, return them deterministically
-        if intent == "list_donor_names":
-            donors = await query_donors(db, blood_group=blood_group, region=region)
-            if not donors:
-                return ChatResponse(answer=compose_assistant_reply("I couldn't find any donors to list. Would you like me to broaden the search?"))
-            names = [d['name'] + f" ({d['blood_group']})" for d in donors[:10]]
-            names_text = ", ".join(names)
-            answer = f"Here are the donors I found: {names_text}." if len(names) <= 10 else f"I found many donors; here are the first 10: {names_text}."
-            return ChatResponse(answer=compose_assistant_reply(answer, offer="Would you like contact details or directions for any of these?"))
-
-        # Default: find donors
-        donors = await query_donors(db, blood_group=blood_group, region=region)
-        raw_answer = await format_donor_response(request.message, donors)
-        return ChatResponse(answer=compose_assistant_reply(raw_answer))
-
-    except Exception:
+        plan, answer = await run_chat(request.message, db, request.conversation_id)
+        return ChatResponse(answer=answer, conversation_id=plan.conversation_id)
+
+    except Exception as e:
         # Do not leak internal errors. Give an empathetic message.
-        return ChatResponse(answer=compose_assistant_reply("Sorry — I couldn't process that right now. Would you like me to try again later?", offer="Want me to retry?"))
+        log.exception("ai.chat_failed", "Error answering chat message", error=repr(e))
+        return ChatResponse(answer=CHAT_ERROR_REPLY, conversation_id=request.conversation_id)
+
+@router.post(
+    "/chat/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Chat with AI assistant (streaming)",
+    description=(
+        "Same as /ai/chat, but with `Accept: text/event-stream` the reply is sent as server-sent events: "
+        "a `meta` event (intent, parsed blood group/region, donor count) as soon as the donor query finishes, "
+        "`token` events while the LLM generates, and a `done` event with the final answer and timings. "
+        "Other clients get the one-shot JSON response."
+    ),
+    responses={200: {"content": {"text/event-stream": {}, "application/json": {}}}},
+)
+async def chat_stream(
+    request: ChatRequest,
+    db: Session = Depends(get_db),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Streaming chat endpoint.
+
+    **Events (text/event-stream):**
+    - `meta`: `{"conversation_id", "intent", "confidence", "blood_group", "region", "donor_count"}`
+    - `token`: `{"text"}` - a piece of the reply, in order
+    - `done`: `{"answer", "source", "ttfb_ms", "first_token_ms", "total_ms"}` - `answer` is the complete reply
+    - `error`: `{"answer"}` - sent instead of `done` if generation fails
+    """
+    if not accept or "text/event-stream" not in accept.lower():
+        return await chat(request, db)
+
+    timer = StreamTimer()
+    # Parse + donor query run before the response starts, so the database
+    # session is released before the (slow) streamed LLM generation
+    try:
+        plan = await plan_chat(request.message, db, request.conversation_id)
+    except Exception as e:
+        log.exception("ai.chat_failed", "Error planning streamed chat reply", error=str(e))
+        plan = ChatPlan("error", answer=CHAT_ERROR_REPLY, conversation_id=request.conversation_id)
+
+    async def events() -> AsyncIterator[str]:
+        timer.mark_first_byte()
+        yield sse_event("meta", plan.meta())
+
+        if plan.answer is not None:
+            timer.mark_first_token()
+            yield sse_event("token", {"text": plan.answer})
+            source = "error" if plan.intent == "error" else "deterministic"
+            yield sse_event("done", {"answer": plan.answer, "source": source, **timer.finish(source)})
+            return
+
+        parts: List[str] = []
+        source = "fallback"
+        try:
+            async for source, text in stream_donor_response(request.message, plan.donors, timer, plan.intent):
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+            # Same closing offer as the one-shot reply
+            answer = compose_assistant_reply("".join(parts))
+            offer = answer[len(answer.rsplit("\n", 1)[0]):]
+            yield sse_event("token", {"text": offer})
+            yield sse_event("done", {"answer": answer, "source": source, **timer.finish(source)})
+        except Exception as e:
+            log.exception("ai.chat_failed", "Error streaming chat reply", error=str(e))
+            timer.finish("error")
+            yield sse_event("error", {"answer": CHAT_ERROR_REPLY})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post(
+    "/chat/batch",
+    response_model=ChatBatchResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Answer many chat messages",
+    description=(
+        "Run up to 100 messages through the chat pipeline concurrently (bounded by `concurrency`). "
+        "Each result carries the parsed intent/filters, timing and, unlike /ai/chat, the error if one was raised. "
+        "Intended for evaluation and regression checks."
+    ),
+)
+async def chat_batch(batch: ChatBatchRequest):
+    """
+    Batch chat endpoint.
+
+    Every message gets its own database session, since sessions must not be
+    shared between concurrently running tasks. Results are returned in
+    request order.
+    """
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(batch.concurrency or settings.CHAT_BATCH_CONCURRENCY)
+
+    async def answer(index: int, item: ChatRequest) -> ChatBatchItem:
+        async with semaphore:
+            t0 = time.perf_counter()
+            db = SessionLocal()
+            try:
+                plan, text = await run_chat(item.message, db, item.conversation_id)
+                return ChatBatchItem(
+                    index=index,
+                    answer=text,
+                    conversation_id=plan.conversation_id,
+                    intent=plan.intent,
+                    confidence=plan.confidence,
+                    blood_group=plan.parsed.get("blood_group"),
+                    region=plan.parsed.get("region"),
+                    donor_count=len(plan.donors),
+                    duration_ms=round((time.perf_counter() - t0) * 1000, 2),
+                )
+            except Exception as e:
+                db.rollback()
+                return ChatBatchItem(
+                    index=index,
+                    conversation_id=item.conversation_id,
+                    duration_ms=round((time.perf_counter() - t0) * 1000, 2),
+                    error=f"{type(e).__name__}: {e}",
+                )
+            finally:
+                db.close()
+
+    results = await asyncio.gather(*(answer(i, item) for i, item in enumerate(batch.messages)))
+    return ChatBatchResponse(
+        results=results,
+        errors=sum(1 for r in results if r.error),
+        duration_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
 
 @router.get(
     "/recommend-location",
@@ -629,10 +951,11 @@ async def recommend_location(
     - `recommendations`: Top 3 recommended locations with scores (0-100) and detailed reasons
     
     **The analysis considers:**
-    - Donor density by region
-    - Accessibility and infrastructure
-    - Historical engagement rates
-    - Volunteer network strength
+    - Density of eligible donors (available, not donated in the last 90 days) on a grid
+    - Demand: urgency-weighted requests at nearby hospitals over the last RECOMMENDER_DEMAND_DAYS
+    
+    The analysis runs as a periodic background job; this endpoint serves the
+    latest snapshot (`version`, `computed_at`).
     
     **Example Response:**
     ```json
@@ -658,23 +981,48 @@ async def recommend_location(
     ```
     """
     try:
-        # Analyze donor density (mock implementation)
-        top_locations = analyze_donor_density()
+        # Latest snapshot of the periodic analysis (see app.ai.recommender)
+        snapshot = await get_recommendations() or {}
         
         # Convert to response format
-        recommendations = [
-            LocationRecommendation(
-                location=loc["location"],
-                score=loc["score"],
-                reason=loc["reason"]
-            )
-            for loc in top_locations
-        ]
+        recommendations = [LocationRecommendation(**loc) for loc in snapshot.get("recommendations", [])]
         
-        return LocationRecommendationResponse(recommendations=recommendations)
+        return LocationRecommendationResponse(
+            recommendations=recommendations,
+            version=snapshot.get("version"),
+            computed_at=snapshot.get("computed_at"),
+            donors_analyzed=snapshot.get("donors_analyzed"),
+        )
         
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generating location recommendation: {str(e)}"
         )
+
+@router.get(
+    "/parse-cache/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Message parse cache statistics",
+    description="Hit/miss counters of this worker's parse cache (in-process LRU + Redis tier)."
+)
+async def get_parse_cache_stats():
+    return parse_cache_stats()
+
+@router.get(
+    "/chat/stream/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Streaming chat timings",
+    description="Time-to-first-byte, time-to-first-token and total duration percentiles (ms) of this worker's streamed replies."
+)
+async def get_stream_stats():
+    return stream_stats()
+
+@router.get(
+    "/response-cache/stats",
+    status_code=status.HTTP_200_OK,
+    summary="Formatted answer cache statistics",
+    description="Hit/miss/invalidation counters of this worker's cache of LLM-formatted donor answers."
+)
+async def get_response_cache_stats():
+    return response_cache.response_cache_stats()
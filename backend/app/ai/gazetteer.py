@@ -0,0 +1,241 @@
+# backend/app/ai/gazetteer.py
+# Hospital and region gazetteer for the chat parser.
+#
+# All known names (hospitals from the `hospitals` table plus a built-in
+# region dictionary) are compiled into one Aho-Corasick automaton, so a
+# message is scanned once regardless of how many names exist. The automaton
+# is rebuilt whenever the hospital registry reloads.
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.services.hospital_registry import on_hospitals_changed
+from app.services.log import get_logger
+
+log = get_logger("ai.gazetteer")
+
+@dataclass(frozen=True)
+class Entity:
+    """A place the assistant can resolve to coordinates"""
+    id: str                   # "hospital:<db id>", "landmark:<slug>" or "region:<slug>"
+    kind: str                 # "hospital" or "region"
+    name: str                 # canonical display name
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        return {"id": self.id, "kind": self.kind, "name": self.name, "lat": self.lat, "lng": self.lng}
+
+@dataclass(frozen=True)
+class Match:
+    entity: Entity
+    start: int
+    end: int                  # exclusive
+
+# Region dictionary: canonical name -> (lat, lng, extra aliases)
+REGIONS: Dict[str, Tuple[float, float, Tuple[str, ...]]] = {
+    "South Delhi": (28.5245, 77.2066, ()),
+    "North Delhi": (28.7041, 77.2025, ()),
+    "East Delhi": (28.6280, 77.2950, ()),
+    "West Delhi": (28.6517, 77.1000, ()),
+    "Central Delhi": (28.6448, 77.2167, ()),
+    "New Delhi": (28.6139, 77.2090, ()),
+    "Delhi": (28.6139, 77.2090, ()),
+    "Dwarka": (28.5921, 77.0460, ()),
+    "Rohini": (28.7495, 77.0565, ()),
+    "Noida": (28.5355, 77.3910, ()),
+    "Gurgaon": (28.4595, 77.0266, ("gurugram",)),
+    "Connaught Place": (28.6315, 77.2167, ("cp",)),
+    "Saket": (28.5245, 77.2066, ()),
+    "Vasant Kunj": (28.5200, 77.1590, ()),
+    "Karol Bagh": (28.6519, 77.1909, ()),
+    "Lajpat Nagar": (28.5677, 77.2433, ()),
+    "Janakpuri": (28.6219, 77.0878, ()),
+    "Pitampura": (28.6980, 77.1380, ()),
+    "Mayur Vihar": (28.6040, 77.2940, ()),
+}
+
+# Well-known hospitals, used until (and alongside) the hospitals table is loaded
+LANDMARK_HOSPITALS: Dict[str, Tuple[float, float, Tuple[str, ...]]] = {
+    "AIIMS": (28.5672, 77.2100, ("all india institute of medical sciences",)),
+    "Apollo Hospital": (28.5410, 77.2830, ()),
+    "Max Hospital": (28.5275, 77.2120, ()),
+    "Fortis Hospital": (28.5203, 77.1587, ()),
+    "Safdarjung Hospital": (28.5679, 77.2058, ()),
+    "BLK Hospital": (28.6430, 77.1800, ()),
+}
+
+_GENERIC_SUFFIXES = (" hospital", " hospitals", " medical college", " clinic")
+
+def _slug(name: str) -> str:
+    return "-".join(name.lower().split())
+
+def _aliases(name: str, extra: Tuple[str, ...] = ()) -> List[str]:
+    """Lower-cased name, the name without a generic suffix ("Apollo Hospital" -> "apollo"), extras"""
+    base = " ".join(name.lower().split())
+    aliases = {base, *extra}
+    for suffix in _GENERIC_SUFFIXES:
+        if base.endswith(suffix) and len(base) - len(suffix) >= 3:
+            aliases.add(base[: -len(suffix)])
+    return [a for a in aliases if a]
+
+# ============ Aho-Corasick Automaton ============
+
+class Automaton:
+    """Multi-pattern matcher: one pass over the text finds every pattern occurrence"""
+
+    def __init__(self, patterns: Dict[str, Entity]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Entity]]] = [[]]   # (pattern length, entity)
+        self.size = len(patterns)
+
+        for pattern, entity in patterns.items():
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), entity))
+
+        # Breadth-first failure links; outputs are merged along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Match]:
+        """
+        All whole-word occurrences in `text` (expected lower-case), keeping the
+        longest match where occurrences overlap.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        found: List[Match] = []
+        node = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, entity in out[node]:
+                start, end = i - length + 1, i + 1
+                # whole words only: "max" must not match inside "maximum"
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                if end < n and text[end].isalnum():
+                    continue
+                found.append(Match(entity, start, end))
+
+        # leftmost-longest, non-overlapping
+        found.sort(key=lambda m: (m.start, -(m.end - m.start)))
+        result: List[Match] = []
+        last_end = -1
+        for m in found:
+            if m.start >= last_end:
+                result.append(m)
+                last_end = m.end
+        return result
+
+# ============ Gazetteer ============
+
+_automaton: Optional[Automaton] = None
+_by_alias: Dict[str, Entity] = {}
+
+def build(hospitals: List = ()) -> int:
+    """
+    Compile regions, landmark hospitals and `hospitals` (objects with id, name,
+    lat, lng - e.g. HospitalResponse) into a fresh automaton.
+
+    Returns:
+        Number of distinct aliases compiled
+    """
+    global _automaton, _by_alias
+    patterns: Dict[str, Entity] = {}
+
+    for name, (lat, lng, extra) in REGIONS.items():
+        entity = Entity(f"region:{_slug(name)}", "region", name, lat, lng)
+        for alias in _aliases(name, extra):
+            patterns[alias] = entity
+    for name, (lat, lng, extra) in LANDMARK_HOSPITALS.items():
+        entity = Entity(f"landmark:{_slug(name)}", "hospital", name, lat, lng)
+        for alias in _aliases(name, extra):
+            patterns[alias] = entity
+    # Database hospitals win over landmarks/regions with the same alias
+    for h in hospitals:
+        lat, lng = h.lat, h.lng
+        if lat is None or lng is None:
+            # borrow coordinates from a landmark with the same name, if any
+            known = patterns.get(" ".join(h.name.lower().split()))
+            lat, lng = (known.lat, known.lng) if known else (None, None)
+        entity = Entity(f"hospital:{h.id}", "hospital", h.name, lat, lng)
+        for alias in _aliases(h.name):
+            patterns[alias] = entity
+
+    _automaton = Automaton(patterns)
+    _by_alias = patterns
+    return len(patterns)
+
+def _rebuild_from_registry(hospitals) -> None:
+    count = build(hospitals)
+    log.info("gazetteer.rebuilt", "Gazetteer rebuilt", names=count)
+
+def find_places(text: str) -> List[Match]:
+    """All known hospitals/regions mentioned in `text`, in order of appearance"""
+    if _automaton is None:
+        build()
+    return _automaton.find_all(text.lower())
+
+def best_place(text: str) -> Optional[Entity]:
+    """
+    The most specific place in `text`: hospitals beat regions, earlier mentions
+    beat later ones.
+    """
+    matches = find_places(text)
+    if not matches:
+        return None
+    hospitals = [m for m in matches if m.entity.kind == "hospital"]
+    return (hospitals or matches)[0].entity
+
+def resolve(name: Optional[str]) -> Optional[Entity]:
+    """Resolve a free-form place name (e.g. an LLM-extracted region) to an entity"""
+    if not name:
+        return None
+    if _automaton is None:
+        build()
+    return _by_alias.get(" ".join(name.lower().split())) or best_place(name)
+
+def nearest(lat: float, lng: float, kind: Optional[str] = None) -> Optional[Tuple[Entity, float]]:
+    """
+    Closest known place to a coordinate (equirectangular distance; fine at city scale).
+
+    Returns:
+        (entity, distance_km), or None if no place of that kind has coordinates
+    """
+    if _automaton is None:
+        build()
+    best: Optional[Tuple[Entity, float]] = None
+    scale = math.cos(math.radians(lat))
+    for entity in set(_by_alias.values()):
+        if entity.lat is None or entity.lng is None or (kind and entity.kind != kind):
+            continue
+        km = 111.32 * math.hypot(entity.lat - lat, (entity.lng - lng) * scale)
+        if best is None or km < best[1]:
+            best = (entity, km)
+    return best
+
+# Rebuild whenever hospitals are (re)loaded
+on_hospitals_changed(_rebuild_from_registry)
+
+__all__ = ["Entity", "Match", "Automaton", "build", "find_places", "best_place", "resolve", "nearest"]
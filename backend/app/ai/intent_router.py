@@ -0,0 +1,209 @@
+# backend/app/ai/intent_router.py
+# Offline intent classifier for the chat assistant.
+#
+# Messages are embedded with signed feature hashing of word unigrams,
+# word bigrams and character n-grams (no model download, no network) and
+# matched against labelled example utterances in an in-memory index (a
+# normalized NumPy matrix; one sparse dot product per query). Blood
+# groups and known places are replaced by placeholders first, so
+# "O- donors near AIIMS" and "B+ donors in Rohini" embed alike.
+import math
+import re
+import zlib
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.ai import gazetteer
+from app.services.hospital_registry import on_hospitals_changed
+
+DIM = 2048
+TOP_K = 5
+MIN_SIMILARITY = 0.30       # below this the caller falls back to its rules
+
+# Labelled examples: intent -> utterances (placeholders: <bg> blood group, <place> hospital/region)
+EXAMPLES: Dict[str, List[str]] = {
+    "greeting": [
+        "hi", "hello", "hey", "hey there", "hello there", "hi assistant", "good morning",
+        "good afternoon", "good evening", "namaste", "yo", "hiya", "greetings",
+    ],
+    "thanks": [
+        "thanks", "thank you", "thank you so much", "thanks a lot", "thx", "many thanks",
+        "much appreciated", "thanks for the help", "great, thanks", "cheers", "that helped, thank you",
+        "appreciate it",
+    ],
+    "small_talk": [
+        "how are you", "how are you doing", "what's up", "what is your name", "who are you",
+        "are you a bot", "are you human", "who made you", "how is your day", "what are you",
+        "tell me about yourself",
+    ],
+    "help": [
+        "help", "what can you do", "how do i use this", "how can you help me", "show me the commands",
+        "what should i ask you", "i need help using this", "what are your features", "how does this work",
+        "what kind of questions can i ask", "give me some examples",
+    ],
+    "compatibility_info": [
+        "who can donate to <bg>", "who can give blood to <bg>", "which blood groups are compatible with <bg>",
+        "can <bg> donate to <bg>", "can a <bg> person receive <bg> blood", "is <bg> compatible with <bg>",
+        "what blood can <bg> receive", "who is the universal donor", "which blood type is the universal recipient",
+        "blood compatibility chart", "what groups can receive <bg> blood", "<bg> can receive from which groups",
+        "explain blood type compatibility", "which donors match a <bg> patient",
+    ],
+    "recommend_location": [
+        "where should we organize a camp", "best place to host a blood donation camp",
+        "recommend a location for a camp", "where to hold a donation drive", "suggest camp locations",
+        "which area is best for a blood camp", "where should the next drive be", "good spot for a blood donation camp",
+        "where do we have the most donors", "which neighbourhood should we target for a camp",
+        "plan a donation camp location", "where to set up a donation camp",
+    ],
+    "list_donor_names": [
+        "list donors near <place>", "list the names of <bg> donors", "show me donor names", "show donors in <place>",
+        "give me the names of donors near <place>", "display all <bg> donors", "names of donors at <place>",
+        "list all available donors", "show the donor list", "who are the <bg> donors near <place>",
+        "list <bg> donors in <place>",
+    ],
+    "find_donor": [
+        "find <bg> donors near <place>", "need <bg> blood urgently", "need <bg> blood at <place>",
+        "any <bg> donors around <place>", "search for <bg> donors", "i need a <bg> donor",
+        "looking for blood donors near <place>", "urgent requirement of <bg> blood in <place>",
+        "who can donate <bg> near <place> today", "donors near <place>", "find donors", "<bg> donor needed",
+        "patient needs <bg> blood at <place>", "is anyone available to donate <bg>", "get me <bg> donors close to <place>",
+        "blood required for surgery at <place>", "are there donors nearby",
+    ],
+}
+
+CONVERSATION_INTENTS = ("greeting", "thanks", "small_talk")
+
+# Same blood-group forms the regex parser accepts
+_BLOOD_GROUP = re.compile(
+    r"(?<![A-Za-z])(AB|A|B|O)\s*(\+|-|PLUS|MINUS|POSITIVE|NEGATIVE|POS|NEG)(?![A-Za-z])",
+    re.IGNORECASE,
+)
+_TOKEN = re.compile(r"<\w+>|[a-z0-9']+")
+
+# Index stored transposed (DIM, examples) so a query only touches the rows
+# of its non-zero features (~50 of DIM)
+_index: Optional[np.ndarray] = None
+_labels: List[str] = []
+
+# feature -> signed bucket; n-grams repeat across messages, so hashing is memoized
+_codes: Dict[str, int] = {}
+_MAX_CODES = 200_000
+
+def _bucket(feature: str) -> int:
+    code = _codes.get(feature)
+    if code is None:
+        # crc32 is stable across processes (unlike hash()); the top bit picks the sign
+        h = zlib.crc32(feature.encode())
+        code = h % DIM if h & 0x80000000 else -(h % DIM) - 1
+        if len(_codes) >= _MAX_CODES:
+            _codes.clear()
+        _codes[feature] = code
+    return code
+
+def normalize(text: str) -> str:
+    """Lower-case and replace blood groups and known places with placeholders"""
+    text = _BLOOD_GROUP.sub(" <bg> ", text)
+    lowered = text.lower()
+    out, last = [], 0
+    for m in gazetteer.find_places(lowered):
+        out.append(lowered[last:m.start])
+        out.append(" <place> ")
+        last = m.end
+    out.append(lowered[last:])
+    return "".join(out)
+
+def embed(text: str) -> np.ndarray:
+    """Signed hashed bag of word 1-2 grams and character 3-5 grams, L2-normalized"""
+    tokens = _TOKEN.findall(normalize(text))
+    words: List[str] = []
+    chars: List[str] = []
+    for i, tok in enumerate(tokens):
+        words.append("w:" + tok)
+        if i:
+            words.append("b:" + tokens[i - 1] + " " + tok)
+        if not tok.startswith("<"):
+            padded = f"#{tok}#"
+            for n in (3, 4, 5):
+                chars.extend("c:" + padded[j:j + n] for j in range(len(padded) - n + 1))
+
+    # Encoded buckets: i >= 0 adds to i, i < 0 subtracts from -i - 1
+    codes = np.fromiter((_bucket(f) for f in words + chars), dtype=np.int64, count=len(words) + len(chars))
+    weights = np.empty(codes.size, dtype=np.float64)
+    weights[:len(words)] = 1.0
+    weights[len(words):] = 0.5
+    negative = codes < 0
+    weights[negative] *= -1
+    codes[negative] = -codes[negative] - 1
+    vec = np.bincount(codes, weights=weights, minlength=DIM).astype(np.float32)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+def build_index(examples: Optional[Dict[str, List[str]]] = None) -> int:
+    """
+    Embed the labelled examples into the in-memory index.
+
+    Returns:
+        Number of indexed examples
+    """
+    global _index, _labels
+    examples = examples or EXAMPLES
+    labels, rows = [], []
+    for intent, utterances in examples.items():
+        for utterance in utterances:
+            labels.append(intent)
+            rows.append(embed(utterance))
+    matrix = np.vstack(rows) if rows else np.zeros((0, DIM), dtype=np.float32)
+    _index = np.ascontiguousarray(matrix.T)
+    _labels = labels
+    classify.cache_clear()
+    return len(labels)
+
+@lru_cache(maxsize=1024)   # /ai/chat routes the same message twice (conversation + task intent)
+def classify(text: str) -> Tuple[str, float]:
+    """
+    Nearest-neighbour vote over the labelled examples.
+
+    Returns:
+        (intent, confidence): the similarity-weighted top-k winner and the
+        best cosine similarity among its examples
+    """
+    if _index is None:
+        build_index()
+    vec = embed(text)
+    nz = np.flatnonzero(vec)
+    sims = vec[nz] @ _index[nz]
+    k = min(TOP_K, sims.size)
+    top = np.argpartition(-sims, k - 1)[:k]
+    votes: Dict[str, float] = {}
+    best: Dict[str, float] = {}
+    for i, s in zip(top.tolist(), sims[top].tolist()):
+        if s <= 0:
+            continue
+        label = _labels[i]
+        votes[label] = votes.get(label, 0.0) + s
+        best[label] = max(best.get(label, 0.0), s)
+    if not votes:
+        return ("find_donor", 0.0)
+    intent = max(votes, key=votes.get)
+    return (intent, round(best[intent], 3))
+
+def route(text: str) -> Optional[Tuple[str, float]]:
+    """(intent, confidence) if the classifier is confident enough, otherwise None"""
+    intent, confidence = classify(text)
+    if confidence < MIN_SIMILARITY or math.isnan(confidence):
+        return None
+    return (intent, confidence)
+
+def _on_places_changed(_hospitals) -> None:
+    # Hospital names are <place> placeholders in both messages and examples:
+    # re-embed the examples lazily and forget classifications made with the
+    # old gazetteer (runs after the gazetteer's own rebuild listener)
+    global _index
+    _index = None
+    classify.cache_clear()
+
+on_hospitals_changed(_on_places_changed)
+
+__all__ = ["EXAMPLES", "CONVERSATION_INTENTS", "normalize", "embed", "build_index", "classify", "route"]
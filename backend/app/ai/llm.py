@@ -0,0 +1,316 @@
+# backend/app/ai/llm.py
+# Shared LLM client and prompt chains for the AI assistant.
+#
+# The client and chains are built once (on first use, or by the warm-up
+# task main starts once the app is ready; LangChain is only imported then) and
+# every call goes through a global semaphore and a per-call timeout so a
+# slow provider cannot pile up requests or block chat responses.
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from pydantic import BaseModel as PydanticBaseModel
+
+from app.database import settings
+from app.services.metrics import LLM_LATENCY
+from app.services.startup import record_lazy_load
+from app.services.timing import record_phase
+from app.services.tracing import span, start_span
+from app.services.log import get_logger
+
+log = get_logger("ai.llm")
+
+PARSE_SYSTEM_PROMPT = """You are a parser that extracts information from blood donation queries.
+            Extract:
+            1. Blood group (format: A+, B-, O+, AB+, etc.) - if mentioned
+            2. Region/location (e.g., "AIIMS", "Delhi", "South Delhi", "near hospital name") - if mentioned
+
+            Return JSON with blood_group and region fields. If not found, use null.
+            {format_instructions}"""
+
+FORMAT_SYSTEM_PROMPT = (
+    "You are a friendly assistant for a blood donation platform. Keep responses concise and conversational. "
+    "Only include full donor names and contact details if the user explicitly requests them. "
+    "Otherwise, give a short summary and offer follow-up options (e.g., 'Would you like names, contact info, or directions?')."
+)
+
+FORMAT_HUMAN_PROMPT = (
+    "Original query: {message}\nFound {count} donors: {donor_list}\n\n"
+    "Provide a friendly, concise response. If the user didn't ask for details, offer follow-ups instead of listing full details."
+)
+
+class MessageInfo(PydanticBaseModel):
+    """Structured output of the parse chain"""
+    blood_group: Optional[str] = None
+    region: Optional[str] = None
+
+class LLMTimeout(Exception):
+    """Raised when an LLM call exceeds LLM_TIMEOUT_SECONDS (including queueing)"""
+
+# Built by init_llm()
+_initialized = False
+_init_lock = threading.Lock()  # init_llm may run in a warm-up thread
+_llm = None
+_parse_chain = None
+_parse_format_instructions = ""
+_format_chain = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+# ============ Providers ============
+
+def _build_fake_llm():
+    """Local stand-in for benchmarking: fixed latency, deterministic output, no network"""
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, AIMessageChunk
+    from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+    class FakeChatModel(BaseChatModel):
+        latency_s: float = 0.3
+
+        @property
+        def _llm_type(self) -> str:
+            return "nss-fake-chat"
+
+        def _reply(self, messages) -> str:
+            human = str(messages[-1].content)
+            if human.startswith("Message: "):
+                # Parse prompt: answer with the regex parser's result as JSON
+                from app.ai.ai_routes import parse_message_regex
+                parsed = parse_message_regex(human[len("Message: "):])
+                return json.dumps({"blood_group": parsed.get("blood_group"), "region": parsed.get("region")})
+            first_line = human.splitlines()[1] if "\n" in human else human
+            return f"{first_line}. Would you like their names, contact info, or directions?"
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            time.sleep(self.latency_s)
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+            await asyncio.sleep(self.latency_s)
+            return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._reply(messages)))])
+
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            # First token after a third of the latency, the rest spread over the remainder
+            words = self._reply(messages).split(" ")
+            await asyncio.sleep(self.latency_s / 3)
+            for i, word in enumerate(words):
+                if i:
+                    await asyncio.sleep(self.latency_s * 2 / 3 / len(words))
+                yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+
+    return FakeChatModel(latency_s=settings.LLM_FAKE_LATENCY_MS / 1000.0)
+
+def _build_openai_llm():
+    api_key = settings.OPENAI_API_KEY
+    if not api_key or api_key == "dummy_key" or api_key.startswith("your_api_key"):
+        return None
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError:
+        log.warning("llm.unavailable", "langchain_openai not installed. Using simulated responses.")
+        return None
+    return ChatOpenAI(
+        model_name=settings.LLM_MODEL,
+        temperature=0.7,
+        openai_api_key=api_key,
+        request_timeout=settings.LLM_TIMEOUT_SECONDS,
+        max_retries=0,  # retries would blow through the per-call timeout
+    )
+
+def init_llm() -> bool:
+    """
+    Build the LLM client and both prompt chains once.
+
+    The provider is chosen by LLM_PROVIDER: "openai" (needs OPENAI_API_KEY),
+    "fake" (local, fixed latency; for benchmarks) or "none".
+
+    Returns:
+        True if an LLM is available, False if callers should use fallbacks
+    """
+    if _initialized:
+        return _llm is not None
+    with _init_lock:
+        if _initialized:
+            return _llm is not None
+        start = time.perf_counter()
+        try:
+            return _build_chains()
+        finally:
+            record_lazy_load("llm", time.perf_counter() - start)
+
+def _build_chains() -> bool:
+    global _initialized, _llm, _parse_chain, _parse_format_instructions, _format_chain, _semaphore
+    _semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+
+    provider = settings.LLM_PROVIDER.lower()
+    try:
+        if provider == "fake":
+            _llm = _build_fake_llm()
+        elif provider == "openai":
+            _llm = _build_openai_llm()
+        else:
+            _llm = None
+        if _llm is None:
+            return False
+
+        from langchain.prompts import ChatPromptTemplate
+        from langchain.output_parsers import PydanticOutputParser
+
+        parser = PydanticOutputParser(pydantic_object=MessageInfo)
+        _parse_format_instructions = parser.get_format_instructions()
+        _parse_chain = ChatPromptTemplate.from_messages([
+            ("system", PARSE_SYSTEM_PROMPT),
+            ("human", "Message: {message}"),
+        ]) | _llm | parser
+
+        _format_chain = ChatPromptTemplate.from_messages([
+            ("system", FORMAT_SYSTEM_PROMPT),
+            ("human", FORMAT_HUMAN_PROMPT),
+        ]) | _llm
+        log.info("llm.ready", "LLM client ready", provider=provider)
+        return True
+    except Exception as e:
+        log.warning("llm.unavailable", "Could not initialize LLM client", error=str(e))
+        _llm = _parse_chain = _format_chain = None
+        return False
+    finally:
+        # Set last, so other callers never see a half-built client
+        _initialized = True
+
+def get_llm():
+    """Return the shared LLM client, or None when no provider is configured"""
+    init_llm()
+    return _llm
+
+def reset_llm() -> None:
+    """Forget the built client so the next call re-reads settings (used by benchmarks)"""
+    global _initialized, _llm, _parse_chain, _format_chain
+    _initialized = False
+    _llm = _parse_chain = _format_chain = None
+
+# ============ Guarded Calls ============
+
+async def _ainvoke(chain, inputs: Dict[str, Any], operation: str):
+    """Run `chain.ainvoke` under the global semaphore and LLM_TIMEOUT_SECONDS"""
+    async def call():
+        async with _semaphore:
+            return await chain.ainvoke(inputs)
+
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with span(f"llm.{operation}", {"llm.model": settings.LLM_MODEL, "llm.provider": settings.LLM_PROVIDER}, kind="CLIENT"):
+            result = await asyncio.wait_for(call(), timeout=settings.LLM_TIMEOUT_SECONDS)
+        outcome = "ok"
+        return result
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise LLMTimeout(f"LLM call exceeded {settings.LLM_TIMEOUT_SECONDS}s")
+    finally:
+        elapsed = time.perf_counter() - start
+        LLM_LATENCY.labels(operation, outcome).observe(elapsed)
+        record_phase("llm", elapsed)
+
+async def parse_message(message: str) -> Optional[dict]:
+    """
+    Extract blood group and region with the LLM.
+
+    Returns:
+        dict with 'blood_group' and 'region', or None when no LLM is configured
+
+    Raises:
+        LLMTimeout: if the call (including waiting for a slot) times out
+    """
+    if not init_llm():
+        return None
+    result = await _ainvoke(_parse_chain, {
+        "message": message,
+        "format_instructions": _parse_format_instructions,
+    }, "parse")
+    return {"blood_group": result.blood_group, "region": result.region}
+
+async def format_donors(message: str, count: int, donor_list: str) -> Optional[str]:
+    """
+    Phrase a donor search result conversationally with the LLM.
+
+    Returns:
+        The reply text, or None when no LLM is configured
+
+    Raises:
+        LLMTimeout: if the call (including waiting for a slot) times out
+    """
+    if not init_llm():
+        return None
+    response = await _ainvoke(_format_chain, {
+        "message": message,
+        "count": count,
+        "donor_list": donor_list,
+    }, "format")
+    return response.content if hasattr(response, "content") else str(response)
+
+async def stream_format_donors(message: str, count: int, donor_list: str) -> Optional[AsyncIterator[str]]:
+    """
+    Streaming variant of format_donors: yields the reply text as it is generated.
+
+    Returns:
+        Async iterator of text chunks, or None when no LLM is configured
+
+    Raises (while iterating):
+        LLMTimeout: if waiting for a slot or for the next chunk outlasts LLM_TIMEOUT_SECONDS overall
+    """
+    if not init_llm():
+        return None
+
+    async def chunks() -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.LLM_TIMEOUT_SECONDS
+        start = time.perf_counter()
+        # not made current: the generator may be resumed from another context
+        trace = start_span("llm.stream", {"llm.model": settings.LLM_MODEL, "llm.provider": settings.LLM_PROVIDER}, kind="CLIENT")
+        try:
+            await asyncio.wait_for(_semaphore.acquire(), timeout=settings.LLM_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError as e:
+            LLM_LATENCY.labels("stream", "timeout").observe(time.perf_counter() - start)
+            if trace is not None:
+                trace.end(e)
+            raise LLMTimeout(f"LLM call exceeded {settings.LLM_TIMEOUT_SECONDS}s")
+        outcome = "error"
+        stream = _format_chain.astream({
+            "message": message,
+            "count": count,
+            "donor_list": donor_list,
+        })
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), timeout=max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    outcome = "timeout"
+                    raise LLMTimeout(f"LLM stream exceeded {settings.LLM_TIMEOUT_SECONDS}s")
+                text = chunk.content if hasattr(chunk, "content") else str(chunk)
+                if text:
+                    yield text
+            outcome = "ok"
+        finally:
+            _semaphore.release()
+            await stream.aclose()
+            LLM_LATENCY.labels("stream", outcome).observe(time.perf_counter() - start)
+            if trace is not None:
+                trace.set_attribute("llm.outcome", outcome)
+                trace.end()
+
+    return chunks()
+
+__all__ = [
+    "LLMTimeout",
+    "init_llm",
+    "get_llm",
+    "reset_llm",
+    "parse_message",
+    "format_donors",
+    "stream_format_donors",
+]
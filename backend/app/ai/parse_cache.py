@@ -0,0 +1,104 @@
+# backend/app/ai/parse_cache.py
+# Two-tier memo cache for LLM message parses: a bounded in-process LRU in
+# front of a shared Redis tier with TTL. Keys are normalized messages, so
+# "Find O+ donors near AIIMS!" and "find  o+ donors near aiims" share an entry.
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from app.database import settings
+from app.services.cache import get_redis_client
+from app.services.log import get_logger
+
+log = get_logger("ai.parse_cache")
+
+KEY_PREFIX = "ai:parse"
+
+# Everything except letters, digits, whitespace and the +/- of blood groups
+_PUNCTUATION = re.compile(r"[^\w\s+\-]+")
+_WHITESPACE = re.compile(r"\s+")
+
+_lru: "OrderedDict[str, dict]" = OrderedDict()
+_stats: Dict[str, int] = {"local_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0}
+
+def normalize_message(message: str) -> str:
+    """Fold case, punctuation and whitespace so near-identical queries share a key"""
+    text = _PUNCTUATION.sub(" ", message.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+def _redis_key(normalized: str) -> str:
+    return f"{KEY_PREFIX}:{hashlib.sha1(normalized.encode()).hexdigest()}"
+
+def _remember(normalized: str, parsed: dict) -> None:
+    _lru[normalized] = parsed
+    _lru.move_to_end(normalized)
+    while len(_lru) > settings.PARSE_CACHE_SIZE:
+        _lru.popitem(last=False)
+
+async def get_cached_parse(message: str) -> Optional[dict]:
+    """
+    Look up a previous parse of an equivalent message.
+
+    Returns:
+        Copy of the cached parse (dict), or None on a miss
+    """
+    normalized = normalize_message(message)
+    parsed = _lru.get(normalized)
+    if parsed is not None:
+        _lru.move_to_end(normalized)
+        _stats["local_hits"] += 1
+        return dict(parsed)
+
+    try:
+        client = await get_redis_client()
+        raw = await client.get(_redis_key(normalized))
+    except Exception as e:
+        log.error("cache.error", "Error reading parse cache", error=str(e))
+        raw = None
+
+    if raw is None:
+        _stats["misses"] += 1
+        return None
+    parsed = json.loads(raw)
+    _remember(normalized, parsed)
+    _stats["redis_hits"] += 1
+    return dict(parsed)
+
+async def store_parse(message: str, parsed: dict) -> None:
+    """Cache a parse in both tiers (Redis entries expire after PARSE_CACHE_TTL_SECONDS)"""
+    normalized = normalize_message(message)
+    _remember(normalized, dict(parsed))
+    _stats["stores"] += 1
+    try:
+        client = await get_redis_client()
+        await client.set(_redis_key(normalized), json.dumps(parsed), ex=settings.PARSE_CACHE_TTL_SECONDS)
+    except Exception as e:
+        log.error("cache.error", "Error writing parse cache", error=str(e))
+
+def parse_cache_stats() -> dict:
+    """Hit/miss counters for this worker plus the current LRU size"""
+    lookups = _stats["local_hits"] + _stats["redis_hits"] + _stats["misses"]
+    hits = _stats["local_hits"] + _stats["redis_hits"]
+    return {
+        **_stats,
+        "lookups": lookups,
+        "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        "lru_size": len(_lru),
+        "lru_capacity": settings.PARSE_CACHE_SIZE,
+    }
+
+def clear_parse_cache() -> None:
+    """Drop the in-process tier and reset counters (Redis entries expire on their own)"""
+    _lru.clear()
+    for k in _stats:
+        _stats[k] = 0
+
+__all__ = [
+    "normalize_message",
+    "get_cached_parse",
+    "store_parse",
+    "parse_cache_stats",
+    "clear_parse_cache",
+]
@@ -0,0 +1,345 @@
+# backend/app/ai/recommender.py
+# Camp location recommender.
+#
+# A periodic job bins every donor into a grid of RECOMMENDER_CELL_KM cells
+# (vectorized with NumPy), weighs each neighbourhood by eligible donors and
+# by recent demand at nearby hospitals, and publishes the top locations to
+# Redis with a version stamp. /ai/recommend-location only reads that
+# snapshot, so its cost does not depend on the number of donors.
+import asyncio
+import json
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, case, func, or_, select
+
+from app.ai import gazetteer
+from app.database import settings
+from app.database.database import SessionLocal
+from app.models.models import ArchivedRequest, Donor, Request, UrgencyLevel
+from app.services.cache import get_redis_client
+from app.services.hospital_registry import list_hospitals
+from app.services.log import get_logger
+
+log = get_logger("ai.recommender")
+
+SNAPSHOT_KEY = "ai:recommendations"
+VERSION_KEY = "ai:recommendations:version"
+
+DONATION_INTERVAL_DAYS = 90         # whole blood: donors are eligible again after ~3 months
+URGENCY_WEIGHTS = {
+    UrgencyLevel.LOW.value: 1.0,
+    UrgencyLevel.MEDIUM.value: 2.0,
+    UrgencyLevel.HIGH.value: 3.0,
+    UrgencyLevel.CRITICAL.value: 5.0,
+}
+SUPPLY_WEIGHT = 0.6                 # share of the score from eligible donors (rest: demand)
+MAX_GRID_CELLS = 4_000_000          # the cell size is coarsened beyond this
+KM_PER_DEGREE = 111.32
+LOAD_CHUNK = 50_000
+
+# Latest snapshot seen by this worker
+_snapshot: Optional[dict] = None
+_refresh_lock: Optional[asyncio.Lock] = None
+
+# ============ Vectorized Scoring ============
+
+def _box_sum(grid: np.ndarray, r: int) -> np.ndarray:
+    """Sum of each cell's (2r+1)x(2r+1) neighbourhood, via an integral image"""
+    h, w = grid.shape
+    integral = np.zeros((h + 1, w + 1), dtype=np.float64)
+    integral[1:, 1:] = grid.cumsum(axis=0).cumsum(axis=1)
+    y0 = np.clip(np.arange(h) - r, 0, h)
+    y1 = np.clip(np.arange(h) + r + 1, 0, h)
+    x0 = np.clip(np.arange(w) - r, 0, w)
+    x1 = np.clip(np.arange(w) + r + 1, 0, w)
+    return (
+        integral[np.ix_(y1, x1)] - integral[np.ix_(y0, x1)]
+        - integral[np.ix_(y1, x0)] + integral[np.ix_(y0, x0)]
+    )
+
+def score_locations(
+    donor_lat: np.ndarray,
+    donor_lng: np.ndarray,
+    eligible: np.ndarray,
+    hospital_lat: np.ndarray,
+    hospital_lng: np.ndarray,
+    hospital_demand: np.ndarray,
+    cell_km: float = 2.0,
+    demand_km: float = 5.0,
+    top_k: int = 3,
+    min_separation_km: Optional[float] = None,
+) -> List[dict]:
+    """
+    Rank grid neighbourhoods for a donation camp.
+
+    Each cell's supply is the number of eligible donors in its 3x3
+    neighbourhood; its demand is the urgency-weighted request count of
+    hospitals within `demand_km`. Both are normalized to the best cell and
+    combined (SUPPLY_WEIGHT supply, the rest demand). Picks are at least
+    `min_separation_km` apart (default: 3 cells).
+
+    Returns:
+        Up to `top_k` dicts: lat, lng, score (0-100), eligible, donors, demand
+    """
+    if donor_lat.size == 0:
+        return []
+
+    # Grid anchored on the donor cloud, ignoring extreme outliers
+    lat_lo, lat_hi = np.percentile(donor_lat, [0.05, 99.95])
+    lng_lo, lng_hi = np.percentile(donor_lng, [0.05, 99.95])
+    cos_lat = max(math.cos(math.radians((lat_lo + lat_hi) / 2)), 0.01)
+    while True:
+        dlat = cell_km / KM_PER_DEGREE
+        dlng = cell_km / (KM_PER_DEGREE * cos_lat)
+        h = int((lat_hi - lat_lo) / dlat) + 1
+        w = int((lng_hi - lng_lo) / dlng) + 1
+        if h * w <= MAX_GRID_CELLS:
+            break
+        cell_km *= 2
+
+    inside = (donor_lat >= lat_lo) & (donor_lat <= lat_hi) & (donor_lng >= lng_lo) & (donor_lng <= lng_hi)
+    iy = ((donor_lat[inside] - lat_lo) / dlat).astype(np.int64)
+    ix = ((donor_lng[inside] - lng_lo) / dlng).astype(np.int64)
+    flat = iy * w + ix
+    donors_grid = np.bincount(flat, minlength=h * w).reshape(h, w).astype(np.float64)
+    eligible_grid = np.bincount(flat, weights=eligible[inside].astype(np.float64), minlength=h * w).reshape(h, w)
+
+    supply = _box_sum(eligible_grid, 1)
+    donors = _box_sum(donors_grid, 1)
+
+    # Demand: hospital weights spread over every cell within demand_km
+    demand = np.zeros((h, w), dtype=np.float64)
+    if hospital_lat.size:
+        hy = np.floor((hospital_lat - lat_lo) / dlat).astype(np.int64)
+        hx = np.floor((hospital_lng - lng_lo) / dlng).astype(np.int64)
+        on_grid = (hy >= 0) & (hy < h) & (hx >= 0) & (hx < w)
+        if on_grid.any():
+            points = np.bincount(
+                hy[on_grid] * w + hx[on_grid],
+                weights=hospital_demand[on_grid].astype(np.float64),
+                minlength=h * w,
+            ).reshape(h, w)
+            demand = _box_sum(points, max(int(math.ceil(demand_km / cell_km)), 0))
+
+    max_supply = supply.max()
+    if max_supply <= 0:
+        return []
+    max_demand = demand.max()
+    score = SUPPLY_WEIGHT * supply / max_supply
+    if max_demand > 0:
+        score += (1 - SUPPLY_WEIGHT) * demand / max_demand
+    else:
+        score = supply / max_supply
+    score[supply <= 0] = 0.0
+
+    # Best cells first; skip cells too close to an earlier pick
+    separation = min_separation_km if min_separation_km is not None else 3 * cell_km
+    min_cells = separation / cell_km
+    candidates = np.flatnonzero(score.ravel() > 0)
+    order = candidates[np.argsort(-score.ravel()[candidates], kind="stable")]
+    picks: List[Tuple[int, int]] = []
+    for idx in order:
+        y, x = divmod(int(idx), w)
+        if all(math.hypot(y - py, x - px) >= min_cells for py, px in picks):
+            picks.append((y, x))
+            if len(picks) >= top_k:
+                break
+
+    return [
+        {
+            "lat": round(lat_lo + (y + 0.5) * dlat, 5),
+            "lng": round(lng_lo + (x + 0.5) * dlng, 5),
+            "score": round(float(score[y, x]) * 100, 1),
+            "eligible": int(supply[y, x]),
+            "donors": int(donors[y, x]),
+            "demand": round(float(demand[y, x]), 1),
+            "radius_km": round(1.5 * cell_km, 1),
+        }
+        for y, x in picks
+    ]
+
+# ============ Data Loading ============
+
+def _load_donor_arrays(db) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Stream (lat, lng, eligible) for every donor into NumPy arrays"""
+    cutoff = datetime.utcnow() - timedelta(days=DONATION_INTERVAL_DAYS)
+    is_eligible = case(
+        (and_(Donor.available == True, or_(Donor.last_donation_date.is_(None), Donor.last_donation_date < cutoff)), 1),
+        else_=0,
+    )
+    # Core result with a server-side cursor: no ORM row processing, bounded memory
+    result = db.connection().execution_options(stream_results=True).execute(
+        select(Donor.lat, Donor.lng, is_eligible)
+    )
+    # (tuples: NumPy converts plain tuples far faster than Row objects)
+    chunks = [np.array([tuple(r) for r in rows], dtype=np.float64) for rows in result.partitions(LOAD_CHUNK)]
+    if not chunks:
+        empty = np.empty(0, dtype=np.float64)
+        return empty, empty, empty
+    data = np.concatenate(chunks)
+    return data[:, 0], data[:, 1], data[:, 2]
+
+def _load_demand(db) -> Dict[int, Dict[str, int]]:
+    """Recent request counts per hospital and urgency (live and archived)"""
+    since = datetime.utcnow() - timedelta(days=settings.RECOMMENDER_DEMAND_DAYS)
+    demand: Dict[int, Dict[str, int]] = {}
+    for model in (Request, ArchivedRequest):
+        rows = (
+            db.query(model.hospital_id, model.urgency, func.count(model.id))
+            .filter(model.created_at >= since)
+            .group_by(model.hospital_id, model.urgency)
+            .all()
+        )
+        for hospital_id, urgency, count in rows:
+            level = getattr(urgency, "value", urgency)
+            by_urgency = demand.setdefault(hospital_id, {})
+            by_urgency[level] = by_urgency.get(level, 0) + count
+    return demand
+
+def _label(lat: float, lng: float, used: set) -> str:
+    """Name a pick after the nearest region (or hospital, if the region is taken)"""
+    for kind, template in (("region", "{}"), ("hospital", "Near {}")):
+        found = gazetteer.nearest(lat, lng, kind)
+        if found is not None and found[1] <= 10:
+            label = template.format(found[0].name)
+            if label not in used:
+                return label
+    return f"Area around {lat:.3f}, {lng:.3f}"
+
+def compute_recommendations(db, top_k: int = 3) -> dict:
+    """
+    Run the full analysis against the database.
+
+    Returns:
+        Snapshot dict: recommendations, donors_analyzed, computed_at, duration_ms
+    """
+    started = time.perf_counter()
+    donor_lat, donor_lng, eligible = _load_donor_arrays(db)
+    demand = _load_demand(db)
+
+    hospitals = [h for h in list_hospitals(db) if h.lat is not None and h.lng is not None]
+    requests_by_hospital = {h.id: demand.get(h.id, {}) for h in hospitals}
+    weights = np.array([
+        sum(URGENCY_WEIGHTS.get(level, 1.0) * n for level, n in requests_by_hospital[h.id].items())
+        for h in hospitals
+    ], dtype=np.float64)
+    hospital_lat = np.array([h.lat for h in hospitals], dtype=np.float64)
+    hospital_lng = np.array([h.lng for h in hospitals], dtype=np.float64)
+
+    picks = score_locations(
+        donor_lat, donor_lng, eligible,
+        hospital_lat, hospital_lng, weights,
+        cell_km=settings.RECOMMENDER_CELL_KM,
+        demand_km=settings.RECOMMENDER_DEMAND_KM,
+        top_k=top_k,
+    )
+
+    recommendations = []
+    used: set = set()
+    for pick in picks:
+        # Requests at hospitals close to the pick, for the explanation
+        nearby = [
+            h for h in hospitals
+            if KM_PER_DEGREE * math.hypot(h.lat - pick["lat"], (h.lng - pick["lng"]) * math.cos(math.radians(pick["lat"])))
+            <= settings.RECOMMENDER_DEMAND_KM
+        ]
+        recent = sum(sum(requests_by_hospital[h.id].values()) for h in nearby)
+        critical = sum(requests_by_hospital[h.id].get(UrgencyLevel.CRITICAL.value, 0) for h in nearby)
+
+        location = _label(pick["lat"], pick["lng"], used)
+        used.add(location)
+        reason = f"{pick['eligible']:,} eligible donors within ~{pick['radius_km']:g} km"
+        if recent:
+            reason += (
+                f"; {recent} requests in the last {settings.RECOMMENDER_DEMAND_DAYS} days at "
+                f"{len(nearby)} nearby hospital{'s' if len(nearby) != 1 else ''}"
+                + (f" ({critical} critical)" if critical else "")
+            )
+        else:
+            reason += "; no recent requests at nearby hospitals"
+        recommendations.append({
+            "location": location,
+            "score": pick["score"],
+            "reason": reason,
+            "lat": pick["lat"],
+            "lng": pick["lng"],
+            "donor_count": pick["donors"],
+            "eligible_count": pick["eligible"],
+        })
+
+    return {
+        "recommendations": recommendations,
+        "donors_analyzed": int(donor_lat.size),
+        "computed_at": datetime.utcnow().isoformat() + "Z",
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+def _compute_with_new_session() -> dict:
+    db = SessionLocal()
+    try:
+        return compute_recommendations(db)
+    finally:
+        db.close()
+
+# ============ Cached Snapshot ============
+
+async def refresh_recommendations() -> dict:
+    """
+    Recompute recommendations and publish them with a new version stamp.
+    Used as the periodic background job.
+
+    Returns:
+        The published snapshot
+    """
+    global _snapshot
+    # Loading donors and binning them is blocking; keep it off the event loop
+    snapshot = await asyncio.to_thread(_compute_with_new_session)
+    try:
+        client = await get_redis_client()
+        snapshot["version"] = int(await client.incr(VERSION_KEY))
+        await client.set(SNAPSHOT_KEY, json.dumps(snapshot))
+    except Exception as e:
+        log.error("cache.error", "Error publishing recommendations", error=str(e))
+        snapshot["version"] = (_snapshot or {}).get("version", 0) + 1
+    _snapshot = snapshot
+    log.info(
+        "recommender.refreshed", "Camp recommendations computed",
+        version=snapshot["version"], donors_analyzed=snapshot["donors_analyzed"], duration_ms=snapshot["duration_ms"],
+    )
+    return snapshot
+
+async def get_recommendations() -> dict:
+    """
+    Latest published snapshot: one version check against Redis, and the
+    snapshot itself is only fetched when another worker published a newer one.
+    Computes once if nothing has been published yet.
+    """
+    global _snapshot, _refresh_lock
+    try:
+        client = await get_redis_client()
+        version = await client.get(VERSION_KEY)
+        if version is not None and (_snapshot is None or int(version) != _snapshot.get("version")):
+            raw = await client.get(SNAPSHOT_KEY)
+            if raw:
+                _snapshot = json.loads(raw)
+    except Exception as e:
+        log.error("cache.error", "Error reading recommendations", error=str(e))
+
+    if _snapshot is None:
+        if _refresh_lock is None:
+            _refresh_lock = asyncio.Lock()
+        async with _refresh_lock:
+            if _snapshot is None:
+                await refresh_recommendations()
+    return _snapshot
+
+__all__ = [
+    "score_locations",
+    "compute_recommendations",
+    "refresh_recommendations",
+    "get_recommendations",
+]
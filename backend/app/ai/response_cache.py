@@ -0,0 +1,160 @@
+# backend/app/ai/response_cache.py
+# Cache of LLM-formatted donor answers.
+#
+# Entries are keyed by a fingerprint of the structured inputs to the
+# formatting prompt (intent, the donor set, the donors shown by name and
+# whether the user asked for details), not by the raw message, so
+# differently worded requests for the same result share an answer. Each
+# donor has a reverse index of the entries mentioning them, and updating a
+# donor drops those entries.
+#
+# Updating a donor also bumps their generation counter. Callers read the
+# generations before the LLM call and store_reply() only writes if none
+# changed, so an answer built from a donor's old details while they were
+# being updated is not cached.
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from app.database import settings
+from app.services.cache import get_redis_client
+from app.services.log import get_logger
+
+log = get_logger("ai.response_cache")
+
+KEY_PREFIX = "ai:reply"
+DONOR_INDEX_PREFIX = "ai:reply:donor"
+GENERATION_PREFIX = "ai:reply:gen"
+
+# KEYS[1] reply key, then n generation keys, then n donor index keys
+# ARGV reply, ttl (s), fingerprint, then the n expected generations ("" = unset)
+# -> 1 if stored, 0 if a donor changed since the generations were read
+STORE_LUA = """
+local n = (#KEYS - 1) / 2
+for i = 1, n do
+  if (redis.call('GET', KEYS[1 + i]) or '') ~= ARGV[3 + i] then
+    return 0
+  end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 1, n do
+  redis.call('SADD', KEYS[1 + n + i], ARGV[3])
+  redis.call('EXPIRE', KEYS[1 + n + i], ARGV[2])
+end
+return 1
+"""
+
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "stale_skipped": 0, "invalidated": 0}
+
+def fingerprint(intent: str, donors: List[dict], shown: int, wants_details: bool) -> str:
+    """
+    Stable key for a formatting request.
+
+    Args:
+        intent: Chat intent the answer is for
+        donors: Donor result set (dicts with 'id')
+        shown: How many leading donors the prompt names (their order matters)
+        wants_details: Whether the user asked for names/contact details
+    """
+    ids = [d["id"] for d in donors]
+    payload = json.dumps({
+        "intent": intent,
+        "ids": sorted(ids),
+        "shown": ids[:shown],
+        "details": wants_details,
+    }, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def _key(fp: str) -> str:
+    return f"{KEY_PREFIX}:{fp}"
+
+def _donor_index(donor_id: int) -> str:
+    return f"{DONOR_INDEX_PREFIX}:{donor_id}"
+
+def _generation(donor_id: int) -> str:
+    return f"{GENERATION_PREFIX}:{donor_id}"
+
+async def get_cached_reply(fp: str) -> Optional[str]:
+    """Return the cached answer for a fingerprint, or None"""
+    try:
+        client = await get_redis_client()
+        reply = await client.get(_key(fp))
+    except Exception as e:
+        log.error("cache.error", "Error reading response cache", error=str(e))
+        return None
+    _stats["hits" if reply is not None else "misses"] += 1
+    return reply
+
+async def donor_generations(donor_ids: List[int]) -> Optional[List[str]]:
+    """
+    Current generation of each donor, to pass to store_reply(); read it
+    before building the answer. None if the cache is unavailable.
+    """
+    try:
+        client = await get_redis_client()
+        values = await client.mget([_generation(donor_id) for donor_id in donor_ids]) if donor_ids else []
+    except Exception as e:
+        log.error("cache.error", "Error reading response cache", error=str(e))
+        return None
+    return [v.decode() if isinstance(v, bytes) else (v or "") for v in values]
+
+async def store_reply(fp: str, donor_ids: List[int], reply: str, generations: Optional[List[str]]) -> None:
+    """
+    Cache an answer for RESPONSE_CACHE_TTL_SECONDS and register it in the
+    reverse index of every donor it covers, unless one of the donors changed
+    since `generations` (from donor_generations()) was read.
+    """
+    if generations is None:
+        return
+    ttl = settings.RESPONSE_CACHE_TTL_SECONDS
+    try:
+        client = await get_redis_client()
+        stored = await client.register_script(STORE_LUA)(
+            keys=[_key(fp), *(_generation(d) for d in donor_ids), *(_donor_index(d) for d in donor_ids)],
+            args=[reply, ttl, fp, *generations],
+        )
+        _stats["stores" if stored else "stale_skipped"] += 1
+    except Exception as e:
+        log.error("cache.error", "Error writing response cache", error=str(e))
+
+async def invalidate_donor_replies(donor_id: int) -> int:
+    """
+    Drop every cached answer that mentions a donor (call after the donor changes).
+
+    Returns:
+        Number of cached answers removed
+    """
+    try:
+        client = await get_redis_client()
+        index = _donor_index(donor_id)
+        pipe = client.pipeline(transaction=True)
+        pipe.incr(_generation(donor_id))  # answers still being generated are not stored
+        pipe.smembers(index)
+        pipe.delete(index)
+        _, fingerprints, _ = await pipe.execute()
+        if fingerprints:
+            await client.delete(*(_key(fp) for fp in fingerprints))
+        _stats["invalidated"] += len(fingerprints)
+        return len(fingerprints)
+    except Exception as e:
+        log.error("cache.error", "Error invalidating response cache", donor_id=donor_id, error=str(e))
+        return 0
+
+def response_cache_stats() -> dict:
+    """Hit/miss/invalidation counters for this worker"""
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "lookups": lookups,
+        "hit_ratio": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+        "ttl_seconds": settings.RESPONSE_CACHE_TTL_SECONDS,
+    }
+
+__all__ = [
+    "fingerprint",
+    "get_cached_reply",
+    "donor_generations",
+    "store_reply",
+    "invalidate_donor_replies",
+    "response_cache_stats",
+]
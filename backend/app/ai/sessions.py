@@ -0,0 +1,109 @@
+# backend/app/ai/sessions.py
+# Conversation state for /ai/chat follow-ups ("list them", "contact the
+# first one"). Each conversation keeps its last search filters and result
+# set in Redis under ai:session:{conversation_id}, expiring after
+# CHAT_SESSION_TTL_SECONDS of inactivity.
+import json
+import re
+import uuid
+from typing import List, Optional, Tuple
+
+from app.database import settings
+from app.services.cache import get_redis_client
+from app.services.log import get_logger
+
+log = get_logger("ai.sessions")
+
+KEY_PREFIX = "ai:session"
+MAX_SESSION_DONORS = 20
+
+_CONVERSATION_ID = re.compile(r"^[A-Za-z0-9_\-]{8,64}$")
+
+# Fields of each donor kept in the session (enough to answer follow-ups)
+_DONOR_FIELDS = ("id", "name", "blood_group", "email", "phone", "lat", "lng", "distance_km")
+
+def new_conversation_id() -> str:
+    return uuid.uuid4().hex
+
+def is_valid_conversation_id(conversation_id: Optional[str]) -> bool:
+    return bool(conversation_id) and _CONVERSATION_ID.match(conversation_id) is not None
+
+def _key(conversation_id: str) -> str:
+    return f"{KEY_PREFIX}:{conversation_id}"
+
+async def load_session(conversation_id: Optional[str]) -> Optional[dict]:
+    """
+    Fetch a conversation's state and extend its TTL.
+
+    Returns:
+        dict with 'filters', 'donors' and 'intent', or None if unknown/expired
+    """
+    if not is_valid_conversation_id(conversation_id):
+        return None
+    try:
+        client = await get_redis_client()
+        p = client.pipeline(transaction=False)
+        p.get(_key(conversation_id))
+        p.expire(_key(conversation_id), settings.CHAT_SESSION_TTL_SECONDS)
+        raw, _ = await p.execute()
+    except Exception as e:
+        log.error("cache.error", "Error reading chat session", error=str(e))
+        return None
+    return json.loads(raw) if raw else None
+
+async def save_session(conversation_id: str, intent: str, filters: dict, donors: List[dict]) -> None:
+    """Remember the latest search of a conversation (overwrites the previous one)"""
+    state = {
+        "intent": intent,
+        "filters": {k: filters.get(k) for k in ("blood_group", "region", "location")},
+        "donors": [{f: d.get(f) for f in _DONOR_FIELDS} for d in donors[:MAX_SESSION_DONORS]],
+    }
+    try:
+        client = await get_redis_client()
+        await client.set(_key(conversation_id), json.dumps(state), ex=settings.CHAT_SESSION_TTL_SECONDS)
+    except Exception as e:
+        log.error("cache.error", "Error writing chat session", error=str(e))
+
+# ============ Follow-up Detection ============
+
+_ORDINALS = {
+    "first": 0, "1st": 0, "second": 1, "2nd": 1, "third": 2, "3rd": 2,
+    "fourth": 3, "4th": 3, "fifth": 4, "5th": 4, "last": -1,
+}
+_ORDINAL_PATTERN = re.compile(
+    r"\b(first|1st|second|2nd|third|3rd|fourth|4th|fifth|5th|last)\b|(?:#|\bno\.?\s*|\bnumber\s+|\bdonor\s+)(\d{1,2})\b",
+    re.IGNORECASE,
+)
+_CONTACT_PATTERN = re.compile(r"\b(contact|call|phone|number|email|reach|details?|directions?|address)\b", re.IGNORECASE)
+_LIST_PATTERN = re.compile(
+    r"\b(list|show|give|tell|share|send)\b.*\b(them|names?|those|these|all)\b|\bwho are (they|them)\b|^\s*(names|yes|yes please|sure|ok(ay)?)\W*$",
+    re.IGNORECASE,
+)
+_REFERS_BACK = re.compile(r"\b(them|they|those|these|one|him|her|donor\s+\d+|#\d+)\b", re.IGNORECASE)
+
+def detect_follow_up(message: str) -> Optional[Tuple[str, Optional[int]]]:
+    """
+    Recognize follow-ups that only refer to the previous result.
+
+    Returns:
+        ("list", None) or ("contact", index), where index is 0-based (-1 = last)
+        and None means "all of them"; None if the message is not a follow-up
+    """
+    ordinal = _ORDINAL_PATTERN.search(message)
+    index: Optional[int] = None
+    if ordinal:
+        index = _ORDINALS[ordinal.group(1).lower()] if ordinal.group(1) else int(ordinal.group(2)) - 1
+
+    if _CONTACT_PATTERN.search(message) and (ordinal or _REFERS_BACK.search(message)):
+        return ("contact", index)
+    if _LIST_PATTERN.search(message):
+        return ("list", None)
+    return None
+
+__all__ = [
+    "new_conversation_id",
+    "is_valid_conversation_id",
+    "load_session",
+    "save_session",
+    "detect_follow_up",
+]
@@ -0,0 +1,76 @@
+# backend/app/ai/streaming.py
+# Server-sent events helpers for /ai/chat/stream, plus time-to-first-byte
+# and time-to-first-token counters for this worker.
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+# Recent samples (ms) used for the percentiles in stream_stats()
+_SAMPLES = 1000
+_ttfb_ms: Deque[float] = deque(maxlen=_SAMPLES)
+_first_token_ms: Deque[float] = deque(maxlen=_SAMPLES)
+_total_ms: Deque[float] = deque(maxlen=_SAMPLES)
+_counts: Dict[str, int] = {"streams": 0, "llm_streams": 0, "fallbacks": 0, "errors": 0}
+
+def sse_event(event: str, data) -> str:
+    """Encode one SSE frame; `data` is sent as a single line of JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+class StreamTimer:
+    """Milestones of one streamed reply, measured from when the request arrived"""
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.first_byte: Optional[float] = None
+        self.first_token: Optional[float] = None
+
+    def _ms(self, at: Optional[float]) -> Optional[float]:
+        return round((at - self.started) * 1000, 1) if at is not None else None
+
+    def mark_first_byte(self) -> None:
+        if self.first_byte is None:
+            self.first_byte = time.perf_counter()
+
+    def mark_first_token(self) -> None:
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def finish(self, source: str) -> dict:
+        """Record the stream in the worker stats and return its timings (ms)"""
+        timings = {
+            "ttfb_ms": self._ms(self.first_byte),
+            "first_token_ms": self._ms(self.first_token),
+            "total_ms": self._ms(time.perf_counter()),
+        }
+        _counts["streams"] += 1
+        if source == "llm":
+            _counts["llm_streams"] += 1
+        elif source == "fallback":
+            _counts["fallbacks"] += 1
+        elif source == "error":
+            _counts["errors"] += 1
+        if timings["ttfb_ms"] is not None:
+            _ttfb_ms.append(timings["ttfb_ms"])
+        if timings["first_token_ms"] is not None:
+            _first_token_ms.append(timings["first_token_ms"])
+        _total_ms.append(timings["total_ms"])
+        return timings
+
+def _percentiles(samples: Deque[float]) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": pick(0.50), "p95": pick(0.95), "max": ordered[-1]}
+
+def stream_stats() -> dict:
+    """Stream counters and TTFB / first-token / total percentiles (ms) for this worker"""
+    return {
+        **_counts,
+        "ttfb_ms": _percentiles(_ttfb_ms),
+        "first_token_ms": _percentiles(_first_token_ms),
+        "total_ms": _percentiles(_total_ms),
+    }
+
+__all__ = ["sse_event", "StreamTimer", "stream_stats"]
@@ -3,6 +3,9 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from pydantic_settings import BaseSettings
 from typing import Optional
+from app.services.metrics import TimedQueuePool, instrument_engine
+from app.services.tracing import trace_engine
+from app.services.query_audit import audit_engine
 import os
 
 class Settings(BaseSettings):
@@ -15,6 +18,57 @@ class Settings(BaseSettings):
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "http://localhost:5173")
     SENDGRID_API_KEY: Optional[str] = os.getenv("SENDGRID_API_KEY")
     EMAIL_FROM: Optional[str] = os.getenv("EMAIL_FROM")
+    EMAIL_PROVIDER: str = os.getenv("EMAIL_PROVIDER", "sendgrid")  # sendgrid | stub (accept and drop; benchmarks)
+    LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "openai")  # openai | fake | none
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4o-mini")
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "8"))
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    LLM_FAKE_LATENCY_MS: int = int(os.getenv("LLM_FAKE_LATENCY_MS", "300"))
+    PARSE_CACHE_SIZE: int = int(os.getenv("PARSE_CACHE_SIZE", "2048"))
+    PARSE_CACHE_TTL_SECONDS: int = int(os.getenv("PARSE_CACHE_TTL_SECONDS", "86400"))
+    INSIGHTS_RECONCILE_SECONDS: int = int(os.getenv("INSIGHTS_RECONCILE_SECONDS", "300"))
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+    ARCHIVE_INTERVAL_SECONDS: int = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "3600"))
+    HOSPITAL_REGISTRY_TTL_SECONDS: int = int(os.getenv("HOSPITAL_REGISTRY_TTL_SECONDS", "60"))
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS: int = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+    AI_SEARCH_HOSPITAL_KM: float = float(os.getenv("AI_SEARCH_HOSPITAL_KM", "5"))
+    AI_SEARCH_REGION_KM: float = float(os.getenv("AI_SEARCH_REGION_KM", "10"))
+    CHAT_SESSION_TTL_SECONDS: int = int(os.getenv("CHAT_SESSION_TTL_SECONDS", "1800"))
+    CHAT_BATCH_CONCURRENCY: int = int(os.getenv("CHAT_BATCH_CONCURRENCY", "8"))
+    RESPONSE_CACHE_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "600"))
+    WARM_UP_AFTER_STARTUP: bool = os.getenv("WARM_UP_AFTER_STARTUP", "true").lower() == "true"  # pre-load LangChain/Socket.IO once ready
+    READY_DB_TIMEOUT_SECONDS: float = float(os.getenv("READY_DB_TIMEOUT_SECONDS", "2"))  # /ready database check
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")  # json | text
+    LOG_SAMPLE_RATES: str = os.getenv(
+        "LOG_SAMPLE_RATES",
+        "socket.broadcast=0.01,socket.connect=0.1,socket.disconnect=0.1,admission.rate_limited=0.01,admission.shed=0.01",
+    )
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # 0 = write synchronously
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_RPS: float = float(os.getenv("RATE_LIMIT_RPS", "10"))  # per client, normal priority
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "40"))
+    RATE_LIMIT_LOW_RPS: float = float(os.getenv("RATE_LIMIT_LOW_RPS", "2"))  # AI chat and bulk listings
+    RATE_LIMIT_LOW_BURST: int = int(os.getenv("RATE_LIMIT_LOW_BURST", "10"))
+    RATE_LIMIT_API_KEYS: str = os.getenv("RATE_LIMIT_API_KEYS", "")  # comma-separated; each key gets its own bucket
+    SHED_LOOP_LAG_MS: float = float(os.getenv("SHED_LOOP_LAG_MS", "200"))
+    SHED_POOL_WAIT_MS: float = float(os.getenv("SHED_POOL_WAIT_MS", "250"))
+    SLOW_REQUEST_MS: int = int(os.getenv("SLOW_REQUEST_MS", "500"))
+    TRACE_FILE: Optional[str] = os.getenv("TRACE_FILE")  # JSONL span output; unset = tracing export off
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+    QUERY_AUDIT_MODE: str = os.getenv("QUERY_AUDIT_MODE", "off")  # off | warn | raise (N+1 detection)
+    SLOW_QUERY_MS: float = float(os.getenv("SLOW_QUERY_MS", "100"))
+    N_PLUS_ONE_THRESHOLD: int = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+    SCHEDULER_LOCK_TTL_SECONDS: float = float(os.getenv("SCHEDULER_LOCK_TTL_SECONDS", "30"))  # leader failover time
+    GEO_RECONCILE_CRON: str = os.getenv("GEO_RECONCILE_CRON", "*/15 * * * *")  # GEO index vs donors table
+    GEO_RECONCILE_CHUNK_SIZE: int = int(os.getenv("GEO_RECONCILE_CHUNK_SIZE", "1000"))
+    RECOMMENDER_INTERVAL_SECONDS: int = int(os.getenv("RECOMMENDER_INTERVAL_SECONDS", "900"))
+    RECOMMENDER_CELL_KM: float = float(os.getenv("RECOMMENDER_CELL_KM", "2"))
+    RECOMMENDER_DEMAND_DAYS: int = int(os.getenv("RECOMMENDER_DEMAND_DAYS", "30"))
+    RECOMMENDER_DEMAND_KM: float = float(os.getenv("RECOMMENDER_DEMAND_KM", "5"))
     
     class Config:
         env_file = ".env"
@@ -28,7 +82,11 @@ engine = create_engine(
     pool_pre_ping=True,  # Verify connections before using them
     pool_size=5,
     max_overflow=10,
+    poolclass=TimedQueuePool,  # records pool checkout wait for /metrics
 )
+instrument_engine(engine)
+trace_engine(engine)
+audit_engine(engine, settings.QUERY_AUDIT_MODE, settings.SLOW_QUERY_MS, settings.N_PLUS_ONE_THRESHOLD)
 
 # Create sessionmaker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
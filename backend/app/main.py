@@ -1,9 +1,32 @@
-from fastapi import FastAPI
+from app.services.startup import (
+    is_ready, log_startup_report, mark_imported, mark_ready, startup_report, startup_step,
+)
+import asyncio
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base, settings
-from app.services.db_utils import init_db
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from app.database import engine, Base, SessionLocal, settings
+from app.services.log import configure_logging, get_logger, shutdown_logging
+from app.services.db_utils import ensure_schema
+from app.services.hospital_registry import load_hospitals
+from app.ai.llm import init_llm
 from app.services.cache import get_redis_client, close_redis
-from app.realtime import socketio_app
+from app.services.scheduler import scheduler
+from app.services.geo import reconcile_geo_index
+from app.services.insights import reconcile_insights
+from app.services.archive import run_archive_job
+from app.ai.recommender import refresh_recommendations
+from app.realtime import socket_rooms, socketio_app
+from app.services.metrics import MetricsMiddleware, register_socket_rooms, render_metrics
+from app.services.timing import ServerTimingMiddleware
+from app.services.tracing import TracingMiddleware, configure_tracing, shutdown_tracing
+from app.services.query_audit import QueryAuditMiddleware, query_report
+from app.services.ratelimit import RateLimitMiddleware, sample_loop_lag
+
+# Structured logs to stderr through a queue (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES)
+configure_logging(settings.LOG_LEVEL, settings.LOG_FORMAT, settings.LOG_SAMPLE_RATES, settings.LOG_QUEUE_SIZE)
+log = get_logger("app")
 
 # Create FastAPI app with enhanced OpenAPI docs
 app = FastAPI(
@@ -15,6 +38,10 @@ app = FastAPI(
     openapi_url="/openapi.json",  # OpenAPI JSON schema
 )
 
+# Per-client token buckets and load shedding by priority class; innermost,
+# so CORS headers are added to 429/503 responses too
+app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -24,47 +51,170 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request count/latency per route for /metrics (outside CORS and rate limiting,
+# so it times both and counts 429/503 responses)
+app.add_middleware(MetricsMiddleware)
+
+# Server-Timing phase breakdown on every response; slow requests are logged
+app.add_middleware(ServerTimingMiddleware, slow_ms=settings.SLOW_REQUEST_MS, allow_origin=settings.FRONTEND_URL)
+
+# SQL statements per request, slow query log and N+1 detection (QUERY_AUDIT_MODE)
+app.add_middleware(QueryAuditMiddleware)
+
+# Root span per request; spans are exported to TRACE_FILE when set
+configure_tracing(settings.TRACE_FILE, settings.TRACE_SAMPLE_RATE)
+app.add_middleware(TracingMiddleware)
+register_socket_rooms(socket_rooms)
+
+# Restore donor locations missing from the GEO index and drop those of
+# deleted donors (with their meta hashes)
+async def reconcile_locations():
+    counts = await reconcile_geo_index(settings.GEO_RECONCILE_CHUNK_SIZE)
+    log.info("geo.reconciled", "Donor GEO index reconciled with the donors table", **counts)
+
+# Background jobs
+# Reconcile dashboard counters against SQL
+scheduler.add_interval("insights_reconcile", settings.INSIGHTS_RECONCILE_SECONDS, reconcile_insights)
+# Move old Fulfilled/Cancelled requests out of the live requests table
+scheduler.add_interval("archive_requests", settings.ARCHIVE_INTERVAL_SECONDS, run_archive_job, initial_delay_s=60)
+# Precompute camp location recommendations (other workers read the published snapshot)
+scheduler.add_interval("camp_recommender", settings.RECOMMENDER_INTERVAL_SECONDS, refresh_recommendations)
+scheduler.add_cron("geo_reconcile", settings.GEO_RECONCILE_CRON, reconcile_locations)
+# Event-loop lag samples drive this worker's load shedding
+scheduler.add_interval("loop_lag_monitor", 0.25, sample_loop_lag, leader_only=False)
+
 # Startup event: Connect to database and Redis
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connection and Redis cache on startup"""
-    # Initialize database tables
-    init_db()
-    print("✅ Database connection established")
+    # Create tables only when the models changed since the last deploy
+    with startup_step("schema"):
+        ensure_schema()
+    log.info("db.connected", "Database connection established")
+    
+    # Warm the in-process hospital registry
+    with startup_step("hospitals"):
+        db = SessionLocal()
+        try:
+            log.info("hospitals.loaded", "Loaded hospitals into registry", count=load_hospitals(db))
+        finally:
+            db.close()
     
     # Initialize Redis connection
+    with startup_step("redis"):
+        try:
+            await get_redis_client()
+        except Exception as e:
+            log.warning("redis.unavailable", "Redis connection failed (continuing without cache)", error=str(e))
+    
+    # Background jobs (registered below); leader-only ones run on one worker
+    scheduler.start()
+    
+    mark_ready()
+    log_startup_report()
+    
+    # LangChain and Socket.IO load on first use; pre-load them off the event
+    # loop now so the first chat or dashboard connection doesn't pay for it
+    if settings.WARM_UP_AFTER_STARTUP:
+        global _warm_up_task
+        _warm_up_task = asyncio.create_task(_warm_up())
+
+_warm_up_task = None
+
+async def _warm_up():
     try:
-        await get_redis_client()
+        await asyncio.to_thread(init_llm)
+        await asyncio.to_thread(__import__, "socketio")
     except Exception as e:
-        print(f"⚠️  Redis connection failed (continuing without cache): {e}")
+        log.warning("startup.warm_up_failed", "Warm-up failed (modules will load on first use)", error=str(e))
 
 # Shutdown event: Close database and Redis connections
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database and Redis connections on shutdown"""
+    if _warm_up_task is not None:
+        _warm_up_task.cancel()
+    await scheduler.stop()
     engine.dispose()
-    print("✅ Database connection closed")
+    log.info("db.closed", "Database connection closed")
     
     # Close Redis connection
     await close_redis()
+    
+    # Flush buffered trace spans and log records
+    shutdown_tracing()
+    shutdown_logging()
 
 # Root route
 @app.get("/")
 async def root():
     return {"message": "NSS BloodLink API running"}
 
-# Health check route
+# Liveness: the process is up and serving (no dependency checks)
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
 
+def _ping_database():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+# Readiness: startup finished and the database answers; Redis is reported
+# but optional, as the app runs without the cache
+@app.get("/ready")
+async def readiness_check():
+    if not is_ready():
+        return JSONResponse(status_code=503, content={"status": "starting", "startup": startup_report()})
+
+    checks = {}
+    try:
+        # Off the event loop, so a slow database doesn't stall other requests and sockets
+        await asyncio.wait_for(asyncio.to_thread(_ping_database), timeout=settings.READY_DB_TIMEOUT_SECONDS)
+        checks["database"] = "ok"
+    except asyncio.TimeoutError:
+        checks["database"] = f"error: no answer within {settings.READY_DB_TIMEOUT_SECONDS:g}s"
+    except Exception as e:
+        checks["database"] = f"error: {e}"
+    try:
+        await (await get_redis_client()).ping()
+        checks["redis"] = "ok"
+    except Exception as e:
+        checks["redis"] = f"unavailable: {e}"
+
+    ready = checks["database"] == "ok"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "unavailable", "checks": checks, "startup": startup_report()},
+    )
+
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+# Scheduled jobs as seen by this worker: last run, duration, outcome, next run
+@app.get("/scheduler/jobs", include_in_schema=False)
+async def scheduler_jobs():
+    return scheduler.stats()
+
+# Per-endpoint SQL statement report (development: QUERY_AUDIT_MODE=warn|raise)
+if settings.QUERY_AUDIT_MODE != "off":
+    @app.get("/debug/queries", include_in_schema=False)
+    async def debug_queries():
+        return query_report()
+
 # Import and include routers
-from app.routes import donors, requests
+from app.routes import donors, requests, hospitals, insights
 from app.ai.ai_routes import router as ai_router
 
 app.include_router(donors.router, prefix="/donors", tags=["Donors"])
 app.include_router(requests.router, prefix="/requests", tags=["Requests"])
+app.include_router(hospitals.router, prefix="/hospitals", tags=["Hospitals"])
+app.include_router(insights.router, prefix="/insights", tags=["Insights"])
 app.include_router(ai_router, prefix="/ai", tags=["AI"])
 
 # Mount Socket.IO ASGI app at /ws
 app.mount("/ws", socketio_app)
+
+mark_imported()
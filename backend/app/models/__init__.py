@@ -1,4 +1,4 @@
 # SQLAlchemy models
-from app.models.models import Donor, Hospital, Request, UrgencyLevel, RequestStatus
+from app.models.models import Donor, Hospital, Request, ArchivedRequest, UrgencyLevel, RequestStatus
 
-__all__ = ["Donor", "Hospital", "Request", "UrgencyLevel", "RequestStatus"]
+__all__ = ["Donor", "Hospital", "Request", "ArchivedRequest", "UrgencyLevel", "RequestStatus"]
@@ -33,6 +33,8 @@ class Donor(Base):
     lng = Column(Float, nullable=False)  # Longitude
     available = Column(Boolean, default=True, nullable=False, index=True)
     last_donation_date = Column(DateTime, nullable=True)
+    email = Column(String(255), nullable=True)  # contact fields (used by notify/nearby)
+    phone = Column(String(20), nullable=True)
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     
@@ -55,8 +57,10 @@ class Hospital(Base):
     requests = relationship("Request", back_populates="hospital")
 
 class Request(Base):
-    """Blood request model"""
+    """Blood request model (live working set: open and recently closed requests)"""
     __tablename__ = "requests"
+    # Never reuse ids on SQLite: archived rows keep their original id
+    __table_args__ = {"sqlite_autoincrement": True}
     
     id = Column(Integer, primary_key=True, index=True)
     hospital_id = Column(Integer, ForeignKey("hospitals.id"), nullable=False, index=True)
@@ -69,4 +73,21 @@ class Request(Base):
     
     # Relationships
     hospital = relationship("Hospital", back_populates="requests")
-    donor = relationship("Donor", back_populates="requests", foreign_keys=[donor_id])
\ No newline at end of file
+    donor = relationship("Donor", back_populates="requests", foreign_keys=[donor_id])
+
+class ArchivedRequest(Base):
+    """Closed (Fulfilled/Cancelled) blood requests moved out of `requests`"""
+    __tablename__ = "requests_archive"
+    
+    id = Column(Integer, primary_key=True, autoincrement=False)  # same id as the original request
+    hospital_id = Column(Integer, ForeignKey("hospitals.id"), nullable=False, index=True)
+    blood_type = Column(String(5), nullable=False, index=True)
+    urgency = Column(SQLEnum(UrgencyLevel), nullable=False)
+    status = Column(SQLEnum(RequestStatus), nullable=False, index=True)
+    donor_id = Column(Integer, ForeignKey("donors.id"), nullable=True)
+    created_at = Column(DateTime, nullable=False, index=True)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    # Relationships
+    hospital = relationship("Hospital")
@@ -1,51 +1,92 @@
-from socketio import AsyncServer, ASGIApp
 from fastapi import FastAPI
 from app.database import settings
+from app.services.startup import record_lazy_load
+from app.services.tracing import current_trace_id, span
+from app.services.log import get_logger
 import json
+import time
 
-# Create Socket.IO server
-sio = AsyncServer(
-    cors_allowed_origins=[
-        settings.FRONTEND_URL,
-        "http://localhost:5173",
-        "http://127.0.0.1:5173",
-    ],
-    async_mode="asgi",
-    logger=True,
-    engineio_logger=True,
-)
-
-# Create ASGI app wrapper
-socketio_app = ASGIApp(sio)
+log = get_logger("realtime")
+
+# The Socket.IO server is built on the first /ws connection rather than at
+# import: python-socketio imports its client stack (aiohttp) along with the
+# server, a large share of cold start. Until a client has connected there
+# is nobody to broadcast to, so broadcasts skip the build.
+_sio = None
+_asgi_app = None
+
+def get_sio():
+    """Return the Socket.IO server, building it on first use"""
+    global _sio
+    if _sio is None:
+        start = time.perf_counter()
+        from socketio import AsyncServer
+
+        server = AsyncServer(
+            cors_allowed_origins=[
+                settings.FRONTEND_URL,
+                "http://localhost:5173",
+                "http://127.0.0.1:5173",
+            ],
+            async_mode="asgi",
+            # per-packet library logging; our handlers log connects and broadcasts
+            logger=False,
+            engineio_logger=False,
+        )
+        for handler in (connect, disconnect, join_room, leave_room):
+            server.on(handler.__name__, handler)
+        _sio = server
+        record_lazy_load("socketio", time.perf_counter() - start)
+    return _sio
+
+def __getattr__(name):
+    # `from app.realtime import sio` keeps working (and builds the server)
+    if name == "sio":
+        return get_sio()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class _LazySocketIOApp:
+    """ASGI app for the /ws mount that builds the Socket.IO server on first request"""
+
+    async def __call__(self, scope, receive, send):
+        global _asgi_app
+        if _asgi_app is None:
+            from socketio import ASGIApp
+            # Mounted at /ws (app.main) and Starlette passes mounted apps the
+            # full path, so the Engine.IO path includes the mount.
+            _asgi_app = ASGIApp(get_sio(), socketio_path="ws/socket.io")
+        await _asgi_app(scope, receive, send)
+
+socketio_app = _LazySocketIOApp()
+
+def socket_rooms() -> dict:
+    """Rooms of the default namespace ({} before the server is built)"""
+    return _sio.manager.rooms.get("/", {}) if _sio is not None else {}
 
 # ============ Socket.IO Event Handlers ============
 
-@sio.event
 async def connect(sid, environ):
     """Handle client connection"""
-    print(f"✅ Client connected: {sid}")
-    await sio.emit("connected", {"message": "Connected to NSS BloodLink"}, room=sid)
+    log.info("socket.connect", "Client connected", sid=sid)
+    await _sio.emit("connected", {"message": "Connected to NSS BloodLink"}, room=sid)
 
-@sio.event
 async def disconnect(sid):
     """Handle client disconnection"""
-    print(f"❌ Client disconnected: {sid}")
+    log.info("socket.disconnect", "Client disconnected", sid=sid)
 
-@sio.event
 async def join_room(sid, data):
     """Allow clients to join specific rooms (e.g., 'donors', 'requests')"""
     room = data.get("room", "general")
-    sio.enter_room(sid, room)
-    await sio.emit("joined_room", {"room": room}, room=sid)
-    print(f"Client {sid} joined room: {room}")
+    await _sio.enter_room(sid, room)
+    await _sio.emit("joined_room", {"room": room}, room=sid)
+    log.debug("socket.room", "Client joined room", sid=sid, room=room)
 
-@sio.event
 async def leave_room(sid, data):
     """Allow clients to leave specific rooms"""
     room = data.get("room", "general")
-    sio.leave_room(sid, room)
-    await sio.emit("left_room", {"room": room}, room=sid)
-    print(f"Client {sid} left room: {room}")
+    await _sio.leave_room(sid, room)
+    await _sio.emit("left_room", {"room": room}, room=sid)
+    log.debug("socket.room", "Client left room", sid=sid, room=room)
 
 # ============ Broadcast Functions ============
 
@@ -63,23 +104,30 @@ async def broadcast_donor_status_update(donor_data: dict):
                 "last_donation_date": str (optional)
             }
     """
+    if _sio is None:
+        return
     try:
         event_data = {
             "type": "donor_status_update",
             "data": donor_data,
-            "timestamp": None  # Will be set by client or can use datetime.now().isoformat()
+            "timestamp": None,  # Will be set by client or can use datetime.now().isoformat()
+            "trace_id": current_trace_id(),  # correlates the event with the API request that caused it
         }
         
-        # Broadcast to all clients
-        await sio.emit("donor_status_update", event_data)
+        with span("socketio.emit donor_status_update", {"messaging.system": "socketio", "messaging.destination": "donors"}, kind="PRODUCER"):
+            # Broadcast to all clients
+            await _sio.emit("donor_status_update", event_data)
+            
+            # Also broadcast to 'donors' room if clients are subscribed
+            await _sio.emit("donor_status_update", event_data, room="donors")
         
-        # Also broadcast to 'donors' room if clients are subscribed
-        await sio.emit("donor_status_update", event_data, room="donors")
-        
-        print(f"📢 Broadcasted donor status update: Donor {donor_data.get('id')} - Available: {donor_data.get('available')}")
+        log.info(
+            "socket.broadcast", "Broadcasted donor status update",
+            type="donor_status_update", donor_id=donor_data.get("id"), available=donor_data.get("available"),
+        )
         
     except Exception as e:
-        print(f"❌ Error broadcasting donor status update: {e}")
+        log.error("socket.broadcast_failed", "Error broadcasting donor status update", error=str(e))
 
 async def broadcast_new_request(request_data: dict):
     """
@@ -97,31 +145,40 @@ async def broadcast_new_request(request_data: dict):
                 "created_at": str
             }
     """
+    if _sio is None:
+        return
     try:
         event_data = {
             "type": "new_request",
             "data": request_data,
-            "timestamp": None  # Will be set by client or can use datetime.now().isoformat()
+            "timestamp": None,  # Will be set by client or can use datetime.now().isoformat()
+            "trace_id": current_trace_id(),  # correlates the event with the API request that caused it
         }
         
-        # Broadcast to all clients
-        await sio.emit("new_request", event_data)
-        
-        # Also broadcast to 'requests' room if clients are subscribed
-        await sio.emit("new_request", event_data, room="requests")
+        with span("socketio.emit new_request", {"messaging.system": "socketio", "messaging.destination": "requests"}, kind="PRODUCER"):
+            # Broadcast to all clients
+            await _sio.emit("new_request", event_data)
+            
+            # Also broadcast to 'requests' room if clients are subscribed
+            await _sio.emit("new_request", event_data, room="requests")
         
-        print(f"📢 Broadcasted new request: Request {request_data.get('id')} - {request_data.get('blood_type')} - {request_data.get('urgency')}")
+        log.info(
+            "socket.broadcast", "Broadcasted new request",
+            type="new_request", request_id=request_data.get("id"),
+            blood_type=request_data.get("blood_type"), urgency=request_data.get("urgency"),
+        )
         
     except Exception as e:
-        print(f"❌ Error broadcasting new request: {e}")
+        log.error("socket.broadcast_failed", "Error broadcasting new request", error=str(e))
 
 # ============ Helper Functions ============
 
 async def get_connected_clients():
     """Get list of connected client IDs"""
-    return list(sio.manager.rooms.get("/", {}).keys())
+    # every connected client is in the namespace-wide room None
+    return list(socket_rooms().get(None, {}).keys())
 
 async def get_room_clients(room: str):
     """Get list of clients in a specific room"""
-    return list(sio.manager.rooms.get("/", {}).get(room, set()))
+    return list(socket_rooms().get(room, set()))
 
@@ -1,6 +1,6 @@
 # backend/app/routes/donors.py
 from typing import List, Optional, Dict
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
 from pydantic import BaseModel, Field
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
@@ -12,7 +12,12 @@ from app.schemas.schemas import DonorCreate, DonorResponse, DonorUpdate
 from app.realtime import broadcast_donor_status_update
 from app.services.cache import set_donor_availability
 from app.services.geo import upsert_donor_geo, donors_near
+from app.ai.response_cache import invalidate_donor_replies
+from app.services.insights import record_donor_change
+from app.services.idempotency import run_idempotent
 from app.services.notify import send_email
+from app.services.metrics import NOTIFICATIONS_IN_FLIGHT, NOTIFICATIONS_SENT
+from app.services.timing import phase
 
 router = APIRouter()
 
@@ -90,6 +95,7 @@ async def create_donor(
         if new_donor.lat is not None and new_donor.lng is not None:
             await upsert_donor_geo(new_donor.id, new_donor.lat, new_donor.lng)
         await set_donor_availability(new_donor.id, new_donor.available)
+        await record_donor_change(None, (new_donor.blood_group, new_donor.available))
 
         return new_donor
     except SQLAlchemyError as e:
@@ -133,20 +139,21 @@ async def donors_nearby(
         donors = q.all()
         donors.sort(key=lambda d: id_to_km.get(d.id, float("inf")))
 
-        out: List[DonorNearResponse] = []
-        for d in donors:
-            out.append(DonorNearResponse(
-                id=d.id,
-                name=d.name,
-                blood_group=d.blood_group,
-                email=d.email,
-                phone=d.phone,
-                lat=d.lat,
-                lng=d.lng,
-                available=d.available,
-                last_donation_date=d.last_donation_date.isoformat() if d.last_donation_date else None,
-                distance_km=round(id_to_km[d.id], 3),
-            ))
+        with phase("serialize"):
+            out: List[DonorNearResponse] = []
+            for d in donors:
+                out.append(DonorNearResponse(
+                    id=d.id,
+                    name=d.name,
+                    blood_group=d.blood_group,
+                    email=d.email,
+                    phone=d.phone,
+                    lat=d.lat,
+                    lng=d.lng,
+                    available=d.available,
+                    last_donation_date=d.last_donation_date.isoformat() if d.last_donation_date else None,
+                    distance_km=round(id_to_km[d.id], 3),
+                ))
         return out
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
@@ -171,6 +178,7 @@ async def update_donor(
         if not donor:
             raise HTTPException(status_code=404, detail=f"Donor with ID {donor_id} not found")
 
+        before = (donor.blood_group, donor.available)
         for field, value in donor_update.model_dump(exclude_unset=True).items():
             setattr(donor, field, value)
 
@@ -180,6 +188,9 @@ async def update_donor(
         if donor.lat is not None and donor.lng is not None:
             await upsert_donor_geo(donor.id, donor.lat, donor.lng)
         await set_donor_availability(donor.id, donor.available)
+        await record_donor_change(before, (donor.blood_group, donor.available))
+        # Cached assistant answers that name this donor may now be wrong
+        await invalidate_donor_replies(donor.id)
 
         await broadcast_donor_status_update({
             "id": donor.id,
@@ -206,7 +217,20 @@ async def update_donor(
     response_model=NotifyResult,
     summary="Find nearby donors by location and notify them."
 )
-async def notify_by_location(payload: NotifyByLocation, db: Session = Depends(get_db)):
+async def notify_by_location(
+    payload: NotifyByLocation,
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+):
+    # Retries with the same Idempotency-Key replay the first result instead of re-sending emails
+    return await run_idempotent(
+        idempotency_key,
+        "donors:notify-by-location",
+        payload,
+        lambda: _notify_by_location(payload, db),
+    )
+
+async def _notify_by_location(payload: NotifyByLocation, db: Session) -> NotifyResult:
     # 1) candidate ids by distance+freshness from Redis
     pairs = await donors_near(
         payload.lat, payload.lng,
@@ -234,40 +258,50 @@ async def notify_by_location(payload: NotifyByLocation, db: Session = Depends(ge
 
     # 3) order by distance + serialize
     donors.sort(key=lambda d: id_to_km.get(d.id, float("inf")))
-    recipients: List[DonorNearResponse] = []
-    for d in donors:
-        recipients.append(DonorNearResponse(
-            id=d.id,
-            name=d.name,
-            blood_group=d.blood_group,
-            email=d.email,
-            phone=d.phone,
-            lat=d.lat,
-            lng=d.lng,
-            available=d.available,
-            last_donation_date=d.last_donation_date.isoformat() if d.last_donation_date else None,
-            distance_km=round(id_to_km[d.id], 3),
-        ))
+    with phase("serialize"):
+        recipients: List[DonorNearResponse] = []
+        for d in donors:
+            recipients.append(DonorNearResponse(
+                id=d.id,
+                name=d.name,
+                blood_group=d.blood_group,
+                email=d.email,
+                phone=d.phone,
+                lat=d.lat,
+                lng=d.lng,
+                available=d.available,
+                last_donation_date=d.last_donation_date.isoformat() if d.last_donation_date else None,
+                distance_km=round(id_to_km[d.id], 3),
+            ))
 
     # 4) notify (email channel implemented)
     notified = 0
     channel_counts: Dict[str, int] = {ch: 0 for ch in payload.channels}
-    for r in recipients:
-        if "email" in payload.channels and r.email:
-            subject = f"🚨 Urgent need for {r.blood_group} blood nearby"
-            message = (
-                f"Dear {r.name},\n\n"
-                f"A nearby hospital urgently needs {r.blood_group} blood.\n"
-                f"Approx. location: {payload.lat:.3f}, {payload.lng:.3f} (≤ {payload.km} km)\n\n"
-                f"Thank you ❤️\n- NSS BloodLink"
-            )
-            send_email(r.email, subject, message)
-            notified += 1
-            channel_counts["email"] += 1
+    queued = sum(1 for r in recipients if r.email) if "email" in payload.channels else 0
+    NOTIFICATIONS_IN_FLIGHT.inc(queued)
+    try:
+        for r in recipients:
+            if "email" in payload.channels and r.email:
+                subject = f"🚨 Urgent need for {r.blood_group} blood nearby"
+                message = (
+                    f"Dear {r.name},\n\n"
+                    f"A nearby hospital urgently needs {r.blood_group} blood.\n"
+                    f"Approx. location: {payload.lat:.3f}, {payload.lng:.3f} (≤ {payload.km} km)\n\n"
+                    f"Thank you ❤️\n- NSS BloodLink"
+                )
+                with phase("notify_email"):
+                    sent = send_email(r.email, subject, message)
+                queued -= 1
+                NOTIFICATIONS_IN_FLIGHT.dec()
+                NOTIFICATIONS_SENT.labels("email", "sent" if sent else "failed").inc()
+                notified += 1
+                channel_counts["email"] += 1
 
-        # placeholders for future:
-        # if "sms" in payload.channels and r.phone: send_sms(...)
-        # if "whatsapp" in payload.channels and r.phone: send_whatsapp(...)
+            # placeholders for future:
+            # if "sms" in payload.channels and r.phone: send_sms(...)
+            # if "whatsapp" in payload.channels and r.phone: send_whatsapp(...)
+    finally:
+        NOTIFICATIONS_IN_FLIGHT.dec(queued)
 
     # optional: don’t echo back huge lists
     return NotifyResult(
@@ -0,0 +1,144 @@
+# backend/app/routes/hospitals.py
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.models import ArchivedRequest, Hospital, Request
+from app.schemas.schemas import HospitalCreate, HospitalResponse, HospitalUpdate
+from app.services.hospital_registry import get_hospital, list_hospitals, load_hospitals
+from app.services.insights import record_hospital_change
+
+router = APIRouter()
+
+# ---------- List hospitals ----------
+@router.get(
+    "/",
+    response_model=List[HospitalResponse],
+    status_code=status.HTTP_200_OK,
+    summary="Get all hospitals",
+    description="List all hospitals, served from the in-process hospital registry."
+)
+async def get_hospitals(db: Session = Depends(get_db)):
+    try:
+        return list_hospitals(db)
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+# ---------- Get hospital ----------
+@router.get(
+    "/{hospital_id}",
+    response_model=HospitalResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get a hospital by ID"
+)
+async def get_hospital_by_id(hospital_id: int, db: Session = Depends(get_db)):
+    try:
+        hospital = get_hospital(hospital_id, db)
+        if hospital is None:
+            raise HTTPException(status_code=404, detail=f"Hospital with ID {hospital_id} not found")
+        return hospital
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+# ---------- Create hospital ----------
+@router.post(
+    "/",
+    response_model=HospitalResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a new hospital",
+    description="Add a hospital and refresh the hospital registry."
+)
+async def create_hospital(hospital_data: HospitalCreate, db: Session = Depends(get_db)):
+    try:
+        hospital = Hospital(**hospital_data.model_dump())
+        db.add(hospital)
+        db.commit()
+        db.refresh(hospital)
+
+        load_hospitals(db)
+        await record_hospital_change(1)
+        return hospital
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error while creating hospital: {e}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+# ---------- Update hospital ----------
+@router.put(
+    "/{hospital_id}",
+    response_model=HospitalResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Update hospital information",
+    description="Update hospital name, location or coordinates and refresh the hospital registry."
+)
+async def update_hospital(hospital_id: int, hospital_update: HospitalUpdate, db: Session = Depends(get_db)):
+    try:
+        hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+        if not hospital:
+            raise HTTPException(status_code=404, detail=f"Hospital with ID {hospital_id} not found")
+
+        for field, value in hospital_update.model_dump(exclude_unset=True).items():
+            setattr(hospital, field, value)
+
+        db.commit()
+        db.refresh(hospital)
+
+        load_hospitals(db)
+        return hospital
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error while updating hospital: {e}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+# ---------- Delete hospital ----------
+@router.delete(
+    "/{hospital_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete a hospital",
+    description="Delete a hospital that has no live or archived requests."
+)
+async def delete_hospital(hospital_id: int, db: Session = Depends(get_db)):
+    try:
+        hospital = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+        if not hospital:
+            raise HTTPException(status_code=404, detail=f"Hospital with ID {hospital_id} not found")
+
+        has_requests = (
+            db.query(Request.id).filter(Request.hospital_id == hospital_id).first() is not None
+            or db.query(ArchivedRequest.id).filter(ArchivedRequest.hospital_id == hospital_id).first() is not None
+        )
+        if has_requests:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Hospital with ID {hospital_id} has blood requests and cannot be deleted"
+            )
+
+        db.delete(hospital)
+        db.commit()
+
+        load_hospitals(db)
+        await record_hospital_change(-1)
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error while deleting hospital: {e}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
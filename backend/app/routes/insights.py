@@ -0,0 +1,57 @@
+# backend/app/routes/insights.py
+from typing import Dict, Optional
+
+from fastapi import APIRouter, HTTPException, status
+from pydantic import BaseModel
+
+from app.services.insights import get_insights, reconcile_insights
+
+router = APIRouter()
+
+# ---------- Response models ----------
+class RequestInsights(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    by_urgency: Dict[str, int]
+    by_blood_type: Dict[str, int]
+    by_hospital: Dict[str, int]          # hospital_id -> count
+
+class DonorInsights(BaseModel):
+    total: int
+    available: int
+    available_by_blood_group: Dict[str, int]
+
+class InsightsResponse(BaseModel):
+    requests: RequestInsights
+    donors: DonorInsights
+    hospitals: int
+    reconciled_at: Optional[int] = None  # unix seconds of last SQL reconciliation
+
+# ---------- Dashboard counters ----------
+@router.get(
+    "/",
+    response_model=InsightsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get admin dashboard insights",
+    description="Request, donor and hospital counts served from incrementally maintained Redis counters."
+)
+async def insights():
+    try:
+        return await get_insights()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {e}")
+
+# ---------- Force reconciliation ----------
+@router.post(
+    "/reconcile",
+    response_model=InsightsResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Rebuild insights counters from the database",
+    description="Recompute all counters with SQL aggregates and replace the Redis copies."
+)
+async def reconcile():
+    try:
+        await reconcile_insights()
+        return await get_insights()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reconciling insights: {e}")
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy.exc import SQLAlchemyError
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from app.database import get_db
-from app.models.models import Request, Hospital, RequestStatus
+from app.models.models import Request, ArchivedRequest, RequestStatus
 from app.schemas.schemas import RequestCreate, RequestResponse, RequestWithHospital
 from app.realtime import broadcast_new_request
-from typing import List
+from app.services.insights import record_request_created, record_request_status_change
+from app.services.archive import CLOSED_STATUSES
+from app.services.idempotency import run_idempotent
+from app.services.hospital_registry import get_hospital, invalidate_hospitals
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -14,12 +19,26 @@ class RequestStatusUpdate(BaseModel):
     """Schema for updating request status"""
     status: RequestStatus
 
+def _with_hospital(request, db: Session) -> dict:
+    """Request fields plus hospital details from the hospital registry (avoids lazy loads)"""
+    return {
+        "id": request.id,
+        "hospital_id": request.hospital_id,
+        "blood_type": request.blood_type,
+        "urgency": request.urgency,
+        "status": request.status,
+        "donor_id": request.donor_id,
+        "created_at": request.created_at,
+        "updated_at": request.updated_at,
+        "hospital": get_hospital(request.hospital_id, db),
+    }
+
 @router.get(
     "/",
     response_model=List[RequestWithHospital],
     status_code=status.HTTP_200_OK,
     summary="Get all blood requests",
-    description="Retrieve all blood requests with hospital details. Optionally filter by status or hospital ID.",
+    description="Retrieve all blood requests with hospital details. Optionally filter by status, hospital ID or creation date range (date ranges also search archived requests).",
     responses={
         200: {
             "description": "List of requests retrieved successfully",
@@ -52,7 +71,9 @@ class RequestStatusUpdate(BaseModel):
 async def get_requests(
     db: Session = Depends(get_db),
     status_filter: RequestStatus = None,
-    hospital_id: int = None
+    hospital_id: int = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
 ):
     """
     Get all blood requests.
@@ -60,6 +81,8 @@ async def get_requests(
     **Query Parameters:**
     - `status_filter` (optional): Filter by request status (Pending, Active, Fulfilled, Cancelled)
     - `hospital_id` (optional): Filter by hospital ID
+    - `created_from` / `created_to` (optional): Creation date range (inclusive). When either is
+      given, closed requests that were moved to the archive are included as well.
     
     **Returns:**
     - List of request objects with hospital details included
@@ -68,24 +91,38 @@ async def get_requests(
     - `GET /requests/` - Get all requests
     - `GET /requests/?status_filter=Pending` - Get only pending requests
     - `GET /requests/?hospital_id=1` - Get requests for hospital ID 1
+    - `GET /requests/?created_from=2024-01-01&created_to=2024-03-31` - Requests from Q1 2024, including archived ones
     """
     try:
-        query = db.query(Request)
-        
-        # Filter by status if provided
-        if status_filter is not None:
-            query = query.filter(Request.status == status_filter)
+        def filtered(model):
+            query = db.query(model)
+            
+            # Filter by status if provided
+            if status_filter is not None:
+                query = query.filter(model.status == status_filter)
+            
+            # Filter by hospital_id if provided
+            if hospital_id is not None:
+                query = query.filter(model.hospital_id == hospital_id)
+            
+            # Filter by creation date range if provided
+            if created_from is not None:
+                query = query.filter(model.created_at >= created_from)
+            if created_to is not None:
+                query = query.filter(model.created_at <= created_to)
+            
+            return query.all()
         
-        # Filter by hospital_id if provided
-        if hospital_id is not None:
-            query = query.filter(Request.hospital_id == hospital_id)
+        requests = filtered(Request)
         
-        # Join with hospital for eager loading
-        requests = query.options(
-            joinedload(Request.hospital)
-        ).all()
+        # Historical queries: closed requests may have been archived
+        wants_history = created_from is not None or created_to is not None
+        if wants_history and (status_filter is None or status_filter in CLOSED_STATUSES):
+            requests = requests + filtered(ArchivedRequest)
+            requests.sort(key=lambda r: (r.created_at, r.id))
         
-        return requests
+        # Attach hospital details from the in-process registry instead of joining
+        return [_with_hospital(r, db) for r in requests]
     except SQLAlchemyError as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -135,7 +172,8 @@ async def get_requests(
 )
 async def create_request(
     request_data: RequestCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Create a new blood request.
@@ -160,10 +198,25 @@ async def create_request(
     ```
     
     **Note:** New requests are automatically broadcast to all connected clients via Socket.IO.
+    
+    **Retries:** Send an `Idempotency-Key` header to make retries safe. A repeated key returns the
+    stored response (with `Idempotent-Replayed: true`) instead of creating a duplicate request.
     """
+    return await run_idempotent(
+        idempotency_key,
+        "requests:create",
+        request_data,
+        lambda: _create_request(request_data, db),
+        status_code=status.HTTP_201_CREATED,
+        serialize=RequestResponse.model_validate,
+    )
+
+async def _create_request(request_data: RequestCreate, db: Session) -> dict:
+    """Validate the hospital, insert the request, update counters and broadcast it"""
     try:
-        # Verify hospital exists
-        hospital = db.query(Hospital).filter(Hospital.id == request_data.hospital_id).first()
+        # Verify hospital exists (registry lookup, no query when cached). The
+        # registry may lag another worker's delete; the foreign key decides then
+        hospital = get_hospital(request_data.hospital_id, db)
         if not hospital:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -178,23 +231,31 @@ async def create_request(
         db.commit()
         db.refresh(new_request)
         
-        # Load hospital name for broadcast
-        hospital = db.query(Hospital).filter(Hospital.id == new_request.hospital_id).first()
+        await record_request_created(
+            new_request.hospital_id, new_request.blood_type, new_request.urgency, new_request.status
+        )
         
         # Broadcast new request to all connected clients
         await broadcast_new_request({
             "id": new_request.id,
             "hospital_id": new_request.hospital_id,
-            "hospital_name": hospital.name if hospital else None,
+            "hospital_name": hospital.name,
             "blood_type": new_request.blood_type,
             "urgency": new_request.urgency.value,
             "status": new_request.status.value,
             "created_at": new_request.created_at.isoformat() if new_request.created_at else None,
         })
         
-        return new_request
+        return _with_hospital(new_request, db)
     except HTTPException:
         raise
+    except IntegrityError:
+        db.rollback()
+        invalidate_hospitals()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Hospital with ID {request_data.hospital_id} not found"
+        )
     except SQLAlchemyError as e:
         db.rollback()
         raise HTTPException(
@@ -279,13 +340,16 @@ async def update_request_status(
             )
         
         # Update status
+        old_status = request.status
         request.status = status_update.status
         
         # Commit changes
         db.commit()
         db.refresh(request)
         
-        return request
+        await record_request_status_change(old_status, request.status)
+        
+        return _with_hospital(request, db)
     except HTTPException:
         raise
     except SQLAlchemyError as e:
@@ -0,0 +1,99 @@
+# backend/app/services/archive.py
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database import settings
+from app.database.database import SessionLocal
+from app.models.models import ArchivedRequest, Request, RequestStatus
+from app.services.log import get_logger
+
+log = get_logger("archive")
+
+CLOSED_STATUSES = (RequestStatus.FULFILLED, RequestStatus.CANCELLED)
+
+# Columns copied verbatim from `requests` into `requests_archive`
+_COLUMNS = ("id", "hospital_id", "blood_type", "urgency", "status", "donor_id", "created_at", "updated_at")
+
+def archive_closed_requests(
+    db: Session,
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Move closed requests that have not changed for `older_than_days` into
+    `requests_archive`, one batch per transaction.
+
+    Args:
+        db: Database session
+        older_than_days: Minimum age since last update (default: settings.ARCHIVE_AFTER_DAYS)
+        batch_size: Rows per INSERT ... SELECT / DELETE transaction (default: settings.ARCHIVE_BATCH_SIZE)
+
+    Returns:
+        Number of requests archived
+    """
+    days = older_than_days if older_than_days is not None else settings.ARCHIVE_AFTER_DAYS
+    size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    # updated_at is written by the database in UTC (CURRENT_TIMESTAMP / now())
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    moved = 0
+    while True:
+        ids = db.execute(
+            select(Request.id)
+            .where(
+                Request.status.in_(CLOSED_STATUSES),
+                Request.updated_at < cutoff,
+                Request.id.not_in(select(ArchivedRequest.id)),
+            )
+            .order_by(Request.id)
+            .limit(size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        try:
+            source = select(*(getattr(Request, c) for c in _COLUMNS)).where(Request.id.in_(ids))
+            db.execute(insert(ArchivedRequest).from_select(list(_COLUMNS), source))
+            db.execute(delete(Request).where(Request.id.in_(ids)))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        moved += len(ids)
+        if len(ids) < size:
+            break
+
+    # Requests whose id was reused before `requests` used AUTOINCREMENT (see
+    # db_utils.upgrade_schema) can't be archived under that id; they stay live
+    collisions = db.execute(
+        select(func.count())
+        .select_from(Request)
+        .where(
+            Request.status.in_(CLOSED_STATUSES),
+            Request.updated_at < cutoff,
+            Request.id.in_(select(ArchivedRequest.id)),
+        )
+    ).scalar()
+    if collisions:
+        log.warning("archive.id_conflict", "Closed requests left live: id already archived", count=collisions)
+    return moved
+
+def _archive_with_new_session() -> int:
+    db = SessionLocal()
+    try:
+        return archive_closed_requests(db)
+    finally:
+        db.close()
+
+async def run_archive_job() -> int:
+    """Archive closed requests without blocking the event loop"""
+    moved = await asyncio.to_thread(_archive_with_new_session)
+    if moved:
+        log.info("archive.moved", "Archived closed requests", moved=moved)
+    return moved
+
+__all__ = ["CLOSED_STATUSES", "archive_closed_requests", "run_archive_job"]
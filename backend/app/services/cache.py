@@ -1,8 +1,14 @@
 import redis.asyncio as redis
 from app.database import settings
+from app.services.metrics import instrument_redis
+from app.services.timing import phase
+from app.services.tracing import trace_redis
+from app.services.log import get_logger
 from typing import List, Optional
 import json
 
+log = get_logger("cache")
+
 # Global Redis client
 redis_client: Optional[redis.Redis] = None
 
@@ -25,13 +31,15 @@ async def get_redis_client() -> redis.Redis:
                 encoding="utf-8",
                 decode_responses=True
             )
+            instrument_redis(redis_client)
+            trace_redis(redis_client)
             
             # Test connection
             await redis_client.ping()
-            print("✅ Redis connection established")
+            log.info("redis.connected", "Redis connection established")
             
         except Exception as e:
-            print(f"❌ Failed to connect to Redis: {e}")
+            log.error("redis.connect_failed", "Failed to connect to Redis", error=str(e))
             raise ConnectionError(f"Could not connect to Redis: {e}")
     
     return redis_client
@@ -42,7 +50,7 @@ async def close_redis():
     if redis_client:
         await redis_client.close()
         redis_client = None
-        print("✅ Redis connection closed")
+        log.info("redis.closed", "Redis connection closed")
 
 # ============ Donor Availability Cache ============
 
@@ -66,11 +74,12 @@ async def set_donor_availability(donor_id: int, available: bool) -> bool:
         value = "available" if available else "unavailable"
         
         # Set with no expiration (or set expiration as needed)
-        await client.set(key, value)
+        with phase("cache_availability"):
+            await client.set(key, value)
         
         return True
     except Exception as e:
-        print(f"❌ Error setting donor availability in cache: {e}")
+        log.error("cache.error", "Error setting donor availability in cache", error=str(e))
         return False
 
 async def get_donor_availability(donor_id: int) -> Optional[bool]:
@@ -86,14 +95,15 @@ async def get_donor_availability(donor_id: int) -> Optional[bool]:
     try:
         client = await get_redis_client()
         key = f"donor:{donor_id}"
-        value = await client.get(key)
+        with phase("cache_availability"):
+            value = await client.get(key)
         
         if value is None:
             return None
         
         return value == "available"
     except Exception as e:
-        print(f"❌ Error getting donor availability from cache: {e}")
+        log.error("cache.error", "Error getting donor availability from cache", error=str(e))
         return None
 
 async def delete_donor_availability(donor_id: int) -> bool:
@@ -109,10 +119,11 @@ async def delete_donor_availability(donor_id: int) -> bool:
     try:
         client = await get_redis_client()
         key = f"donor:{donor_id}"
-        await client.delete(key)
+        with phase("cache_availability"):
+            await client.delete(key)
         return True
     except Exception as e:
-        print(f"❌ Error deleting donor availability from cache: {e}")
+        log.error("cache.error", "Error deleting donor availability from cache", error=str(e))
         return False
 
 async def get_available_donors() -> List[int]:
@@ -125,23 +136,24 @@ async def get_available_donors() -> List[int]:
     try:
         client = await get_redis_client()
         
-        # Get all keys matching pattern "donor:*"
-        keys = await client.keys("donor:*")
-        
-        available_donor_ids = []
-        
-        # Check each key's value
-        for key in keys:
-            value = await client.get(key)
-            if value == "available":
-                # Extract donor ID from key (donor:123 -> 123)
-                donor_id = int(key.split(":")[1])
-                available_donor_ids.append(donor_id)
+        with phase("cache_available_scan"):
+            # Get all keys matching pattern "donor:*"
+            keys = await client.keys("donor:*")
+            
+            available_donor_ids = []
+            
+            # Check each key's value
+            for key in keys:
+                value = await client.get(key)
+                if value == "available":
+                    # Extract donor ID from key (donor:123 -> 123)
+                    donor_id = int(key.split(":")[1])
+                    available_donor_ids.append(donor_id)
         
         return available_donor_ids
         
     except Exception as e:
-        print(f"❌ Error getting available donors from cache: {e}")
+        log.error("cache.error", "Error getting available donors from cache", error=str(e))
         return []
 
 async def sync_all_donors_to_cache(donors_data: List[dict]) -> bool:
@@ -168,7 +180,7 @@ async def sync_all_donors_to_cache(donors_data: List[dict]) -> bool:
         
         return True
     except Exception as e:
-        print(f"❌ Error syncing donors to cache: {e}")
+        log.error("cache.error", "Error syncing donors to cache", error=str(e))
         return False
 
 async def clear_all_donor_cache() -> bool:
@@ -187,6 +199,6 @@ async def clear_all_donor_cache() -> bool:
         
         return True
     except Exception as e:
-        print(f"❌ Error clearing donor cache: {e}")
+        log.error("cache.error", "Error clearing donor cache", error=str(e))
         return False
 
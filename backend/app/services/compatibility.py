@@ -0,0 +1,36 @@
+# backend/app/services/compatibility.py
+from typing import Dict, List, Optional, Tuple
+
+BLOOD_GROUPS: Tuple[str, ...] = ("O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+")
+
+# Red cell compatibility: recipient -> donor groups that can give to them
+DONORS_FOR_RECIPIENT: Dict[str, Tuple[str, ...]] = {
+    "O-": ("O-",),
+    "O+": ("O+", "O-"),
+    "A-": ("A-", "O-"),
+    "A+": ("A+", "A-", "O+", "O-"),
+    "B-": ("B-", "O-"),
+    "B+": ("B+", "B-", "O+", "O-"),
+    "AB-": ("AB-", "A-", "B-", "O-"),
+    "AB+": BLOOD_GROUPS,
+}
+
+def compatible_donor_groups(recipient: Optional[str]) -> List[str]:
+    """
+    Donor blood groups that can give to `recipient`, exact match first.
+
+    Returns:
+        List of blood groups (all groups if `recipient` is None or unknown)
+    """
+    if not recipient or recipient not in DONORS_FOR_RECIPIENT:
+        return list(BLOOD_GROUPS)
+    groups = DONORS_FOR_RECIPIENT[recipient]
+    return [recipient] + [g for g in groups if g != recipient]
+
+def compatibility_rank(recipient: Optional[str], donor_group: str) -> int:
+    """0 for an exact match, 1 for another compatible group, 2 otherwise (sort key)"""
+    if not recipient or donor_group == recipient:
+        return 0
+    return 1 if donor_group in DONORS_FOR_RECIPIENT.get(recipient, ()) else 2
+
+__all__ = ["BLOOD_GROUPS", "DONORS_FOR_RECIPIENT", "compatible_donor_groups", "compatibility_rank"]
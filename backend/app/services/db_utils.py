@@ -1,6 +1,37 @@
+import hashlib
+from sqlalchemy import Column, MetaData, String, Table, inspect, select, text
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex, CreateTable
 from app.database.database import SessionLocal, engine, Base
-from typing import Generator
+from app.models.models import Request  # also registers every table on Base.metadata
+from typing import Generator, List
+from app.services.log import get_logger
+
+log = get_logger("db")
+
+# One-row bookkeeping table outside the models' metadata: the fingerprint of
+# the schema create_all last ran for, so restarts can skip the DDL round trips
+_schema_meta = Table(
+    "schema_meta",
+    MetaData(),
+    Column("key", String(50), primary_key=True),
+    Column("value", String(64), nullable=False),
+)
+
+# Columns added to tables that already existed in deployed databases.
+# create_all only creates missing tables, so upgrade_schema() adds these
+# with ALTER TABLE (they must be nullable or have a server default).
+ADDED_COLUMNS = [
+    ("donors", "email"),
+    ("donors", "phone"),
+    ("hospitals", "lat"),
+    ("hospitals", "lng"),
+]
+
+# Bump when upgrade_schema() learns a new step. Both this and ADDED_COLUMNS
+# are part of the schema fingerprint, so every database runs the upgrade once.
+UPGRADE_REVISION = 2
 
 def get_session() -> Generator[Session, None, None]:
     """
@@ -20,7 +51,7 @@ def get_session() -> Generator[Session, None, None]:
 
 def init_db() -> None:
     """
-    Initialize the database by creating all tables.
+    Initialize the database: create missing tables and add missing columns.
     This should be called once during application startup or migration.
     
     Usage:
@@ -28,7 +59,138 @@ def init_db() -> None:
     """
     # Create all tables defined in models
     Base.metadata.create_all(bind=engine)
-    print("✅ Database tables created successfully")
+    upgrade_schema()
+    # Only record the schema as current once the tables really match the
+    # models; otherwise the next start checks (and logs) again
+    missing = missing_columns()
+    if missing:
+        log.error(
+            "db.schema_drift", "Existing tables are missing model columns; add them to ADDED_COLUMNS or migrate",
+            missing=missing,
+        )
+        return
+    _store_schema_version(schema_version())
+    log.info("db.schema_created", "Database tables created successfully")
+
+def missing_columns() -> List[str]:
+    """Model columns ("table.column") absent from the database's existing tables"""
+    inspector = inspect(engine)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            missing.append(f"{table.name}.*")
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{c.name}" for c in table.columns if c.name not in existing)
+    return missing
+
+def schema_version() -> str:
+    """
+    Fingerprint of the models' DDL for this database dialect.
+
+    Any change to a table, column, type or index changes the fingerprint.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((UPGRADE_REVISION, ADDED_COLUMNS)).encode())
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=engine.dialect)).encode())
+    return digest.hexdigest()
+
+def _sqlite_requests_reuse_ids(conn) -> bool:
+    """Whether an existing SQLite `requests` table was created without AUTOINCREMENT"""
+    ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'requests'")).scalar()
+    return ddl is not None and "AUTOINCREMENT" not in ddl.upper()
+
+def _rebuild_requests_with_autoincrement(conn) -> None:
+    """
+    Recreate `requests` with AUTOINCREMENT, keeping its rows, and start the
+    id sequence after the highest id in `requests` or `requests_archive`.
+
+    Without AUTOINCREMENT SQLite hands out max(id) + 1, so ids freed by
+    archiving came back and collided with `requests_archive` rows.
+    """
+    columns = ", ".join(c.name for c in Request.__table__.columns)
+    for index in inspect(conn).get_indexes("requests"):
+        conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+    conn.execute(text("ALTER TABLE requests RENAME TO requests_old"))
+    Request.__table__.create(conn)
+    conn.execute(text(f"INSERT INTO requests ({columns}) SELECT {columns} FROM requests_old"))
+    conn.execute(text("DROP TABLE requests_old"))
+    last_id = conn.execute(text(
+        "SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM requests UNION ALL SELECT MAX(id) FROM requests_archive)"
+    )).scalar() or 0
+    conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'requests'"))
+    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('requests', :seq)"), {"seq": last_id})
+
+def upgrade_schema() -> List[str]:
+    """
+    Apply the changes create_all can't make to existing tables: add the
+    ADDED_COLUMNS that are missing, and on SQLite rebuild a `requests`
+    table created before it used AUTOINCREMENT. Safe to run repeatedly.
+
+    Returns:
+        The changes applied ("table.column", "requests.autoincrement")
+    """
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    applied = []
+    with engine.begin() as conn:
+        for table_name, column_name in ADDED_COLUMNS:
+            if not inspector.has_table(table_name):
+                continue
+            if column_name in {c["name"] for c in inspector.get_columns(table_name)}:
+                continue
+            column = Base.metadata.tables[table_name].c[column_name]
+            conn.execute(text(
+                f"ALTER TABLE {quote(table_name)} ADD COLUMN {quote(column_name)} "
+                f"{column.type.compile(dialect=engine.dialect)}"
+            ))
+            applied.append(f"{table_name}.{column_name}")
+        if engine.dialect.name == "sqlite" and _sqlite_requests_reuse_ids(conn):
+            _rebuild_requests_with_autoincrement(conn)
+            applied.append("requests.autoincrement")
+    if applied:
+        log.info("db.schema_upgraded", "Upgraded existing tables", changes=applied)
+    return applied
+
+def _stored_schema_version():
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(_schema_meta.c.value).where(_schema_meta.c.key == "schema_version")
+            ).scalar()
+    except SQLAlchemyError:
+        # No schema_meta table yet (fresh database or created before it existed)
+        return None
+
+def _store_schema_version(version: str) -> None:
+    with engine.begin() as conn:
+        _schema_meta.create(conn, checkfirst=True)
+        conn.execute(_schema_meta.delete().where(_schema_meta.c.key == "schema_version"))
+        conn.execute(_schema_meta.insert().values(key="schema_version", value=version))
+
+def ensure_schema() -> bool:
+    """
+    Run init_db() only when the stored schema version differs from the models.
+
+    A matching version costs one SELECT instead of create_all's per-table
+    existence checks against the database.
+
+    The version is only stored after the DDL left every model column in
+    place, so a change create_all can't apply is retried (and logged) on
+    each start rather than recorded as current.
+
+    Returns:
+        True if the DDL ran, False if the schema was already current
+    """
+    version = schema_version()
+    if _stored_schema_version() == version:
+        log.info("db.schema_current", "Database schema current, skipping create_all", version=version[:12])
+        return False
+    init_db()
+    return True
 
 def drop_db() -> None:
     """
@@ -39,7 +201,8 @@ def drop_db() -> None:
         drop_db()
     """
     Base.metadata.drop_all(bind=engine)
-    print("⚠️  All database tables dropped")
+    _schema_meta.drop(engine, checkfirst=True)
+    log.warning("db.dropped", "All database tables dropped")
 
 def reset_db() -> None:
     """
@@ -51,7 +214,7 @@ def reset_db() -> None:
     """
     drop_db()
     init_db()
-    print("✅ Database reset complete")
+    log.info("db.reset", "Database reset complete")
 
-__all__ = ["get_session", "init_db", "drop_db", "reset_db"]
+__all__ = ["get_session", "init_db", "ensure_schema", "upgrade_schema", "missing_columns", "schema_version", "drop_db", "reset_db"]
 
@@ -1,9 +1,18 @@
 # backend/app/services/geo.py
+import asyncio
+import math
 import time
-from typing import List, Tuple
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.database.database import SessionLocal
+from app.models.models import Donor
 from app.services.cache import get_redis_client  # reuse your existing client
 from redis.exceptions import ResponseError
+from app.services.timing import phase
 
+# Every donor's registered location, written on create/update and rebuilt
+# from the donors table by reconcile_geo_index(); the score in TS_KEY is when
+# the location was last written, which /donors/nearby's fresh_min filters on
 GEO_KEY = "donors:live"
 TS_KEY  = "donors:live:ts"  # score = unix ms
 
@@ -20,17 +29,85 @@ async def upsert_donor_geo(donor_id: int, lat: float, lng: float, accuracy_m: in
     p.hset(f"donor:meta:{donor_id}", mapping={
         "lat": lat, "lng": lng, "accuracy_m": accuracy_m or 0, "updated_at": now
     })
-    await p.execute()
+    with phase("geo_upsert"):
+        await p.execute()
 
 
-async def donors_near(lat: float, lng: float, km: float = 5.0, fresh_ms: int = 10*60*1000):
+async def bulk_upsert_donor_geo(
+    rows: Iterable[Tuple[int, float, float]],
+    now_ms: Optional[int] = None,
+    chunk_size: int = 5000,
+) -> int:
+    """
+    Load many donor locations with one pipeline round-trip per chunk.
+
+    Args:
+        rows: (donor_id, lat, lng) tuples
+        now_ms: freshness timestamp to record (default: now)
+        chunk_size: donors per pipeline
+
+    Returns:
+        Number of donors written
+    """
+    r = await get_redis_client()
+    now = now_ms if now_ms is not None else int(time.time() * 1000)
+    written = 0
+    chunk: List[Tuple[int, float, float]] = []
+
+    async def flush() -> None:
+        p = r.pipeline(transaction=False)
+        geo_values: list = []
+        for donor_id, lat, lng in chunk:
+            geo_values.extend((lng, lat, _member(donor_id)))  # (lng, lat)
+            p.hset(f"donor:meta:{donor_id}", mapping={
+                "lat": lat, "lng": lng, "accuracy_m": 0, "updated_at": now
+            })
+        p.geoadd(GEO_KEY, geo_values)
+        p.zadd(TS_KEY, {_member(donor_id): now for donor_id, _, _ in chunk})
+        await p.execute()
+
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            await flush()
+            written += len(chunk)
+            chunk = []
+    if chunk:
+        await flush()
+        written += len(chunk)
+    return written
+
+
+KM_PER_DEGREE = 111.32
+EARTH_RADIUS_KM = 6371.0
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km"""
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def bounding_box(lat: float, lng: float, km: float) -> Tuple[float, float, float, float]:
+    """(lat_lo, lat_hi, lng_lo, lng_hi) enclosing the circle of `km` around a point"""
+    dlat = km / KM_PER_DEGREE
+    dlng = km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return lat - dlat, lat + dlat, lng - dlng, lng + dlng
+
+async def donors_near(lat: float, lng: float, km: float = 5.0, fresh_ms: Optional[int] = 10*60*1000, count: Optional[int] = None):
+    # count: only consider the `count` nearest members (keeps the freshness
+    # pipeline small when the radius covers thousands of donors)
+    # fresh_ms: drop donors whose location is older; None = no freshness filter
     r = await get_redis_client()
-    rows = await r.geosearch(
-        GEO_KEY,
-        longitude=lng, latitude=lat,
-        radius=km, unit="km",
-        withdist=True
-    )
+    with phase("geo_search"):
+        rows = await r.geosearch(
+            GEO_KEY,
+            longitude=lng, latitude=lat,
+            radius=km, unit="km",
+            withdist=True,
+            sort="ASC" if count else None,
+            count=count,
+        )
     if not rows:
         return []
 
@@ -46,11 +123,15 @@ async def donors_near(lat: float, lng: float, km: float = 5.0, fresh_ms: int = 1
             m = m.decode() if isinstance(m, (bytes, bytearray)) else m
             members.append(m); dists[m] = 0.0
 
+    if fresh_ms is None:
+        return [(int(m.split(":", 1)[1]), dists[m]) for m in members]
+
     # freshness via pipelined ZSCORE (no ZMSCORE at all)
     pipe = r.pipeline()
     for m in members:
         pipe.zscore(TS_KEY, m)
-    scores = await pipe.execute()
+    with phase("geo_freshness"):
+        scores = await pipe.execute()
 
     cutoff = int(time.time()*1000) - fresh_ms
     out = []
@@ -62,14 +143,188 @@ async def donors_near(lat: float, lng: float, km: float = 5.0, fresh_ms: int = 1
     return out
 
 
-async def purge_stale(fresh_ms: int = 10 * 60 * 1000) -> int:
+# KEYS: TS_KEY, GEO_KEY, then one donor:meta:{id} key per member; ARGV:
+# cutoff (ms), then the members. Re-checks each score, so a donor that
+# reported a location after the chunk was read is kept.
+PURGE_LUA = """
+local cutoff = tonumber(ARGV[1])
+local purged = 0
+for i = 2, #ARGV do
+  local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+  if score and tonumber(score) <= cutoff then
+    redis.call('ZREM', KEYS[1], ARGV[i])
+    redis.call('ZREM', KEYS[2], ARGV[i])
+    redis.call('DEL', KEYS[i + 1])
+    purged = purged + 1
+  end
+end
+return purged
+"""
+
+# KEYS: TS_KEY, then donor:meta:{id} hashes; ARGV: cutoff (ms). Deletes
+# hashes with no TS_KEY entry that were last updated before the cutoff.
+ORPHAN_META_LUA = """
+local cutoff = tonumber(ARGV[1])
+local deleted = 0
+for i = 2, #KEYS do
+  local member = 'donor:' .. string.sub(KEYS[i], 12)
+  if not redis.call('ZSCORE', KEYS[1], member) then
+    local updated = tonumber(redis.call('HGET', KEYS[i], 'updated_at') or '0') or 0
+    if updated <= cutoff then
+      redis.call('DEL', KEYS[i])
+      deleted = deleted + 1
+    end
+  end
+end
+return deleted
+"""
+
+async def purge_stale(fresh_ms: int = 10 * 60 * 1000, chunk_size: int = 1000) -> int:
+    """
+    Remove donors whose last location is older than `fresh_ms` from the
+    geo index, the freshness set and their donor:meta hash.
+
+    This drops registered locations too (until the donor is next updated or
+    reconcile_geo_index() restores them); the scheduled job only removes
+    donors that no longer exist.
+
+    Works through the stale range `chunk_size` members per script call, so
+    Redis is never blocked on one large ZREM.
+
+    Returns:
+        Number of donors removed
+    """
+    r = await get_redis_client()
+    cutoff = int(time.time() * 1000) - fresh_ms
+    script = r.register_script(PURGE_LUA)
+    purged = 0
+    while True:
+        stale = await r.zrangebyscore(TS_KEY, 0, cutoff, start=0, num=chunk_size)
+        if not stale:
+            return purged
+        stale = [m.decode() if isinstance(m, (bytes, bytearray)) else m for m in stale]
+        meta_keys = [f"donor:meta:{m.split(':', 1)[1]}" for m in stale]
+        removed = int(await script(keys=[TS_KEY, GEO_KEY, *meta_keys], args=[cutoff, *stale]))
+        purged += removed
+        if len(stale) < chunk_size or removed == 0:
+            return purged
+
+
+async def purge_orphan_meta(fresh_ms: int = 10 * 60 * 1000, chunk_size: int = 1000) -> int:
+    """
+    Delete donor:meta hashes left without a freshness entry (e.g. by the
+    purge before it removed them) and not updated within `fresh_ms`.
+    Scans the keyspace incrementally, `chunk_size` keys at a time.
+
+    Returns:
+        Number of hashes deleted
+    """
     r = await get_redis_client()
     cutoff = int(time.time() * 1000) - fresh_ms
-    stale = await r.zrangebyscore(TS_KEY, 0, cutoff)
-    if not stale:
+    script = r.register_script(ORPHAN_META_LUA)
+    deleted = 0
+    cursor = 0
+    while True:
+        cursor, keys = await r.scan(cursor=cursor, match="donor:meta:*", count=chunk_size)
+        if keys:
+            deleted += int(await script(keys=[TS_KEY, *keys], args=[cutoff]))
+        if int(cursor) == 0:
+            return deleted
+
+
+# ============ Reconciliation with the donors table ============
+
+def _updated_ms(updated_at: Optional[datetime]) -> int:
+    # updated_at is naive UTC (written by the database)
+    if updated_at is None:
         return 0
-    p = r.pipeline()
-    p.zrem(TS_KEY, *stale)
-    p.zrem(GEO_KEY, *stale)
-    await p.execute()
-    return len(stale)
\ No newline at end of file
+    return int(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+def _donor_locations_after(last_id: int, limit: int) -> List[tuple]:
+    db = SessionLocal()
+    try:
+        return db.query(Donor.id, Donor.lat, Donor.lng, Donor.updated_at) \
+            .filter(Donor.id > last_id).order_by(Donor.id).limit(limit).all()
+    finally:
+        db.close()
+
+def _existing_donor_ids(ids: List[int]) -> Set[int]:
+    db = SessionLocal()
+    try:
+        return {row[0] for row in db.query(Donor.id).filter(Donor.id.in_(ids)).all()}
+    finally:
+        db.close()
+
+async def reconcile_geo_index(chunk_size: int = 1000) -> Dict[str, int]:
+    """
+    Make the GEO index match the donors table, `chunk_size` donors at a time.
+
+    Donors missing from the index, or whose row changed after their entry was
+    written (a failed Redis write), are (re)written with the row's updated_at
+    as their timestamp, so the freshness filter still means "location last
+    updated". Entries (and donor:meta hashes) of donors that no longer exist
+    are removed, as are meta hashes without an index entry. Nothing that the
+    donors table can't regenerate is deleted.
+
+    Returns:
+        Counts of donors written and removed and meta hashes deleted
+    """
+    r = await get_redis_client()
+    written = 0
+
+    # 1) donors table -> index
+    last_id = 0
+    while True:
+        rows = await asyncio.to_thread(_donor_locations_after, last_id, chunk_size)
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        p = r.pipeline(transaction=False)
+        for donor_id, _, _, _ in rows:
+            p.zscore(TS_KEY, _member(donor_id))
+        scores = await p.execute()
+
+        p = r.pipeline(transaction=False)
+        geo_values: list = []
+        stamps: Dict[str, int] = {}
+        for (donor_id, lat, lng, updated_at), score in zip(rows, scores):
+            updated = _updated_ms(updated_at)
+            if score is not None and score >= updated:
+                continue
+            m = _member(donor_id)
+            geo_values.extend((lng, lat, m))  # (lng, lat)
+            stamps[m] = updated
+            p.hset(f"donor:meta:{donor_id}", mapping={
+                "lat": lat, "lng": lng, "accuracy_m": 0, "updated_at": updated
+            })
+        if stamps:
+            p.geoadd(GEO_KEY, geo_values)
+            p.zadd(TS_KEY, stamps)
+            await p.execute()
+            written += len(stamps)
+        if len(rows) < chunk_size:
+            break
+
+    # 2) index -> donors table: drop donors that were deleted
+    script = r.register_script(PURGE_LUA)
+    removed = 0
+    cursor = 0
+    while True:
+        cursor, entries = await r.zscan(TS_KEY, cursor=cursor, count=chunk_size)
+        members = [m.decode() if isinstance(m, (bytes, bytearray)) else m for m, _ in entries]
+        if members:
+            # entries written after this check (a donor just created) are kept
+            checked_at = int(time.time() * 1000)
+            existing = await asyncio.to_thread(_existing_donor_ids, [int(m.split(":", 1)[1]) for m in members])
+            gone = [m for m in members if int(m.split(":", 1)[1]) not in existing]
+            if gone:
+                meta_keys = [f"donor:meta:{m.split(':', 1)[1]}" for m in gone]
+                removed += int(await script(keys=[TS_KEY, GEO_KEY, *meta_keys], args=[checked_at, *gone]))
+        if int(cursor) == 0:
+            break
+
+    # 3) meta hashes left without an index entry (older than a minute, so a
+    #    write in progress is never caught half-way)
+    orphan_meta = await purge_orphan_meta(60 * 1000, chunk_size)
+    return {"written": written, "removed": removed, "orphan_meta": orphan_meta}
+
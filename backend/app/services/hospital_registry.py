@@ -0,0 +1,99 @@
+# backend/app/services/hospital_registry.py
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import settings
+from app.models.models import Hospital
+from app.schemas.schemas import HospitalResponse
+from app.services.log import get_logger
+
+log = get_logger("hospital_registry")
+
+# In-process copy of the (small, rarely changing) hospitals table
+_hospitals: Dict[int, HospitalResponse] = {}
+_loaded_at: Optional[float] = None
+
+# Callbacks run after a reload that changed the table, e.g. to rebuild
+# derived indexes; _notified is the table as they last saw it
+_listeners: List[Callable[[List[HospitalResponse]], None]] = []
+_notified: Dict[int, HospitalResponse] = {}
+
+def load_hospitals(db: Session) -> int:
+    """
+    (Re)load every hospital into the registry and notify listeners if any
+    hospital was added, changed or removed since they were last notified.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of hospitals loaded
+    """
+    global _hospitals, _loaded_at, _notified
+    rows = db.query(Hospital).order_by(Hospital.id).all()
+    _hospitals = {h.id: HospitalResponse.model_validate(h) for h in rows}
+    _loaded_at = time.monotonic()
+    if _hospitals == _notified:
+        return len(_hospitals)
+    _notified = dict(_hospitals)
+    snapshot = list(_hospitals.values())
+    for listener in _listeners:
+        try:
+            listener(snapshot)
+        except Exception as e:
+            log.exception("hospital_registry.listener_failed", "Hospital registry listener failed", error=str(e))
+    return len(_hospitals)
+
+def invalidate_hospitals() -> None:
+    """Mark the registry stale; the next lookup with a session reloads it"""
+    global _loaded_at
+    _loaded_at = None
+
+def _is_stale() -> bool:
+    return _loaded_at is None or time.monotonic() - _loaded_at > settings.HOSPITAL_REGISTRY_TTL_SECONDS
+
+def _ensure_fresh(db: Optional[Session]) -> None:
+    # Other workers' writes become visible after HOSPITAL_REGISTRY_TTL_SECONDS
+    if db is not None and _is_stale():
+        load_hospitals(db)
+
+def get_hospital(hospital_id: int, db: Optional[Session] = None) -> Optional[HospitalResponse]:
+    """
+    Look up a hospital by ID without touching the database when cached.
+
+    Args:
+        hospital_id: ID of the hospital
+        db: Optional session used to reload a stale registry or resolve a miss
+            (e.g. a hospital created by another worker)
+
+    Returns:
+        Hospital snapshot, or None if it does not exist
+    """
+    _ensure_fresh(db)
+    hospital = _hospitals.get(hospital_id)
+    if hospital is None and db is not None:
+        row = db.query(Hospital).filter(Hospital.id == hospital_id).first()
+        if row is not None:
+            hospital = _hospitals[hospital_id] = HospitalResponse.model_validate(row)
+    return hospital
+
+def list_hospitals(db: Optional[Session] = None) -> List[HospitalResponse]:
+    """Return all cached hospitals ordered by ID"""
+    _ensure_fresh(db)
+    return sorted(_hospitals.values(), key=lambda h: h.id)
+
+def on_hospitals_changed(listener: Callable[[List[HospitalResponse]], None]) -> None:
+    """Register a callback invoked with the full hospital list whenever it changes"""
+    _listeners.append(listener)
+    if _loaded_at is not None:
+        listener(list(_hospitals.values()))
+
+__all__ = [
+    "load_hospitals",
+    "invalidate_hospitals",
+    "get_hospital",
+    "list_hospitals",
+    "on_hospitals_changed",
+]
@@ -0,0 +1,207 @@
+# backend/app/services/idempotency.py
+import asyncio
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
+
+from app.database import settings
+from app.services.cache import get_redis_client
+from app.services.log import get_logger
+
+log = get_logger("idempotency")
+
+KEY_PREFIX = "idem"
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = "Idempotent-Replayed"
+
+# The pending marker is owned by the execution that set it (a random token
+# in the value): it is renewed while the handler runs, and only its owner
+# may replace it with the result or delete it.
+# KEYS[1] key; ARGV pending marker, ttl (ms)
+RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+# KEYS[1] key; ARGV pending marker, result record, ttl (s)
+COMPLETE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+  return 1
+end
+return 0
+"""
+# KEYS[1] key; ARGV pending marker
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Completion signals for keys being executed by this worker, so local
+# duplicates wake up immediately instead of polling Redis
+_in_flight: Dict[str, asyncio.Event] = {}
+
+def _fingerprint(payload: Any) -> str:
+    raw = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _replay(record: dict) -> JSONResponse:
+    return JSONResponse(
+        status_code=record["status"],
+        content=record["body"],
+        headers={REPLAY_HEADER: "true"},
+    )
+
+async def _wait_for_record(client, redis_key: str, deadline: float) -> Optional[dict]:
+    """Wait until the in-progress execution for `redis_key` finishes or disappears"""
+    delay = 0.01
+    while time.monotonic() < deadline:
+        event = _in_flight.get(redis_key)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=max(deadline - time.monotonic(), 0))
+            except asyncio.TimeoutError:
+                break
+        else:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+
+        raw = await client.get(redis_key)
+        if raw is None:
+            return None
+        record = json.loads(raw)
+        if record["state"] == "done":
+            return record
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed. Retry later.",
+    )
+
+async def _keep_pending(client, redis_key: str, pending: str) -> None:
+    """Extend the pending marker every third of IDEMPOTENCY_LOCK_SECONDS until cancelled"""
+    renew = client.register_script(RENEW_LUA)
+    ttl_ms = int(settings.IDEMPOTENCY_LOCK_SECONDS * 1000)
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_LOCK_SECONDS / 3)
+        try:
+            if not await renew(keys=[redis_key], args=[pending, ttl_ms]):
+                log.warning("idempotency.lock_lost", "Idempotency marker expired or replaced while running", key=redis_key)
+                return
+        except Exception as e:
+            log.error("cache.error", "Error renewing idempotency key", error=str(e))
+
+async def run_idempotent(
+    idempotency_key: Optional[str],
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Awaitable[Any]],
+    status_code: int = status.HTTP_200_OK,
+    serialize: Callable[[Any], Any] = lambda result: result,
+) -> Any:
+    """
+    Execute `handler` at most once per (scope, Idempotency-Key).
+
+    The first request stores a "pending" marker with SET NX (renewed while
+    the handler runs, so a slow handler keeps it), runs the handler and
+    replaces its own marker with the serialized response for
+    IDEMPOTENCY_TTL_SECONDS. Duplicates
+    get the stored response replayed (with an `Idempotent-Replayed` header);
+    concurrent duplicates wait for the first execution to finish instead of
+    running in parallel. Failed executions are forgotten so a retry can run.
+
+    Args:
+        idempotency_key: Value of the Idempotency-Key header (None disables idempotency)
+        scope: Endpoint name, keeps keys of different endpoints apart
+        payload: Request body; reusing a key with a different body is rejected (422)
+        handler: Zero-argument coroutine function performing the write
+        status_code: Status code of a successful response
+        serialize: Converts the handler result into the response body
+
+    Returns:
+        The handler result, or a JSONResponse replaying a stored result
+    """
+    if idempotency_key is None:
+        return await handler()
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters",
+        )
+
+    try:
+        client = await get_redis_client()
+    except Exception as e:
+        log.warning("idempotency.unavailable", "Idempotency store unavailable, executing without it", error=str(e))
+        return await handler()
+
+    redis_key = f"{KEY_PREFIX}:{scope}:{idempotency_key}"
+    fingerprint = _fingerprint(payload)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+
+    # The client object outlives a Redis outage, so its commands fail instead
+    # of get_redis_client(); fall back the same way
+    try:
+        while True:
+            pending = json.dumps({"state": "pending", "fp": fingerprint, "owner": uuid.uuid4().hex})
+            if await client.set(redis_key, pending, nx=True, ex=settings.IDEMPOTENCY_LOCK_SECONDS):
+                break
+
+            raw = await client.get(redis_key)
+            if raw is None:
+                continue  # previous attempt failed or expired; try to acquire again
+            record = json.loads(raw)
+            if record["fp"] != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used with a different request body",
+                )
+            if record["state"] == "pending":
+                record = await _wait_for_record(client, redis_key, deadline)
+                if record is None:
+                    continue
+            return _replay(record)
+    except (RedisError, ConnectionError, OSError) as e:
+        log.warning("idempotency.unavailable", "Idempotency store unavailable, executing without it", error=str(e))
+        return await handler()
+
+    event = _in_flight[redis_key] = asyncio.Event()
+    keeper = asyncio.create_task(_keep_pending(client, redis_key, pending))
+    try:
+        try:
+            result = await handler()
+        except BaseException:
+            keeper.cancel()
+            try:
+                await client.register_script(RELEASE_LUA)(keys=[redis_key], args=[pending])
+            except Exception as e:
+                log.error("cache.error", "Error releasing idempotency key", error=str(e))
+            raise
+        keeper.cancel()
+        body = jsonable_encoder(serialize(result))
+        record = json.dumps({"state": "done", "fp": fingerprint, "status": status_code, "body": body})
+        try:
+            stored = await client.register_script(COMPLETE_LUA)(
+                keys=[redis_key], args=[pending, record, settings.IDEMPOTENCY_TTL_SECONDS],
+            )
+            if not stored:
+                log.warning("idempotency.lock_lost", "Idempotency marker replaced while running; result not stored",
+                            key=redis_key)
+        except Exception as e:
+            log.error("cache.error", "Error storing idempotent response", error=str(e))
+        return result
+    finally:
+        keeper.cancel()
+        _in_flight.pop(redis_key, None)
+        event.set()
+
+__all__ = ["REPLAY_HEADER", "run_idempotent"]
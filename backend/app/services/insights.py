@@ -0,0 +1,252 @@
+# backend/app/services/insights.py
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+
+from app.database.database import SessionLocal
+from app.models.models import ArchivedRequest, Donor, Hospital, Request
+from app.services.cache import get_redis_client
+from app.services.log import get_logger
+
+log = get_logger("insights")
+
+# Redis hashes holding the dashboard counters (field -> count)
+REQUESTS_BY_STATUS = "insights:requests:status"
+REQUESTS_BY_URGENCY = "insights:requests:urgency"
+REQUESTS_BY_BLOOD_TYPE = "insights:requests:blood_type"
+REQUESTS_BY_HOSPITAL = "insights:requests:hospital"
+DONORS_AVAILABLE = "insights:donors:available"      # available donors per blood group
+DONORS_TOTAL = "insights:donors:total"              # all donors per blood group
+META_KEY = "insights:meta"                          # hospitals count + reconciled_at
+
+COUNTER_KEYS = (
+    REQUESTS_BY_STATUS,
+    REQUESTS_BY_URGENCY,
+    REQUESTS_BY_BLOOD_TYPE,
+    REQUESTS_BY_HOSPITAL,
+    DONORS_AVAILABLE,
+    DONORS_TOTAL,
+)
+
+def _value(v) -> str:
+    """Enum members are stored by value ("Pending"), everything else as str"""
+    return str(getattr(v, "value", v))
+
+# ============ Incremental Updates (write paths) ============
+
+async def record_request_created(hospital_id: int, blood_type: str, urgency, status) -> bool:
+    """
+    Count a newly created request in every request breakdown.
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        client = await get_redis_client()
+        pipe = client.pipeline()
+        pipe.hincrby(REQUESTS_BY_STATUS, _value(status), 1)
+        pipe.hincrby(REQUESTS_BY_URGENCY, _value(urgency), 1)
+        pipe.hincrby(REQUESTS_BY_BLOOD_TYPE, blood_type, 1)
+        pipe.hincrby(REQUESTS_BY_HOSPITAL, str(hospital_id), 1)
+        await pipe.execute()
+        return True
+    except Exception as e:
+        log.error("cache.error", "Error recording request in insights", error=str(e))
+        return False
+
+async def record_request_status_change(old_status, new_status) -> bool:
+    """
+    Move one request from `old_status` to `new_status` in the status breakdown.
+
+    Returns:
+        True if successful (or nothing changed), False otherwise
+    """
+    if _value(old_status) == _value(new_status):
+        return True
+    try:
+        client = await get_redis_client()
+        pipe = client.pipeline()
+        pipe.hincrby(REQUESTS_BY_STATUS, _value(old_status), -1)
+        pipe.hincrby(REQUESTS_BY_STATUS, _value(new_status), 1)
+        await pipe.execute()
+        return True
+    except Exception as e:
+        log.error("cache.error", "Error recording request status change in insights", error=str(e))
+        return False
+
+async def record_donor_change(
+    before: Optional[Tuple[str, bool]],
+    after: Tuple[str, bool],
+) -> bool:
+    """
+    Apply a donor create/update to the donor counters.
+
+    Args:
+        before: (blood_group, available) before the write, or None for a new donor
+        after: (blood_group, available) after the write
+
+    Returns:
+        True if successful (or nothing changed), False otherwise
+    """
+    if before == after:
+        return True
+    try:
+        client = await get_redis_client()
+        pipe = client.pipeline()
+        if before is not None:
+            pipe.hincrby(DONORS_TOTAL, before[0], -1)
+            if before[1]:
+                pipe.hincrby(DONORS_AVAILABLE, before[0], -1)
+        pipe.hincrby(DONORS_TOTAL, after[0], 1)
+        if after[1]:
+            pipe.hincrby(DONORS_AVAILABLE, after[0], 1)
+        await pipe.execute()
+        return True
+    except Exception as e:
+        log.error("cache.error", "Error recording donor change in insights", error=str(e))
+        return False
+
+async def record_hospital_change(delta: int) -> bool:
+    """
+    Adjust the hospital count by `delta` (+1 on create, -1 on delete).
+
+    Returns:
+        True if successful, False otherwise
+    """
+    try:
+        client = await get_redis_client()
+        await client.hincrby(META_KEY, "hospitals", delta)
+        return True
+    except Exception as e:
+        log.error("cache.error", "Error recording hospital change in insights", error=str(e))
+        return False
+
+# ============ Reconciliation (source of truth: SQL) ============
+
+def compute_insights_from_db(db) -> Dict[str, Dict[str, int]]:
+    """
+    Aggregate every counter straight from SQL with GROUP BY queries.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Mapping of counter key -> {field: count}, plus META_KEY -> {"hospitals": n}
+    """
+    def grouped(column, *filters) -> Dict[str, int]:
+        q = db.query(column, func.count()).filter(*filters).group_by(column)
+        return {_value(k): int(n) for k, n in q.all() if k is not None}
+
+    def requests_grouped(attr: str) -> Dict[str, int]:
+        # Archived requests still count towards the request breakdowns
+        counts = grouped(getattr(Request, attr))
+        for k, n in grouped(getattr(ArchivedRequest, attr)).items():
+            counts[k] = counts.get(k, 0) + n
+        return counts
+
+    return {
+        REQUESTS_BY_STATUS: requests_grouped("status"),
+        REQUESTS_BY_URGENCY: requests_grouped("urgency"),
+        REQUESTS_BY_BLOOD_TYPE: requests_grouped("blood_type"),
+        REQUESTS_BY_HOSPITAL: requests_grouped("hospital_id"),
+        DONORS_AVAILABLE: grouped(Donor.blood_group, Donor.available == True),
+        DONORS_TOTAL: grouped(Donor.blood_group),
+        META_KEY: {"hospitals": int(db.query(func.count(Hospital.id)).scalar() or 0)},
+    }
+
+def _compute_with_new_session() -> Dict[str, Dict[str, int]]:
+    db = SessionLocal()
+    try:
+        return compute_insights_from_db(db)
+    finally:
+        db.close()
+
+async def reconcile_insights() -> Dict[str, Dict[str, int]]:
+    """
+    Rebuild all counters from SQL and atomically replace the Redis hashes.
+
+    Increments that land between the SQL snapshot and the swap may be lost or
+    double counted; the next reconciliation corrects them.
+
+    Returns:
+        The freshly computed counters
+    """
+    # GROUP BY queries are blocking; keep them off the event loop
+    counts = await asyncio.to_thread(_compute_with_new_session)
+    counts[META_KEY]["reconciled_at"] = int(time.time())
+
+    client = await get_redis_client()
+    pipe = client.pipeline(transaction=True)
+    for key in (*COUNTER_KEYS, META_KEY):
+        pipe.delete(key)
+        if counts[key]:
+            pipe.hset(key, mapping=counts[key])
+    await pipe.execute()
+    return counts
+
+# ============ Read Path ============
+
+def _as_ints(raw: Dict[str, str]) -> Dict[str, int]:
+    return {k: int(v) for k, v in raw.items() if int(v) != 0}
+
+def _shape(counts: Dict[str, Dict[str, int]]) -> dict:
+    by_status = counts.get(REQUESTS_BY_STATUS, {})
+    available = counts.get(DONORS_AVAILABLE, {})
+    total = counts.get(DONORS_TOTAL, {})
+    meta = counts.get(META_KEY, {})
+    return {
+        "requests": {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "by_urgency": counts.get(REQUESTS_BY_URGENCY, {}),
+            "by_blood_type": counts.get(REQUESTS_BY_BLOOD_TYPE, {}),
+            "by_hospital": counts.get(REQUESTS_BY_HOSPITAL, {}),
+        },
+        "donors": {
+            "total": sum(total.values()),
+            "available": sum(available.values()),
+            "available_by_blood_group": available,
+        },
+        "hospitals": int(meta.get("hospitals", 0)),
+        "reconciled_at": int(meta["reconciled_at"]) if meta.get("reconciled_at") else None,
+    }
+
+async def get_insights() -> dict:
+    """
+    Read all dashboard counters with a single Redis round-trip.
+
+    Falls back to a reconciliation when the counters have never been built,
+    and to a direct SQL aggregation when Redis is unreachable.
+
+    Returns:
+        Nested dict of request, donor and hospital counts
+    """
+    try:
+        client = await get_redis_client()
+        pipe = client.pipeline()
+        for key in (*COUNTER_KEYS, META_KEY):
+            pipe.hgetall(key)
+        results = await pipe.execute()
+    except Exception as e:
+        log.warning("insights.fallback", "Insights counters unavailable, aggregating from SQL", error=str(e))
+        return _shape(await asyncio.to_thread(_compute_with_new_session))
+
+    meta = results[-1]
+    if not meta.get("reconciled_at"):
+        return _shape(await reconcile_insights())
+
+    counts = {key: _as_ints(raw) for key, raw in zip(COUNTER_KEYS, results[:-1])}
+    counts[META_KEY] = meta
+    return _shape(counts)
+
+__all__ = [
+    "record_request_created",
+    "record_request_status_change",
+    "record_donor_change",
+    "record_hospital_change",
+    "compute_insights_from_db",
+    "reconcile_insights",
+    "get_insights",
+]
@@ -0,0 +1,205 @@
+# backend/app/services/log.py
+# Structured, sampled, queued logging.
+#
+# Every record names an event type ("socket.broadcast", "cache.error", ...)
+# and carries its data as fields:
+#
+#   log = get_logger("realtime")
+#   log.info("socket.broadcast", "Broadcasted new request", request_id=7)
+#
+# Below WARNING, an event type can be sampled (LOG_SAMPLE_RATES, e.g.
+# "socket.broadcast=0.01"); the decision is made before a LogRecord is
+# built. Warnings and errors are never sampled.
+#
+# configure_logging() routes the "bloodlink" logger tree through a bounded
+# queue to a listener thread, so the event loop only builds the record and
+# enqueues it; formatting (JSON or text) and the write to stderr happen on
+# the listener thread. When the queue is full (the writer can't keep up)
+# records are dropped and counted instead of blocking the loop. Before
+# configure_logging() runs (scripts, tests) records go through the standard
+# logging defaults.
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+ROOT = "bloodlink"
+
+# event type -> fraction of records kept (below WARNING)
+_sample_rates: Dict[str, float] = {}
+
+class _Stats:
+    sampled_out: Dict[str, int] = {}
+    dropped = 0
+
+_stats = _Stats()
+_listener: Optional[QueueListener] = None
+_trace_id = lambda: None  # app.services.tracing.current_trace_id once configured
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """Parse "event=rate,event=rate" (rates 0..1)"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+class EventLogger:
+    """Logger wrapper taking an event type and structured fields on every call"""
+    __slots__ = ("logger",)
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def _log(self, level: int, event: str, message: str, fields: dict, exc_info=None) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+        if level < logging.WARNING:
+            rate = _sample_rates.get(event)
+            if rate is not None and rate < 1.0 and (rate <= 0.0 or random.random() >= rate):
+                _stats.sampled_out[event] = _stats.sampled_out.get(event, 0) + 1
+                return
+        self.logger.log(level, message, exc_info=exc_info, extra={"event": event, "fields": fields})
+
+    def debug(self, event: str, message: str, **fields) -> None:
+        self._log(logging.DEBUG, event, message, fields)
+
+    def info(self, event: str, message: str, **fields) -> None:
+        self._log(logging.INFO, event, message, fields)
+
+    def warning(self, event: str, message: str, **fields) -> None:
+        self._log(logging.WARNING, event, message, fields)
+
+    def error(self, event: str, message: str, **fields) -> None:
+        self._log(logging.ERROR, event, message, fields)
+
+    def exception(self, event: str, message: str, **fields) -> None:
+        """ERROR with the current exception's traceback"""
+        self._log(logging.ERROR, event, message, fields, exc_info=True)
+
+def get_logger(name: str) -> EventLogger:
+    """EventLogger for `bloodlink.<name>`"""
+    return EventLogger(logging.getLogger(f"{ROOT}.{name}"))
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, msg, fields..., trace_id"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        trace_id = getattr(record, "trace_id", None)
+        return f"{line} trace_id={trace_id}" if trace_id else line
+
+class _BoundedQueueHandler(QueueHandler):
+    """QueueHandler that defers formatting to the listener and drops when full"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Runs on the caller's thread: capture what depends on its context
+        # (the trace id) and nothing else
+        record.trace_id = _trace_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _stats.dropped += 1
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # Wait for room rather than fail when stopping with a full queue
+        self.queue.put(self._sentinel)
+
+def _add_trace_id(record: logging.LogRecord) -> bool:
+    record.trace_id = _trace_id()
+    return True
+
+def configure_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    sample_rates: str = "",
+    queue_size: int = 10000,
+    stream=None,
+) -> None:
+    """
+    Send the "bloodlink" loggers (and socketio/engineio) to `stream`
+    (default stderr), through a queue of `queue_size` records or, with
+    queue_size=0, synchronously.
+    """
+    global _listener, _sample_rates, _trace_id
+    from app.services.tracing import current_trace_id
+
+    shutdown_logging()
+    _trace_id = current_trace_id
+    # Skip LogRecord fields no formatter here uses; the caller's file/line
+    # lookup walks the stack on every record (see "Optimization" in the
+    # logging HOWTO)
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    _sample_rates = parse_sample_rates(sample_rates)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    if queue_size > 0:
+        handler = _BoundedQueueHandler(queue.Queue(queue_size))
+        _listener = _Listener(handler.queue, output)
+        _listener.start()
+    else:
+        handler = output
+        handler.addFilter(_add_trace_id)
+
+    for name, logger_level in ((ROOT, level.upper()), ("socketio", "WARNING"), ("engineio", "WARNING")):
+        logger = logging.getLogger(name)
+        logger.handlers[:] = [handler]
+        logger.setLevel(logger_level)
+        logger.propagate = False
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def log_stats() -> dict:
+    """Records skipped by sampling (per event type) and dropped on a full queue"""
+    return {"sampled_out": dict(_stats.sampled_out), "dropped": _stats.dropped}
+
+__all__ = [
+    "EventLogger",
+    "get_logger",
+    "configure_logging",
+    "shutdown_logging",
+    "log_stats",
+    "parse_sample_rates",
+]
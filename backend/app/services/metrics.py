@@ -0,0 +1,311 @@
+# backend/app/services/metrics.py
+# Prometheus metrics for the API process.
+#
+# Hot-path instrumentation is limited to a perf_counter() pair and one
+# histogram observe (a few microseconds); gauges that can be read from
+# existing state (socket rooms, DB pool) are computed at scrape time by
+# collectors instead of being updated on every event.
+#
+# Exposed at GET /metrics (see app.main).
+import time
+from typing import Callable
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from app.services.log import log_stats
+from app.services.timing import record_phase
+
+# *_created timestamp series double the exposition size for no dashboard use
+disable_created_metrics()
+
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0)
+JOB_BUCKETS = (0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0)
+
+# ============ Metric Definitions ============
+
+HTTP_REQUESTS = Counter(
+    "bloodlink_http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "bloodlink_http_request_duration_seconds", "HTTP request latency (until the response body is sent)",
+    ["method", "route"],
+)
+HTTP_IN_FLIGHT = Gauge("bloodlink_http_requests_in_flight", "HTTP requests currently being handled")
+
+DB_QUERIES = Counter("bloodlink_db_queries_total", "SQL statements executed", ["statement"])
+DB_QUERY_ERRORS = Counter("bloodlink_db_query_errors_total", "SQL statements that raised", ["statement"])
+DB_QUERY_LATENCY = Histogram(
+    "bloodlink_db_query_duration_seconds", "SQL statement execution time", ["statement"], buckets=FAST_BUCKETS
+)
+DB_POOL_WAIT = Histogram(
+    "bloodlink_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled DB connection", buckets=FAST_BUCKETS
+)
+
+REDIS_LATENCY = Histogram(
+    "bloodlink_redis_command_duration_seconds", "Redis command round-trip time", ["command"], buckets=FAST_BUCKETS
+)
+REDIS_ERRORS = Counter("bloodlink_redis_command_errors_total", "Redis commands that raised", ["command"])
+
+NOTIFICATIONS_IN_FLIGHT = Gauge(
+    "bloodlink_notifications_in_flight",
+    "Donor emails still to be sent by /donors/notify/by-location requests in progress (sent inline, not queued)",
+)
+NOTIFICATIONS_SENT = Counter(
+    "bloodlink_notifications_total", "Donor notifications attempted", ["channel", "outcome"]
+)
+
+LLM_LATENCY = Histogram(
+    "bloodlink_llm_call_duration_seconds", "LLM call time including the wait for a concurrency slot",
+    ["operation", "outcome"], buckets=LLM_BUCKETS,
+)
+
+ADMISSION_REJECTED = Counter(
+    "bloodlink_admission_rejected_total", "Requests refused by rate limiting or load shedding", ["priority", "reason"]
+)
+EVENT_LOOP_LAG = Gauge("bloodlink_event_loop_lag_seconds", "Latest event-loop lag sample (see ratelimit)")
+
+JOB_DURATION = Histogram(
+    "bloodlink_job_duration_seconds", "Scheduled job run time", ["job", "outcome"], buckets=JOB_BUCKETS
+)
+JOB_LAST_SUCCESS = Gauge(
+    "bloodlink_job_last_success_timestamp_seconds", "Unix time the job last finished without error", ["job"]
+)
+SCHEDULER_LEADER = Gauge("bloodlink_scheduler_leader", "1 while this worker holds the scheduler leader lock")
+
+# ============ HTTP ============
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware task/queue overhead) that
+    records request count and latency per route template, so /donors/{donor_id}
+    is one series rather than one per id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # labelled children, resolved once per (method, route[, status])
+        self._latency = {}
+        self._requests = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # FastAPI stores the matched route in the (shared) scope
+            route = scope.get("route")
+            path = getattr(route, "path", None) or scope.get("root_path") or "unmatched"
+            key = (scope["method"], path)
+            latency = self._latency.get(key)
+            if latency is None:
+                latency = self._latency[key] = HTTP_LATENCY.labels(*key)
+            latency.observe(time.perf_counter() - start)
+            key += (status_code,)
+            requests = self._requests.get(key)
+            if requests is None:
+                requests = self._requests[key] = HTTP_REQUESTS.labels(*key)
+            requests.inc()
+
+def render_metrics():
+    """(body, content_type) of the current exposition"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+# ============ Database ============
+
+# Smoothed recent checkout wait, for load shedding: (seconds, updated at)
+_pool_wait = [0.0, 0.0]
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            DB_POOL_WAIT.observe(waited)
+            _pool_wait[0] = 0.8 * _pool_wait[0] + 0.2 * waited
+            _pool_wait[1] = start
+
+def recent_pool_wait(max_age_s: float = 5.0) -> float:
+    """Smoothed DB pool checkout wait in seconds (0 when there were no checkouts lately)"""
+    seconds, updated = _pool_wait
+    return seconds if time.perf_counter() - updated <= max_age_s else 0.0
+
+def _statement_kind(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+class _PoolCollector:
+    """Pool size / checked-out / overflow gauges, read at scrape time"""
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def collect(self):
+        pool = self.engine.pool
+        for name, doc, getter in (
+            ("bloodlink_db_pool_size", "Configured DB pool size", "size"),
+            ("bloodlink_db_pool_checked_out", "DB connections currently checked out", "checkedout"),
+            ("bloodlink_db_pool_overflow", "DB connections open beyond pool_size", "overflow"),
+        ):
+            fn = getattr(pool, getter, None)
+            if fn is not None:
+                # QueuePool.overflow() counts up from -pool_size
+                yield GaugeMetricFamily(name, doc, value=max(fn(), 0))
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach query count/latency listeners and pool gauges to an engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        kind = _statement_kind(statement)
+        DB_QUERIES.labels(kind).inc()
+        DB_QUERY_LATENCY.labels(kind).observe(elapsed)
+        record_phase("sql", elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("query_start") if context.connection is not None else None
+        if stack:
+            stack.pop()
+        DB_QUERY_ERRORS.labels(_statement_kind(context.statement or "")).inc()
+
+    REGISTRY.register(_PoolCollector(engine))
+
+# ============ Redis ============
+
+def instrument_redis(client):
+    """
+    Time every command the client sends. Pipelines are timed as a whole
+    under the command label PIPELINE.
+    """
+    execute_command = client.execute_command
+    make_pipeline = client.pipeline
+
+    async def timed_execute_command(*args, **options):
+        command = str(args[0]).upper() if args else "UNKNOWN"
+        start = time.perf_counter()
+        try:
+            return await execute_command(*args, **options)
+        except Exception:
+            REDIS_ERRORS.labels(command).inc()
+            raise
+        finally:
+            REDIS_LATENCY.labels(command).observe(time.perf_counter() - start)
+
+    def timed_pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def timed_execute(*a, **k):
+            start = time.perf_counter()
+            try:
+                return await execute(*a, **k)
+            except Exception:
+                REDIS_ERRORS.labels("PIPELINE").inc()
+                raise
+            finally:
+                REDIS_LATENCY.labels("PIPELINE").observe(time.perf_counter() - start)
+
+        pipe.execute = timed_execute
+        return pipe
+
+    client.execute_command = timed_execute_command
+    client.pipeline = timed_pipeline
+    return client
+
+# ============ Socket.IO ============
+
+class _SocketRoomCollector:
+    """Connected Socket.IO clients, total and per named room, read at scrape time"""
+
+    def __init__(self, rooms: Callable[[], dict]):
+        self.rooms = rooms
+
+    def collect(self):
+        family = GaugeMetricFamily(
+            "bloodlink_socket_clients", "Connected Socket.IO clients per room ('_all' = every client)",
+            labels=["room"],
+        )
+        for room, members in self.rooms().items():
+            if room is None:
+                family.add_metric(["_all"], len(members))
+            elif room not in members:   # skip each client's private sid room
+                family.add_metric([str(room)], len(members))
+        yield family
+
+def register_socket_rooms(rooms: Callable[[], dict]) -> None:
+    """
+    Expose client counts per Socket.IO room; `rooms` returns the default
+    namespace's room map (the server may not be built yet)
+    """
+    REGISTRY.register(_SocketRoomCollector(rooms))
+
+# ============ Logging ============
+
+class _LogCollector:
+    """Log records not written: sampled out per event type, or dropped on a full queue"""
+
+    def collect(self):
+        stats = log_stats()
+        family = CounterMetricFamily(
+            "bloodlink_log_records_skipped", "Log records not written", labels=["reason", "event"],
+        )
+        for event, count in stats["sampled_out"].items():
+            family.add_metric(["sampled", event], count)
+        family.add_metric(["queue_full", ""], stats["dropped"])
+        yield family
+
+REGISTRY.register(_LogCollector())
+
+__all__ = [
+    "MetricsMiddleware",
+    "TimedQueuePool",
+    "instrument_engine",
+    "instrument_redis",
+    "register_socket_rooms",
+    "render_metrics",
+    "recent_pool_wait",
+    "ADMISSION_REJECTED",
+    "EVENT_LOOP_LAG",
+    "JOB_DURATION",
+    "JOB_LAST_SUCCESS",
+    "SCHEDULER_LEADER",
+    "NOTIFICATIONS_IN_FLIGHT",
+    "NOTIFICATIONS_SENT",
+    "LLM_LATENCY",
+]
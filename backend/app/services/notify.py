@@ -1,19 +1,41 @@
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+import time
 from app.database import settings
+from app.services.startup import record_lazy_load
+from app.services.tracing import span
+from app.services.log import get_logger
+
+log = get_logger("notify")
+
+_sendgrid = None
+
+def _load_sendgrid():
+    """Import the SendGrid SDK on first use (keeps it off the startup path)"""
+    global _sendgrid
+    if _sendgrid is None:
+        start = time.perf_counter()
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail
+        _sendgrid = (SendGridAPIClient, Mail)
+        record_lazy_load("sendgrid", time.perf_counter() - start)
+    return _sendgrid
 
 def send_email(to_email: str, subject: str, content: str):
     """
     Send email using SendGrid transactional email API
+    (EMAIL_PROVIDER=stub accepts every message without sending it)
     """
+    if settings.EMAIL_PROVIDER == "stub":
+        return True
+
     if not settings.SENDGRID_API_KEY:
-        print("⚠️ No SENDGRID_API_KEY found in settings. Skipping email send.")
+        log.warning("email.skipped", "No SENDGRID_API_KEY found in settings. Skipping email send.")
         return False
 
     if not settings.EMAIL_FROM:
-        print("⚠️ No EMAIL_FROM found in settings. Skipping email send.")
+        log.warning("email.skipped", "No EMAIL_FROM found in settings. Skipping email send.")
         return False
 
+    SendGridAPIClient, Mail = _load_sendgrid()
     message = Mail(
         from_email=settings.EMAIL_FROM,
         to_emails=to_email,
@@ -22,10 +44,13 @@ def send_email(to_email: str, subject: str, content: str):
     )
 
     try:
-        sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        response = sg.send(message)
-        print(f"✅ Email sent to {to_email} ({response.status_code})")
+        with span("email.send", {"email.provider": "sendgrid"}, kind="CLIENT") as s:
+            sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
+            response = sg.send(message)
+            if s is not None:
+                s.set_attribute("http.status_code", response.status_code)
+        log.info("email.sent", "Email sent", status_code=response.status_code)
         return True
     except Exception as e:
-        print(f"❌ Error sending email: {e}")
+        log.error("email.failed", "Error sending email", error=str(e))
         return False
@@ -0,0 +1,201 @@
+# backend/app/services/query_audit.py
+# Per-request SQL auditing: slow query log, N+1 detection and a
+# per-endpoint statement report.
+#
+# QueryAuditMiddleware gives each HTTP request a statement tally in a
+# context variable; engine cursor events add every statement to it under
+# its "shape" (the SQL text with expanded IN lists collapsed, since the
+# statements are already parameterized). A shape repeated
+# N_PLUS_ONE_THRESHOLD times in one request is the N+1 pattern - a lazy
+# relationship load per row - and is reported according to
+# QUERY_AUDIT_MODE:
+#
+#   off   - count statements and log slow ones only
+#   warn  - also log a warning per offending request, send X-Query-Count
+#           and serve the per-endpoint report at GET /debug/queries
+#   raise - as warn, but raise NPlusOneError from the offending statement
+#           (development and CI: the request fails with a 500)
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.services.log import get_logger
+
+log = get_logger("queries")
+
+MODES = ("off", "warn", "raise")
+
+# "IN (?, ?, ?)" / "IN (%(id_1_1)s, %(id_1_2)s)" -> "IN (?)"
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:\?|%\([^)]*\)s|:\w+|\$\d+)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+class NPlusOneError(RuntimeError):
+    """Raised in QUERY_AUDIT_MODE=raise when a request repeats one query shape too often"""
+
+class _Config:
+    mode = "off"
+    slow_ms = 100.0
+    threshold = 10
+
+config = _Config()
+
+class RequestQueries:
+    """Statement tally of one HTTP request"""
+    __slots__ = ("scope", "count", "total_ms", "shapes", "flagged")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Counter = Counter()
+        self.flagged: Dict[str, int] = {}
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("query_audit", default=None)
+
+# route -> aggregate, for the per-endpoint report
+_report: Dict[str, dict] = {}
+
+def statement_shape(statement: str) -> str:
+    """Normalize a parameterized statement so per-row repeats compare equal"""
+    return _IN_LIST.sub("IN (?)", _WHITESPACE.sub(" ", statement.strip()))
+
+def _route(scope) -> str:
+    route = scope.get("route") if scope is not None else None
+    return getattr(route, "path", None) or (scope or {}).get("path", "-")
+
+def _report_route(scope) -> str:
+    # Route template only: unmatched paths (404s, scanners) share one bucket,
+    # so the report stays bounded
+    route = scope.get("route") if scope is not None else None
+    return getattr(route, "path", None) or (scope or {}).get("root_path") or "unmatched"
+
+def _short(value, limit: int = 300) -> str:
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+def audit_engine(engine: Engine, mode: str = "off", slow_ms: float = 100, threshold: int = 10) -> None:
+    """Attach the slow query log and per-request statement tally to an engine"""
+    if mode not in MODES:
+        raise ValueError(f"QUERY_AUDIT_MODE must be one of {MODES}, got {mode!r}")
+    config.mode, config.slow_ms, config.threshold = mode, slow_ms, threshold
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("audit_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["audit_start"].pop()) * 1000
+        queries = _current.get()
+        if elapsed_ms >= config.slow_ms:
+            log.warning(
+                "slow_query", "Slow query",
+                ms=round(elapsed_ms, 2),
+                statement=_WHITESPACE.sub(" ", statement.strip())[:2000],
+                parameters=_short(parameters),
+                route=_route(queries.scope) if queries is not None else None,
+            )
+        if queries is None:
+            return
+        queries.count += 1
+        queries.total_ms += elapsed_ms
+        if config.mode == "off":
+            return
+        shape = statement_shape(statement)
+        queries.shapes[shape] += 1
+        repeats = queries.shapes[shape]
+        if repeats >= config.threshold:
+            queries.flagged[shape] = repeats
+            if config.mode == "raise" and repeats == config.threshold:
+                raise NPlusOneError(
+                    f"{_route(queries.scope)} ran the same query {repeats} times "
+                    f"(N+1? eager-load or batch it): {shape[:300]}"
+                )
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("audit_start") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+def _record(queries: RequestQueries, method: str) -> None:
+    key = f"{method} {_report_route(queries.scope)}"
+    entry = _report.get(key)
+    if entry is None:
+        entry = _report[key] = {
+            "requests": 0, "statements": 0, "max_statements": 0, "sql_ms": 0.0,
+            "n_plus_one_requests": 0, "repeated_shapes": Counter(),
+        }
+    entry["requests"] += 1
+    entry["statements"] += queries.count
+    entry["max_statements"] = max(entry["max_statements"], queries.count)
+    entry["sql_ms"] += queries.total_ms
+    if queries.flagged:
+        entry["n_plus_one_requests"] += 1
+        for shape, repeats in queries.flagged.items():
+            entry["repeated_shapes"][shape] = max(entry["repeated_shapes"][shape], repeats)
+
+def query_report() -> dict:
+    """Per-endpoint statement counts, worst first"""
+    rows = {}
+    for key, e in sorted(_report.items(), key=lambda kv: -kv[1]["statements"] / kv[1]["requests"]):
+        rows[key] = {
+            "requests": e["requests"],
+            "avg_statements": round(e["statements"] / e["requests"], 2),
+            "max_statements": e["max_statements"],
+            "avg_sql_ms": round(e["sql_ms"] / e["requests"], 3),
+            "n_plus_one_requests": e["n_plus_one_requests"],
+            "repeated_shapes": [
+                {"max_repeats": n, "statement": shape[:500]} for shape, n in e["repeated_shapes"].most_common(5)
+            ],
+        }
+    return {"mode": config.mode, "n_plus_one_threshold": config.threshold, "endpoints": rows}
+
+class QueryAuditMiddleware:
+    """Pure ASGI middleware scoping the statement tally to one HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = RequestQueries(scope)
+        token = _current.set(queries)
+        verbose = config.mode != "off"
+
+        async def send_wrapper(message):
+            if verbose and message["type"] == "http.response.start":
+                message = {**message, "headers": [
+                    *message.get("headers", []), (b"x-query-count", str(queries.count).encode()),
+                ]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _record(queries, scope["method"])
+            if queries.flagged and config.mode == "warn":
+                log.warning(
+                    "n_plus_one", "Repeated query shape (N+1?)",
+                    method=scope["method"],
+                    route=_route(scope),
+                    statements=queries.count,
+                    repeated=[{"repeats": n, "statement": s[:500]} for s, n in queries.flagged.items()],
+                )
+
+__all__ = [
+    "NPlusOneError",
+    "QueryAuditMiddleware",
+    "audit_engine",
+    "query_report",
+    "statement_shape",
+]
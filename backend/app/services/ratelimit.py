@@ -0,0 +1,220 @@
+# backend/app/services/ratelimit.py
+# Admission control: per-client token buckets in Redis plus load shedding,
+# by request priority.
+#
+#   critical  emergency writes (new blood requests, status changes, donor
+#             notification): always admitted
+#   normal    everything else: rate limited (RATE_LIMIT_RPS / _BURST)
+#   low       AI chat and bulk listings: rate limited with the smaller
+#             RATE_LIMIT_LOW_* bucket, and shed with 503 while the worker is
+#             overloaded (event-loop lag or DB pool wait over SHED_*)
+#   exempt    health/readiness, metrics, scheduler status, docs, Socket.IO
+#
+# A client is its socket address (scope["client"]). Behind a proxy, run
+# uvicorn with --proxy-headers and FORWARDED_ALLOW_IPS set to the proxy's
+# address so uvicorn replaces it with the forwarded client address; headers
+# are never read here, so a client can't pick a fresh bucket per request.
+# An X-API-Key only counts when it is one of RATE_LIMIT_API_KEYS. The bucket
+# refill and take happen in one Lua script, so all workers share each
+# client's bucket without races.
+# When Redis is unavailable requests are admitted (fail open), as the app
+# runs without the cache elsewhere too.
+import asyncio
+import hashlib
+import json
+import re
+import time
+from typing import Optional
+
+from app.database import settings
+from app.services.cache import get_redis_client
+from app.services.log import get_logger
+from app.services.metrics import ADMISSION_REJECTED, EVENT_LOOP_LAG, recent_pool_wait
+
+log = get_logger("ratelimit")
+
+# (method or "*", path regex, priority); first match wins, default "normal"
+PRIORITY_RULES = [
+    ("*", re.compile(r"^/(health|ready|metrics|docs|redoc|openapi\.json)$|^/ws/|^/(debug|scheduler)/"), "exempt"),
+    ("POST", re.compile(r"^/requests/?$"), "critical"),
+    ("PUT", re.compile(r"^/requests/\d+/status$"), "critical"),
+    ("POST", re.compile(r"^/donors/notify/by-location$"), "critical"),
+    ("*", re.compile(r"^/ai/"), "low"),
+    ("GET", re.compile(r"^/(donors|requests|hospitals)/?$"), "low"),
+]
+
+# KEYS[1] bucket; ARGV rate (tokens/s), burst, now (ms), cost
+# -> {allowed, tokens left, retry after (ms)}
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+  tokens = burst
+  ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local retry_ms = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_ms = math.ceil((cost - tokens) * 1000 / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst * 1000 / rate) + 1000)
+return {allowed, math.floor(tokens), retry_ms}
+"""
+
+KEY_PREFIX = "ratelimit"
+
+_script = None
+_script_client = None
+
+class _Load:
+    loop_lag_s = 0.0
+    limiter_down = False  # log the Redis outage once, not per request
+
+_load = _Load()
+
+def classify(method: str, path: str) -> str:
+    """Priority class of a request"""
+    for rule_method, pattern, priority in PRIORITY_RULES:
+        if (rule_method == "*" or rule_method == method) and pattern.match(path):
+            return priority
+    return "normal"
+
+def _key_digest(key: bytes) -> str:
+    return hashlib.sha256(key).hexdigest()[:16]
+
+def parse_api_keys(spec: str) -> frozenset:
+    """Digests of the comma-separated RATE_LIMIT_API_KEYS"""
+    return frozenset(_key_digest(k.strip().encode()) for k in spec.split(",") if k.strip())
+
+def client_identity(scope, api_keys: frozenset = frozenset()) -> str:
+    """A configured X-API-Key (hashed) if sent, else the client IP"""
+    if api_keys:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-api-key":
+                digest = _key_digest(value)
+                if digest in api_keys:
+                    return "key:" + digest
+                break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+async def take_token(bucket: str, rate: float, burst: int, cost: int = 1) -> tuple:
+    """
+    Take `cost` tokens from a shared bucket.
+
+    Returns:
+        (allowed, tokens left, retry after in seconds)
+    """
+    global _script, _script_client
+    client = await get_redis_client()
+    if _script is None or _script_client is not client:
+        _script = client.register_script(TOKEN_BUCKET_LUA)
+        _script_client = client
+    allowed, remaining, retry_ms = await _script(
+        keys=[f"{KEY_PREFIX}:{bucket}"], args=[rate, burst, int(time.time() * 1000), cost],
+    )
+    return bool(allowed), int(remaining), int(retry_ms) / 1000.0
+
+def overload_reason() -> Optional[str]:
+    """Why the worker is overloaded, or None"""
+    if _load.loop_lag_s * 1000 >= settings.SHED_LOOP_LAG_MS:
+        return "loop_lag"
+    if recent_pool_wait() * 1000 >= settings.SHED_POOL_WAIT_MS:
+        return "db_pool_wait"
+    return None
+
+async def sample_loop_lag(probe_s: float = 0.05) -> None:
+    """Measure how late a short sleep wakes up (run periodically on the app's loop)"""
+    start = time.perf_counter()
+    await asyncio.sleep(probe_s)
+    _load.loop_lag_s = max(time.perf_counter() - start - probe_s, 0.0)
+    EVENT_LOOP_LAG.set(_load.loop_lag_s)
+
+async def _reject(send, status: int, detail: str, retry_after: float, extra_headers=()) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+            *extra_headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware applying priority classes, token buckets and load shedding"""
+
+    def __init__(self, app):
+        self.app = app
+        self.limits = {
+            "normal": (settings.RATE_LIMIT_RPS, settings.RATE_LIMIT_BURST),
+            "low": (settings.RATE_LIMIT_LOW_RPS, settings.RATE_LIMIT_LOW_BURST),
+        }
+        self.api_keys = parse_api_keys(settings.RATE_LIMIT_API_KEYS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        priority = classify(scope["method"], scope["path"])
+        if priority in ("exempt", "critical"):
+            await self.app(scope, receive, send)
+            return
+
+        if priority == "low":
+            reason = overload_reason()
+            if reason is not None:
+                ADMISSION_REJECTED.labels(priority, reason).inc()
+                log.info("admission.shed", "Shedding low-priority request", path=scope["path"], reason=reason)
+                await _reject(send, 503, "Server busy, please retry shortly", 2)
+                return
+
+        rate, burst = self.limits[priority]
+        try:
+            allowed, remaining, retry_after = await take_token(f"{priority}:{client_identity(scope, self.api_keys)}", rate, burst)
+        except Exception as e:
+            if not _load.limiter_down:
+                _load.limiter_down = True
+                log.warning("admission.unavailable", "Rate limiter unavailable, admitting requests", error=str(e))
+            await self.app(scope, receive, send)
+            return
+        _load.limiter_down = False
+
+        if not allowed:
+            ADMISSION_REJECTED.labels(priority, "rate_limit").inc()
+            log.info("admission.rate_limited", "Rate limit exceeded", path=scope["path"], priority=priority)
+            await _reject(send, 429, "Rate limit exceeded", retry_after, [(b"x-ratelimit-remaining", b"0")])
+            return
+
+        remaining_header = (b"x-ratelimit-remaining", str(remaining).encode())
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), remaining_header]}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+__all__ = [
+    "PRIORITY_RULES",
+    "RateLimitMiddleware",
+    "classify",
+    "client_identity",
+    "overload_reason",
+    "parse_api_keys",
+    "sample_loop_lag",
+    "take_token",
+]
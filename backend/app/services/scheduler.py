@@ -0,0 +1,356 @@
+# backend/app/services/scheduler.py
+# In-process async job scheduler with leader election.
+#
+# Jobs run on the app's event loop, either every N seconds (interval, timed
+# from the start of the previous run) or on a 5-field cron expression
+# evaluated in UTC:
+#
+#   scheduler.add_interval("insights_reconcile", 300, reconcile_insights)
+#   scheduler.add_cron("geo_reconcile", "*/15 * * * *", reconcile_locations)
+#
+# Every worker runs a scheduler, but leader-only jobs (the default) run on
+# one of them: the worker holding the Redis lock SCHEDULER_LOCK_KEY, taken
+# with SET NX and renewed every third of its TTL. If the leader dies another
+# worker takes over once the lock expires. Per-worker jobs (leader_only=False)
+# run everywhere. When Redis is unavailable every worker acts as leader, as
+# all of them ran every job before the scheduler existed.
+#
+# A job never overlaps itself; a run that overshoots its next slot just
+# starts late. Run durations and last-success times go to /metrics
+# (bloodlink_job_*) and GET /scheduler/jobs.
+import asyncio
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from app.database import settings
+from app.services.cache import get_redis_client
+from app.services.log import get_logger
+from app.services.metrics import JOB_DURATION, JOB_LAST_SUCCESS, SCHEDULER_LEADER
+
+log = get_logger("scheduler")
+
+SCHEDULER_LOCK_KEY = "scheduler:leader"
+
+# KEYS[1] lock; ARGV worker id, ttl (ms) -> 1 if this worker holds the lock
+ACQUIRE_LUA = """
+local owner = redis.call('GET', KEYS[1])
+if not owner then
+  redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+  return 1
+end
+if owner == ARGV[1] then
+  redis.call('PEXPIRE', KEYS[1], ARGV[2])
+  return 1
+end
+return 0
+"""
+
+# KEYS[1] lock; ARGV worker id -> 1 if released
+RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# ============ Triggers ============
+
+class Interval:
+    """Every `seconds`, measured from the start of the previous run"""
+    __slots__ = ("seconds",)
+
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("interval must be positive")
+        self.seconds = float(seconds)
+
+    def next_after(self, ts: float) -> float:
+        return ts + self.seconds
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+class Cron:
+    """
+    Standard 5-field cron expression (minute hour day-of-month month
+    day-of-week) in UTC. Fields take *, numbers, ranges a-b, steps */n or
+    a-b/n, and comma lists; day-of-week 0 or 7 is Sunday. When both day
+    fields are restricted a day matching either one fires, as in cron(8).
+    """
+    __slots__ = ("expr", "minutes", "hours", "days", "months", "weekdays", "any_day", "any_weekday")
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        parsed = [self._parse(f, lo, hi) for f, (lo, hi) in zip(fields, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        self.weekdays = {d % 7 for d in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field: str, lo: int, hi: int) -> Set[int]:
+        values: Set[int] = set()
+        for part in field.split(","):
+            spec, _, step = part.partition("/")
+            if spec == "*":
+                start, end = lo, hi
+            elif "-" in spec:
+                start, end = (int(v) for v in spec.split("-", 1))
+            else:
+                start = end = int(spec)
+                if step:
+                    end = hi
+            step_n = int(step) if step else 1
+            if not (lo <= start <= end <= hi) or step_n < 1:
+                raise ValueError(f"invalid cron field {field!r}")
+            values.update(range(start, end + 1, step_n))
+        return values
+
+    def _day_matches(self, t: datetime) -> bool:
+        in_days = t.day in self.days
+        in_weekdays = t.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, ts: float) -> float:
+        """First matching minute strictly after `ts`"""
+        t = datetime.fromtimestamp(ts, timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t.timestamp()
+        raise ValueError(f"cron expression never fires: {self.expr!r}")
+
+    def __str__(self) -> str:
+        return f"cron {self.expr}"
+
+# ============ Jobs ============
+
+class Job:
+    __slots__ = (
+        "name", "func", "trigger", "leader_only", "initial_delay_s",
+        "runs", "failures", "running", "last_started", "last_duration_s",
+        "last_success", "last_error", "next_run",
+    )
+
+    def __init__(self, name: str, func: Callable[[], Awaitable], trigger, leader_only: bool, initial_delay_s: float):
+        self.name = name
+        self.func = func
+        self.trigger = trigger
+        self.leader_only = leader_only
+        self.initial_delay_s = initial_delay_s
+        self.runs = 0
+        self.failures = 0
+        self.running = False
+        self.last_started: Optional[float] = None
+        self.last_duration_s: Optional[float] = None
+        self.last_success: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.next_run: Optional[float] = None
+
+    def stats(self) -> dict:
+        ts = lambda v: round(v, 3) if v is not None else None
+        return {
+            "schedule": str(self.trigger),
+            "leader_only": self.leader_only,
+            "runs": self.runs,
+            "failures": self.failures,
+            "running": self.running,
+            "last_started_at": ts(self.last_started),
+            "last_duration_ms": round(self.last_duration_s * 1000, 1) if self.last_duration_s is not None else None,
+            "last_success_at": ts(self.last_success),
+            "last_error": self.last_error,
+            "next_run_at": ts(self.next_run),
+        }
+
+class Scheduler:
+    """Interval and cron jobs on the current event loop, leader-elected through Redis"""
+
+    def __init__(self, lock_key: str = SCHEDULER_LOCK_KEY, lock_ttl_s: float = 30.0):
+        self.lock_key = lock_key
+        self.lock_ttl_s = lock_ttl_s
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.jobs: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._elected: Optional[asyncio.Event] = None
+        self._lock_down = False  # log the Redis outage once, not per renewal
+
+    def add_interval(
+        self,
+        name: str,
+        seconds: float,
+        func: Callable[[], Awaitable],
+        leader_only: bool = True,
+        initial_delay_s: float = 0.0,
+    ) -> Job:
+        """
+        Run `func` every `seconds`, first after `initial_delay_s`.
+
+        Args:
+            name: Unique job name
+            seconds: Interval between run starts
+            func: Zero-argument coroutine function
+            leader_only: Run on the elected worker only
+            initial_delay_s: Seconds to wait before the first run
+        """
+        return self._add(Job(name, func, Interval(seconds), leader_only, initial_delay_s))
+
+    def add_cron(self, name: str, expr: str, func: Callable[[], Awaitable], leader_only: bool = True) -> Job:
+        """Run `func` at the minutes matching the cron expression `expr` (UTC)"""
+        return self._add(Job(name, func, Cron(expr), leader_only, 0.0))
+
+    def _add(self, job: Job) -> Job:
+        if job.name in self.jobs:
+            raise ValueError(f"job {job.name!r} is already scheduled")
+        self.jobs[job.name] = job
+        if self._elected is not None:
+            self._start_job(job)
+        return job
+
+    # ---------- Leader election ----------
+
+    async def _try_lead(self) -> bool:
+        try:
+            client = await get_redis_client()
+            acquire = client.register_script(ACQUIRE_LUA)
+            held = await acquire(keys=[self.lock_key], args=[self.worker_id, int(self.lock_ttl_s * 1000)])
+            self._lock_down = False
+            return bool(held)
+        except Exception as e:
+            if not self._lock_down:
+                self._lock_down = True
+                log.warning("scheduler.lock_unavailable", "Scheduler lock unavailable, running leader jobs here",
+                            worker=self.worker_id, error=str(e))
+            return True
+
+    async def _elect(self) -> None:
+        while True:
+            leader = await self._try_lead()
+            if leader != self.is_leader:
+                self.is_leader = leader
+                SCHEDULER_LEADER.set(1 if leader else 0)
+                log.info("scheduler.leader_changed", "Scheduler leadership changed",
+                         worker=self.worker_id, leader=leader)
+            self._elected.set()
+            await asyncio.sleep(self.lock_ttl_s / 3)
+
+    async def _release(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        SCHEDULER_LEADER.set(0)
+        try:
+            client = await get_redis_client()
+            await client.register_script(RELEASE_LUA)(keys=[self.lock_key], args=[self.worker_id])
+        except Exception:
+            pass  # the lock expires on its own
+
+    # ---------- Running ----------
+
+    async def run_job(self, job: Job) -> None:
+        """Run a job once, recording its duration and outcome"""
+        job.running = True
+        job.last_started = time.time()
+        start = time.perf_counter()
+        outcome = "success"
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = "error"
+            job.failures += 1
+            job.last_error = str(e) or type(e).__name__
+            log.exception("job.failed", "Scheduled job failed", job=job.name, error=job.last_error)
+        finally:
+            job.running = False
+            job.runs += 1
+            job.last_duration_s = time.perf_counter() - start
+            JOB_DURATION.labels(job.name, outcome).observe(job.last_duration_s)
+            if outcome == "success":
+                job.last_success = time.time()
+                job.last_error = None
+                JOB_LAST_SUCCESS.labels(job.name).set(job.last_success)
+
+    async def _loop(self, job: Job) -> None:
+        now = time.time()
+        if isinstance(job.trigger, Interval):
+            job.next_run = now + job.initial_delay_s
+        else:
+            job.next_run = job.trigger.next_after(now)
+        while True:
+            await asyncio.sleep(max(job.next_run - time.time(), 0.0))
+            if job.leader_only:
+                await self._elected.wait()
+            started = time.time()
+            if self.is_leader or not job.leader_only:
+                await self.run_job(job)
+            if isinstance(job.trigger, Interval):
+                job.next_run = max(job.trigger.next_after(started), time.time())
+            else:
+                job.next_run = job.trigger.next_after(time.time())
+
+    def _start_job(self, job: Job) -> None:
+        self._tasks[job.name] = asyncio.create_task(self._loop(job), name=f"job:{job.name}")
+
+    def start(self) -> None:
+        """Start leader election and every job on the running event loop"""
+        if self._elected is not None:
+            return
+        self._elected = asyncio.Event()
+        self._tasks["_elect"] = asyncio.create_task(self._elect(), name="scheduler:elect")
+        for job in self.jobs.values():
+            self._start_job(job)
+
+    async def stop(self) -> None:
+        """Cancel all jobs, wait for them to finish and give up the lock"""
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        self._elected = None
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        await self._release()
+
+    def stats(self) -> dict:
+        return {
+            "worker": self.worker_id,
+            "leader": self.is_leader,
+            "jobs": {name: job.stats() for name, job in self.jobs.items()},
+        }
+
+# The app's scheduler (see app.main)
+scheduler = Scheduler(lock_ttl_s=settings.SCHEDULER_LOCK_TTL_SECONDS)
+
+__all__ = [
+    "Cron",
+    "Interval",
+    "Job",
+    "Scheduler",
+    "scheduler",
+    "SCHEDULER_LOCK_KEY",
+]
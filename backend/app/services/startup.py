@@ -0,0 +1,81 @@
+# backend/app/services/startup.py
+# Startup profile and readiness state.
+#
+# app.main imports this module first, so `imports` covers loading the app
+# and its dependencies. The startup event times each of its steps with
+# `with startup_step("schema"): ...`, and modules that load heavy
+# dependencies on first use (LangChain, SendGrid, Socket.IO) report it with
+# record_lazy_load, so one report shows where a cold start went and what
+# was deferred. /ready stays 503 until mark_ready() is called.
+import time
+from typing import Dict, List, Optional
+from app.services.log import get_logger
+
+log = get_logger("startup")
+
+_T0 = time.perf_counter()
+
+class _Profile:
+    imports_s: Optional[float] = None
+    steps: List[tuple] = []
+    lazy_loads: Dict[str, float] = {}
+    ready_s: Optional[float] = None
+
+_profile = _Profile()
+
+def mark_imported() -> None:
+    """Record the end of module import (call at the bottom of app.main)"""
+    if _profile.imports_s is None:
+        _profile.imports_s = time.perf_counter() - _T0
+
+class startup_step:
+    """Context manager timing one step of the startup event"""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _profile.steps.append((self.name, time.perf_counter() - self.start))
+        return False
+
+def record_lazy_load(name: str, seconds: float) -> None:
+    """Record a dependency loaded on first use instead of at import"""
+    _profile.lazy_loads.setdefault(name, seconds)
+
+def mark_ready() -> None:
+    _profile.ready_s = time.perf_counter() - _T0
+
+def is_ready() -> bool:
+    return _profile.ready_s is not None
+
+def startup_report() -> dict:
+    """Startup timings in milliseconds"""
+    ms = lambda s: round(s * 1000, 1) if s is not None else None
+    return {
+        "imports_ms": ms(_profile.imports_s),
+        "steps_ms": {name: ms(s) for name, s in _profile.steps},
+        "ready_ms": ms(_profile.ready_s),
+        "lazy_loads_ms": {name: ms(s) for name, s in _profile.lazy_loads.items()},
+    }
+
+def log_startup_report() -> None:
+    report = startup_report()
+    log.info(
+        "startup.ready", "Startup complete",
+        imports_ms=report["imports_ms"], steps_ms=report["steps_ms"], ready_ms=report["ready_ms"],
+    )
+
+__all__ = [
+    "mark_imported",
+    "startup_step",
+    "record_lazy_load",
+    "mark_ready",
+    "is_ready",
+    "startup_report",
+    "log_startup_report",
+]
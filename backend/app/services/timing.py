@@ -0,0 +1,116 @@
+# backend/app/services/timing.py
+# Per-request phase timers and the Server-Timing header.
+#
+# ServerTimingMiddleware puts a fresh phase table in a context variable for
+# each HTTP request; code on the request path times its work with
+# `with phase("geo_search"): ...` (or record_phase for durations measured
+# elsewhere, e.g. SQL cursor events). Outside a request both are no-ops.
+# Repeated phases are summed, so ten SQL statements show up as one "sql"
+# entry with a count.
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from app.services.log import get_logger
+
+slow_log = get_logger("slow_requests")
+
+# phase name -> [seconds, count] for the current request
+_phases: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar("server_timing_phases", default=None)
+
+def record_phase(name: str, seconds: float) -> None:
+    """Add a measured duration to the current request's phase table"""
+    phases = _phases.get()
+    if phases is None:
+        return
+    entry = phases.get(name)
+    if entry is None:
+        phases[name] = [seconds, 1]
+    else:
+        entry[0] += seconds
+        entry[1] += 1
+
+class phase:
+    """Context manager timing a block into the current request's phase table"""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_phase(self.name, time.perf_counter() - self.start)
+        return False
+
+def format_server_timing(phases: Dict[str, List[float]], total_s: float) -> str:
+    """Render a phase table as a Server-Timing header value (durations in ms)"""
+    parts = []
+    for name, (seconds, count) in phases.items():
+        if count > 1:
+            parts.append(f'{name};desc="{int(count)}x";dur={seconds * 1000:.2f}')
+        else:
+            parts.append(f"{name};dur={seconds * 1000:.2f}")
+    parts.append(f"total;dur={total_s * 1000:.2f}")
+    return ", ".join(parts)
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware adding a Server-Timing header to every HTTP
+    response and logging requests slower than `slow_ms` as one JSON record
+    with their phase breakdown.
+
+    The header is written when the response starts, so for streamed
+    responses it covers the work done before the first byte.
+    """
+
+    def __init__(self, app, slow_ms: float = 500, allow_origin: Optional[str] = None):
+        self.app = app
+        self.slow_ms = slow_ms
+        # lets the browser's devtools show the breakdown for cross-origin calls
+        self.allow_origin = allow_origin.encode("latin-1") if allow_origin else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        phases: Dict[str, List[float]] = {}
+        token = _phases.set(phases)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", format_server_timing(phases, time.perf_counter() - start).encode("latin-1")))
+                if self.allow_origin:
+                    headers.append((b"timing-allow-origin", self.allow_origin))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _phases.reset(token)
+            total_ms = (time.perf_counter() - start) * 1000
+            if total_ms >= self.slow_ms:
+                route = scope.get("route")
+                slow_log.warning(
+                    "slow_request", "Slow request",
+                    method=scope["method"],
+                    path=scope["path"],
+                    route=getattr(route, "path", None),
+                    status=status_code,
+                    total_ms=round(total_ms, 2),
+                    phases={
+                        name: {"ms": round(seconds * 1000, 2), "count": int(count)}
+                        for name, (seconds, count) in phases.items()
+                    },
+                )
+
+__all__ = ["ServerTimingMiddleware", "phase", "record_phase", "format_server_timing"]
@@ -0,0 +1,306 @@
+# backend/app/services/tracing.py
+# Lightweight request tracing with OpenTelemetry-shaped spans.
+#
+# TracingMiddleware opens a root span per HTTP request (continuing an
+# incoming W3C `traceparent` if there is one) and keeps it in a context
+# variable; SQL statements, Redis commands, Socket.IO broadcasts, email
+# sends and LLM calls open child spans under it. Finished spans of sampled
+# traces are written as JSON lines (field names follow OTLP/JSON) by a
+# background thread, so tail latency can be analysed offline, e.g. with
+# benchmarks/trace_report.py.
+#
+# With no TRACE_FILE configured only the root span is created (its trace id
+# is still returned in X-Trace-Id and stamped on Socket.IO payloads) and
+# every child span is a no-op.
+import json
+import queue
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.services.log import get_logger
+
+log = get_logger("tracing")
+
+class Span:
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "attributes",
+        "start_ns", "end_ns", "error", "sampled", "_t0",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 kind: str = "INTERNAL", attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.error: Optional[str] = None
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self._t0 = time.perf_counter_ns()
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns:
+            return
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._t0)
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self.sampled and _exporter is not None:
+            _exporter.export(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+class JsonlExporter:
+    """Appends finished spans to a file from a daemon thread (request path only enqueues)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Optional[Span]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        self._queue.put(span)
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                span = self._queue.get()
+                if span is None:
+                    break
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+                # drain whatever else is queued before flushing
+                while True:
+                    try:
+                        span = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if span is None:
+                        f.flush()
+                        return
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+                f.flush()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+_exporter: Optional[JsonlExporter] = None
+_sample_rate = 1.0
+_current: ContextVar[Optional[Span]] = ContextVar("trace_span", default=None)
+
+def configure_tracing(path: Optional[str], sample_rate: float = 1.0) -> bool:
+    """Start exporting sampled traces to `path` (None disables export). Returns True if enabled."""
+    global _exporter, _sample_rate
+    _sample_rate = sample_rate
+    if _exporter is None and path:
+        _exporter = JsonlExporter(path)
+        log.info("tracing.enabled", "Tracing enabled", file=path, sample_rate=sample_rate)
+    return _exporter is not None
+
+def shutdown_tracing() -> None:
+    """Flush and stop the exporter"""
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+        _exporter = None
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace_id if span is not None else None
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = "INTERNAL") -> Optional[Span]:
+    """
+    Start a child of the current span without making it current (for spans
+    opened and closed in different callbacks). Returns None outside a
+    sampled trace; the caller must end() the span otherwise.
+    """
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return None
+    return Span(name, parent.trace_id, parent.span_id, True, kind, attributes)
+
+class span:
+    """Context manager running a block inside a child span of the current span"""
+    __slots__ = ("name", "attributes", "kind", "_span", "_token")
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None, kind: str = "INTERNAL"):
+        self.name = name
+        self.attributes = attributes
+        self.kind = kind
+
+    def __enter__(self) -> Optional[Span]:
+        self._span = start_span(self.name, self.attributes, self.kind)
+        self._token = _current.set(self._span) if self._span is not None else None
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._span is not None:
+            _current.reset(self._token)
+            self._span.end(exc)
+        return False
+
+def _parse_traceparent(value: str):
+    # W3C: version-traceid-parentid-flags
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(int(parts[3], 16) & 1)
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening the root span of every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace_id, parent_id, sampled = None, None, None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                parsed = _parse_traceparent(value.decode("latin-1"))
+                if parsed:
+                    trace_id, parent_id, sampled = parsed
+                break
+        if trace_id is None:
+            trace_id = f"{random.getrandbits(128):032x}"
+        if sampled is None:
+            sampled = random.random() < _sample_rate
+        root = Span(
+            f"{scope['method']} {scope['path']}", trace_id, parent_id,
+            sampled and _exporter is not None, kind="SERVER",
+            attributes={"http.method": scope["method"], "http.target": scope["path"]},
+        )
+        token = _current.set(root)
+        trace_header = trace_id.encode()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", trace_header)]}
+            await send(message)
+
+        error = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                root.name = f"{scope['method']} {route}"
+                root.attributes["http.route"] = route
+            root.end(error)
+
+# ============ Instrumentation ============
+
+def trace_engine(engine: Engine) -> None:
+    """Open a span per SQL statement executed inside a sampled trace"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        s = start_span("db.query", {"db.statement": statement[:300], "db.executemany": executemany}, kind="CLIENT")
+        conn.info.setdefault("trace_spans", []).append(s)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        s = conn.info["trace_spans"].pop()
+        if s is not None:
+            if cursor.rowcount is not None and cursor.rowcount >= 0:
+                s.set_attribute("db.rowcount", cursor.rowcount)
+            s.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("trace_spans") if context.connection is not None else None
+        if stack:
+            s = stack.pop()
+            if s is not None:
+                s.end(context.original_exception)
+
+def trace_redis(client):
+    """Open a span per Redis command and per pipeline executed inside a sampled trace"""
+    execute_command = client.execute_command
+    make_pipeline = client.pipeline
+
+    async def traced_execute_command(*args, **options):
+        s = start_span("redis " + (str(args[0]).upper() if args else "UNKNOWN"), kind="CLIENT")
+        if s is None:
+            return await execute_command(*args, **options)
+        try:
+            result = await execute_command(*args, **options)
+        except Exception as e:
+            s.end(e)
+            raise
+        s.end()
+        return result
+
+    def traced_pipeline(*args, **kwargs):
+        pipe = make_pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def traced_execute(*a, **k):
+            s = start_span("redis PIPELINE", {"redis.commands": len(pipe.command_stack)}, kind="CLIENT")
+            if s is None:
+                return await execute(*a, **k)
+            try:
+                result = await execute(*a, **k)
+            except Exception as e:
+                s.end(e)
+                raise
+            s.end()
+            return result
+
+        pipe.execute = traced_execute
+        return pipe
+
+    client.execute_command = traced_execute_command
+    client.pipeline = traced_pipeline
+    return client
+
+__all__ = [
+    "Span",
+    "TracingMiddleware",
+    "configure_tracing",
+    "shutdown_tracing",
+    "current_span",
+    "current_trace_id",
+    "start_span",
+    "span",
+    "trace_engine",
+    "trace_redis",
+]
@@ -0,0 +1,279 @@
+# backend/benchmarks/bench_api.py
+# Offline benchmark of the API hot paths at several data sizes.
+#
+# Each size gets a fresh sandbox: a temporary SQLite database seeded with
+# generate_data.py and an in-memory fakeredis (pip install -r
+# requirements-dev.txt), with EMAIL_PROVIDER=stub and the fake LLM, so
+# nothing leaves the machine. Requests go through the full ASGI app
+# (middleware, validation, serialization) via httpx's ASGI transport.
+#
+# Results are written as JSON so runs can be compared across commits;
+# --baseline compares against an earlier file and exits non-zero if any
+# endpoint's p50/p99 grew, or its throughput fell, by more than --threshold.
+#
+# Usage (from backend/):
+#   python benchmarks/bench_api.py --sizes 1000 10000 --out bench.json
+#   python benchmarks/bench_api.py --sizes 1000 10000 --baseline bench.json --threshold 0.25
+#
+# fakeredis runs GEOSEARCH in Python (linear in donors), so /donors/nearby
+# and /ai/chat slow down with size much faster than on a real Redis; pass
+# --redis-url to keep the GEO index on a real (scratch!) Redis instead.
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHAT_CORPUS = os.path.join(BACKEND, "benchmarks", "data", "chat_corpus.jsonl")
+sys.path.insert(0, BACKEND)
+
+BLOOD_GROUPS = ["O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-"]
+# Delhi NCR centres the generated donors cluster around
+CENTRES = [(28.5672, 77.2100), (28.5685, 77.2066), (28.6139, 77.2090), (28.7041, 77.1025), (28.4595, 77.0266)]
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Benchmark API hot paths offline.")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="donor counts to seed")
+    ap.add_argument("--requests-ratio", type=float, default=0.2, help="blood requests seeded per donor")
+    ap.add_argument("--iterations", type=int, default=100, help="measured calls per endpoint and size")
+    ap.add_argument("--warmup", type=int, default=10, help="unmeasured calls per endpoint and size")
+    ap.add_argument("--concurrency", type=int, default=1, help="concurrent in-flight requests")
+    ap.add_argument("--endpoints", nargs="+", help="subset of endpoint names to run")
+    ap.add_argument("--llm-latency-ms", type=int, default=0, help="simulated LLM latency for /ai/chat")
+    ap.add_argument("--redis-url", help="use this (scratch) Redis instead of fakeredis")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="write results JSON here")
+    ap.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression (0.25 = 25%%)")
+    return ap.parse_args()
+
+def setup_sandbox(args: argparse.Namespace) -> str:
+    """
+    Point the app at a temporary SQLite file, fakeredis, the stub email
+    provider and the fake LLM; must run before app imports.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="nss-bench-"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["EMAIL_PROVIDER"] = "stub"
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["LLM_FAKE_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["SLOW_REQUEST_MS"] = "3600000"
+    os.environ["LOG_LEVEL"] = "WARNING"
+    # one client hammering every endpoint: keep the limiter's Redis round trip
+    # in the measurement, but never refuse
+    for name in ("RATE_LIMIT_BURST", "RATE_LIMIT_LOW_BURST", "RATE_LIMIT_RPS", "RATE_LIMIT_LOW_RPS"):
+        os.environ[name] = "1000000000"
+    os.environ["SHED_LOOP_LAG_MS"] = os.environ["SHED_POOL_WAIT_MS"] = "3600000"
+    os.environ.pop("TRACE_FILE", None)
+
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+        return "redis"
+    try:
+        import fakeredis
+    except ImportError:
+        sys.exit("fakeredis is not installed (pip install -r requirements-dev.txt) and no --redis-url given")
+    import app.services.cache as cache
+    server = fakeredis.FakeServer()
+
+    class _FakeRedisModule:
+        @staticmethod
+        def from_url(*a, **k):
+            return fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    cache.redis = _FakeRedisModule
+    return "fakeredis"
+
+async def seed(args: argparse.Namespace, donors: int) -> None:
+    import generate_data
+    from app.services.cache import close_redis, get_redis_client
+
+    if not args.redis_url:
+        await (await get_redis_client()).flushall()
+        await close_redis()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await generate_data.generate(argparse.Namespace(
+            donors=donors, hospitals=len(generate_data.REAL_HOSPITALS),
+            requests=int(donors * args.requests_ratio), seed=args.seed, anchor_date=date.today(),
+            chunk_size=10_000, reset=True, skip_redis=False,
+        ))
+
+def endpoints(rng: random.Random, hospital_ids: list, messages: list) -> dict:
+    """name -> zero-argument factory of (method, url, kwargs)"""
+
+    def near():
+        lat, lng = rng.choice(CENTRES)
+        return lat + rng.uniform(-0.02, 0.02), lng + rng.uniform(-0.02, 0.02)
+
+    def nearby():
+        lat, lng = near()
+        return "GET", "/donors/nearby", {"params": {"lat": lat, "lng": lng, "km": 3, "blood_group": rng.choice(BLOOD_GROUPS)}}
+
+    def notify():
+        lat, lng = near()
+        return "POST", "/donors/notify/by-location", {"json": {
+            "lat": lat, "lng": lng, "km": 2, "blood_group": rng.choice(BLOOD_GROUPS), "limit": 100,
+        }}
+
+    def create_request():
+        return "POST", "/requests/", {"json": {
+            "hospital_id": rng.choice(hospital_ids), "blood_type": rng.choice(BLOOD_GROUPS),
+            "urgency": rng.choice(["Low", "Medium", "High", "Critical"]),
+        }}
+
+    def list_requests():
+        return "GET", "/requests/", {"params": {"status_filter": "Pending", "hospital_id": rng.choice(hospital_ids)}}
+
+    def chat():
+        return "POST", "/ai/chat", {"json": {"message": rng.choice(messages)}}
+
+    return {
+        "GET /donors/nearby": nearby,
+        "POST /donors/notify/by-location": notify,
+        "POST /requests/": create_request,
+        "GET /requests/": list_requests,
+        "POST /ai/chat": chat,
+    }
+
+def summarize(samples: list, errors: int, elapsed: float) -> dict:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "n": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+    }
+
+async def run_endpoint(client, factory, args: argparse.Namespace) -> dict:
+    errors = 0
+    samples = []
+    remaining = args.iterations
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = factory()
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            samples.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    for _ in range(args.warmup):
+        method, url, kwargs = factory()
+        await client.request(method, url, **kwargs)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    return summarize(samples, errors, elapsed)
+
+async def bench_size(args: argparse.Namespace, donors: int) -> dict:
+    import httpx
+    from app.database import SessionLocal
+    from app.main import app
+    from app.models.models import Hospital
+    from app.services.hospital_registry import load_hospitals
+
+    await seed(args, donors)
+    db = SessionLocal()
+    try:
+        load_hospitals(db)
+        hospital_ids = [h for (h,) in db.query(Hospital.id).all()]
+    finally:
+        db.close()
+    with open(CHAT_CORPUS) as f:
+        messages = [json.loads(line)["text"] for line in f if line.strip()]
+
+    rng = random.Random(args.seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, factory in endpoints(rng, hospital_ids, messages).items():
+            if args.endpoints and name not in args.endpoints:
+                continue
+            results[name] = await run_endpoint(client, factory, args)
+            r = results[name]
+            print(f"  {name:<32} {r['rps']:>8,.1f} req/s   p50 {r['p50_ms']:8.2f} ms   "
+                  f"p99 {r['p99_ms']:8.2f} ms   errors {r['errors']}")
+    return results
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Regressions as (size, endpoint, metric, baseline value, current value)"""
+    regressions = []
+    for size, endpoints_now in current["results"].items():
+        for name, now in endpoints_now.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before:
+                continue
+            for metric in ("p50_ms", "p99_ms"):
+                if before[metric] and now[metric] > before[metric] * (1 + threshold):
+                    regressions.append((size, name, metric, before[metric], now[metric]))
+            if before["rps"] and now["rps"] < before["rps"] * (1 - threshold):
+                regressions.append((size, name, "rps", before["rps"], now["rps"]))
+    return regressions
+
+async def main() -> int:
+    args = parse_args()
+    backend = setup_sandbox(args)
+    from app.services.db_utils import init_db
+    init_db()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "redis_backend": backend,
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "llm_latency_ms": args.llm_latency_ms,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for donors in args.sizes:
+        print(f"\n{donors:,} donors ({backend})")
+        report["results"][str(donors)] = await bench_size(args, donors)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        print(f"\nCompared with {args.baseline} (commit {baseline.get('meta', {}).get('commit')}, "
+              f"threshold {args.threshold:.0%})")
+        for size, name, metric, before, now in regressions:
+            print(f"  ❌ {size} donors {name}: {metric} {before} -> {now}")
+        if regressions:
+            return 1
+        print("  ✅ no regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,91 @@
+# backend/benchmarks/bench_intent.py
+# Intent routing accuracy and latency on held-out paraphrases
+# (benchmarks/data/intent_eval.jsonl): the embedding router vs. the
+# keyword rules, and the combined detector /ai/chat uses.
+#
+# Usage (from backend/):
+#   python benchmarks/bench_intent.py [--eval benchmarks/data/intent_eval.jsonl] [--iterations 20000]
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai import intent_router
+from app.ai.ai_routes import (
+    detect_conversation_intent,
+    detect_conversation_intent_rules,
+    detect_intent,
+    detect_intent_rules,
+)
+
+DEFAULT_EVAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "intent_eval.jsonl")
+
+def rules(text: str) -> str:
+    return detect_conversation_intent_rules(text) or detect_intent_rules(text)[0]
+
+def router(text: str) -> str:
+    # bypass the per-message memo so every call embeds and searches
+    return intent_router.classify.__wrapped__(text)[0]
+
+def combined(text: str) -> str:
+    # cold memo per message, as for a new chat message
+    intent_router.classify.cache_clear()
+    return detect_conversation_intent(text) or detect_intent(text)[0]
+
+def evaluate(name: str, fn, rows: list, show_misses: bool) -> None:
+    correct = 0
+    confusion = Counter()
+    for row in rows:
+        got = fn(row["text"])
+        if got == row["intent"]:
+            correct += 1
+        else:
+            confusion[(row["intent"], got)] += 1
+            if show_misses:
+                print(f"    miss [{name}] {row['text']!r}: expected {row['intent']}, got {got}")
+    print(f"{name:>10}: accuracy {correct}/{len(rows)} = {correct / len(rows):.1%}")
+    for (expected, got), n in confusion.most_common(3):
+        print(f"{'':>12}{n}x {expected} -> {got}")
+
+def latency(name: str, fn, texts: list, iterations: int) -> None:
+    samples = []
+    for i in range(iterations):
+        text = texts[i % len(texts)]
+        start = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    rate = len(samples) / (sum(samples) / 1e6)
+    print(f"{name:>10}: p50 {statistics.median(samples):7.1f} µs   p99 {p99:7.1f} µs   {rate:>10,.0f} msgs/s")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eval", default=DEFAULT_EVAL)
+    ap.add_argument("--iterations", type=int, default=20000)
+    ap.add_argument("--show-misses", action="store_true")
+    args = ap.parse_args()
+
+    with open(args.eval) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    start = time.perf_counter()
+    indexed = intent_router.build_index()
+    print(f"Indexed {indexed} examples in {(time.perf_counter() - start) * 1000:.1f} ms; {len(rows)} eval messages\n")
+
+    print("Routing accuracy")
+    for name, fn in (("rules", rules), ("router", router), ("combined", combined)):
+        evaluate(name, fn, rows, args.show_misses)
+
+    print("\nLatency per message")
+    texts = [row["text"] for row in rows]
+    for name, fn in (("rules", rules), ("router", router), ("combined", combined)):
+        latency(name, fn, texts, args.iterations)
+
+if __name__ == "__main__":
+    main()
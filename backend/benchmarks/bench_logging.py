@@ -0,0 +1,149 @@
+# backend/benchmarks/bench_logging.py
+# Broadcast storm: event-loop cost of diagnostic output per broadcast.
+#
+# Calls app.realtime's broadcast functions (Socket.IO server built, no
+# clients, so the emit itself is cheap) in bursts while a ticker task
+# measures event-loop lag, once per output mode:
+#
+#   print           the old behaviour: one print() line per broadcast
+#   sync            app.services.log, formatted and written on the loop
+#   queued          app.services.log through the queue (LOG_QUEUE_SIZE)
+#   queued+sampled  as queued, with the default LOG_SAMPLE_RATES
+#
+# Output goes to a pipe read by a `cat > /dev/null` child by default (what a
+# container's stdout/stderr usually is); --sink slow-pipe reads it at about
+# 1 MB/s, like a backpressured log collector, and --sink file writes a temp
+# file.
+#
+# Usage (from backend/):
+#   python benchmarks/bench_logging.py --broadcasts 50000 --burst 100
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+MODES = ["print", "sync", "queued", "queued+sampled"]
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Measure logging cost under a broadcast storm.")
+    ap.add_argument("--broadcasts", type=int, default=50000)
+    ap.add_argument("--burst", type=int, default=100, help="broadcasts per loop iteration")
+    ap.add_argument("--sink", choices=["pipe", "slow-pipe", "file"], default="pipe")
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    ap.add_argument("--out", help="write results JSON here")
+    return ap.parse_args()
+
+@contextlib.contextmanager
+def open_sink(kind: str):
+    if kind in ("pipe", "slow-pipe"):
+        command = ["cat"] if kind == "pipe" else [
+            sys.executable, "-c", "import sys, time\nwhile sys.stdin.buffer.read(4096): time.sleep(0.004)",
+        ]
+        reader = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL)
+        stream = io.TextIOWrapper(reader.stdin, encoding="utf-8", line_buffering=True)
+        try:
+            yield stream
+        finally:
+            stream.close()
+            reader.wait()
+    else:
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as stream:
+            yield stream
+
+async def storm(args: argparse.Namespace, mode: str, sink) -> dict:
+    from app.realtime import broadcast_donor_status_update, broadcast_new_request
+
+    request = {"id": 1, "hospital_id": 3, "blood_type": "O+", "urgency": "Critical", "status": "Pending"}
+    donor = {"id": 42, "name": "Donor", "blood_group": "A+", "available": True}
+    lags = []
+    stop = False
+
+    async def ticker():
+        while not stop:
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            lags.append(max(time.perf_counter() - expected, 0.0))
+
+    async def one(i: int):
+        if i % 4 == 0:
+            await broadcast_new_request(request)
+            if mode == "print":
+                print(f"📢 Broadcasted new request: Request {request['id']} - {request['blood_type']} - {request['urgency']}")
+        else:
+            await broadcast_donor_status_update(donor)
+            if mode == "print":
+                print(f"📢 Broadcasted donor status update: Donor {donor['id']} - Available: {donor['available']}")
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    with contextlib.redirect_stdout(sink):
+        start = time.perf_counter()
+        for first in range(0, args.broadcasts, args.burst):
+            await asyncio.gather(*(one(i) for i in range(first, min(first + args.burst, args.broadcasts))))
+            await asyncio.sleep(0)
+        elapsed = time.perf_counter() - start
+    stop = True
+    await tick
+    lags.sort()
+    return {
+        "elapsed_s": elapsed,
+        "us_per_broadcast": round(elapsed / args.broadcasts * 1e6, 2),
+        "broadcasts_per_s": round(args.broadcasts / elapsed),
+        "loop_lag_p99_ms": round(lags[int(0.99 * (len(lags) - 1))] * 1000, 2) if lags else 0.0,
+        "loop_lag_max_ms": round(lags[-1] * 1000, 2) if lags else 0.0,
+    }
+
+def run_mode(args: argparse.Namespace, mode: str) -> dict:
+    from app.database import settings
+    from app.services.log import configure_logging, log_stats, shutdown_logging
+
+    with open_sink(args.sink) as sink:
+        if mode == "print":
+            configure_logging("WARNING", stream=sink)
+        else:
+            configure_logging(
+                "INFO", settings.LOG_FORMAT,
+                settings.LOG_SAMPLE_RATES if mode == "queued+sampled" else "",
+                queue_size=0 if mode == "sync" else settings.LOG_QUEUE_SIZE,
+                stream=sink,
+            )
+        before = log_stats()
+        result = asyncio.run(storm(args, mode, sink))
+        drain_start = time.perf_counter()
+        shutdown_logging()  # writes out whatever is still queued
+        result["drain_ms"] = round((time.perf_counter() - drain_start) * 1000, 1)
+        after = log_stats()
+        result["sampled_out"] = sum(after["sampled_out"].values()) - sum(before["sampled_out"].values())
+        result["dropped"] = after["dropped"] - before["dropped"]
+    return result
+
+def main() -> int:
+    args = parse_args()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='nss-log-'), 'log.db')}"
+    from app.realtime import get_sio
+    get_sio()
+
+    report = {"broadcasts": args.broadcasts, "burst": args.burst, "sink": args.sink, "results": {}}
+    print(f"{args.broadcasts:,} broadcasts in bursts of {args.burst}, output to a {args.sink}\n")
+    print(f"{'mode':<16} {'us/bcast':>9} {'bcast/s':>9} {'lag p99':>9} {'lag max':>9} {'drain':>8} {'sampled':>8} {'dropped':>8}")
+    for mode in args.modes:
+        r = report["results"][mode] = run_mode(args, mode)
+        print(f"{mode:<16} {r['us_per_broadcast']:>9.1f} {r['broadcasts_per_s']:>9,} {r['loop_lag_p99_ms']:>7.2f}ms "
+              f"{r['loop_lag_max_ms']:>7.2f}ms {r['drain_ms']:>6.1f}ms {r['sampled_out']:>8,} {r['dropped']:>8,}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
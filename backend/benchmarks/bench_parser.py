@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_parser.py
+# Parser throughput: the gazetteer automaton vs. a naive substring scan over
+# every known name, at increasing hospital counts.
+#
+# Usage (from backend/):
+#   python benchmarks/bench_parser.py --messages 20000 --hospitals 20 500 5000
+import argparse
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai import gazetteer
+from app.ai.ai_routes import parse_message_regex
+
+TEMPLATES = [
+    "Find {bg} donors near {place}",
+    "need {bg} blood urgently at {place}",
+    "any {bg} donors around {place}?",
+    "Who can donate {bg} in {place} today",
+    "list donors near {place}",
+    "{bg} required for a patient, {place}",
+]
+BLOOD_GROUPS = ["O+", "O-", "A+", "A pos", "B negative", "AB+", "ab -", "O positive"]
+
+def make_hospitals(count: int, rng: random.Random) -> list:
+    words = ["City", "Care", "Life", "Global", "Sunrise", "Metro", "Holy", "Family", "Unity", "Lotus"]
+    hospitals = []
+    for i in range(count):
+        name = f"{rng.choice(words)} {rng.choice(words)} Hospital {i}"
+        hospitals.append(SimpleNamespace(id=i + 1, name=name, lat=28.4 + rng.random() * 0.5, lng=76.9 + rng.random() * 0.5))
+    return hospitals
+
+def make_messages(count: int, names: list, rng: random.Random) -> list:
+    messages = []
+    for _ in range(count):
+        # one in five messages mentions nothing the gazetteer knows
+        place = rng.choice(names) if rng.random() < 0.8 else "the railway station"
+        messages.append(rng.choice(TEMPLATES).format(bg=rng.choice(BLOOD_GROUPS), place=place))
+    return messages
+
+def naive_find(text: str, names: list) -> list:
+    """The old approach: lower-case substring check against every name"""
+    lowered = text.lower()
+    return [name for name in names if name.lower() in lowered]
+
+def rate(fn, messages: list) -> float:
+    start = time.perf_counter()
+    for m in messages:
+        fn(m)
+    return len(messages) / (time.perf_counter() - start)
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--messages", type=int, default=20000)
+    ap.add_argument("--hospitals", type=int, nargs="+", default=[20, 500, 5000])
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    print(f"{'hospitals':>10} {'names':>7} {'build ms':>9} {'naive msg/s':>12} {'automaton msg/s':>16} {'parse_message_regex msg/s':>26}")
+    for count in args.hospitals:
+        rng = random.Random(args.seed)
+        hospitals = make_hospitals(count, rng)
+
+        start = time.perf_counter()
+        compiled = gazetteer.build(hospitals)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        names = [h.name for h in hospitals] + list(gazetteer.REGIONS) + list(gazetteer.LANDMARK_HOSPITALS)
+        messages = make_messages(args.messages, names, rng)
+
+        naive = rate(lambda m: naive_find(m, names), messages)
+        automaton = rate(gazetteer.find_places, messages)
+        full = rate(parse_message_regex, messages)
+        print(f"{count:>10} {compiled:>7} {build_ms:>9.1f} {naive:>12,.0f} {automaton:>16,.0f} {full:>26,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# backend/benchmarks/bench_recommender.py
+# Camp recommender scoring time vs. donor count (synthetic Delhi NCR data,
+# no database): the grid binning and scoring in app.ai.recommender.
+#
+# Usage (from backend/):
+#   python benchmarks/bench_recommender.py --donors 10000 100000 1000000 5000000
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai.recommender import score_locations
+
+def synthetic(n: int, hospitals: int, rng: np.random.Generator):
+    """Donors clustered around a few city centres plus uniform background"""
+    centres = np.array([[28.57, 77.21], [28.70, 77.10], [28.59, 77.05], [28.54, 77.39], [28.46, 77.03]])
+    clustered = int(n * 0.8)
+    which = rng.integers(0, len(centres), clustered)
+    pts = centres[which] + rng.normal(0, 0.03, (clustered, 2))
+    background = np.column_stack([rng.uniform(28.40, 28.88, n - clustered), rng.uniform(76.84, 77.45, n - clustered)])
+    pts = np.vstack([pts, background])
+    eligible = (rng.random(n) < 0.7).astype(np.float64)
+    h = centres[rng.integers(0, len(centres), hospitals)] + rng.normal(0, 0.05, (hospitals, 2))
+    demand = rng.integers(0, 200, hospitals).astype(np.float64)
+    return pts[:, 0], pts[:, 1], eligible, h[:, 0], h[:, 1], demand
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--donors", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--hospitals", type=int, default=200)
+    ap.add_argument("--cell-km", type=float, default=2.0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    print(f"{'donors':>10} {'best ms':>9} {'donors/s':>14}  top pick")
+    for n in args.donors:
+        data = synthetic(n, args.hospitals, np.random.default_rng(args.seed))
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            picks = score_locations(*data, cell_km=args.cell_km)
+            best = min(best, time.perf_counter() - start)
+        top = picks[0] if picks else {}
+        print(f"{n:>10,} {best * 1000:>9.1f} {n / best:>14,.0f}  {top.get('lat')}, {top.get('lng')} (score {top.get('score')})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# backend/benchmarks/bench_startup.py
+# Cold start benchmark: import time of app.main and time until the startup
+# event has finished, each run in a fresh interpreter.
+#
+# Runs against a temporary SQLite database (primed by one unmeasured run, so
+# measured runs are restarts against an existing schema, like a Render
+# redeploy) with LLM_PROVIDER=fake and Redis pointed at a closed port, so
+# nothing leaves the machine. Heavy optional dependencies that were
+# imported by the time the app was ready are listed per run.
+#
+# --ref measures another git revision the same way (checked out into a
+# temporary worktree) for a before/after comparison.
+#
+# Usage (from backend/):
+#   python benchmarks/bench_startup.py --runs 10
+#   python benchmarks/bench_startup.py --runs 10 --ref HEAD~1 --out startup.json
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["langchain", "langchain_core", "langchain_openai", "openai", "sendgrid", "socketio", "aiohttp"]
+
+# Runs inside the measured interpreter (cwd = the backend directory under test)
+CHILD = r"""
+import asyncio, contextlib, io, json, os, sys, time
+sys.path.insert(0, os.getcwd())
+out = io.StringIO()
+with contextlib.redirect_stdout(out):
+    t0 = time.perf_counter()
+    import app.main
+    t1 = time.perf_counter()
+    asyncio.run(app.main.app.router.startup())
+    t2 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "ready_ms": (t2 - t0) * 1000,
+    "heavy_modules": sorted(m for m in HEAVY if m in sys.modules),
+}))
+sys.stdout.flush()
+os._exit(0)  # skip shutdown; background jobs were just started
+"""
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Measure cold import and startup time.")
+    ap.add_argument("--runs", type=int, default=10, help="measured runs per revision")
+    ap.add_argument("--ref", help="also measure this git revision (e.g. HEAD~1)")
+    ap.add_argument("--out", help="write results JSON here")
+    return ap.parse_args()
+
+def run_once(backend_dir: str, db_path: str) -> dict:
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{db_path}",
+        "REDIS_URL": "redis://127.0.0.1:1",
+        "LLM_PROVIDER": "fake",
+        "EMAIL_PROVIDER": "stub",
+        "WARM_UP_AFTER_STARTUP": "false",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    env.pop("TRACE_FILE", None)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", f"HEAVY = {HEAVY_MODULES!r}\n" + CHILD],
+        cwd=backend_dir, env=env, capture_output=True, text=True, timeout=300,
+    )
+    if proc.returncode != 0 or not proc.stdout.strip():
+        sys.exit(f"startup run failed in {backend_dir}:\n{proc.stderr[-3000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - start) * 1000
+    return result
+
+def measure(label: str, backend_dir: str, runs: int) -> dict:
+    db_path = os.path.join(tempfile.mkdtemp(prefix="nss-startup-"), "startup.db")
+    run_once(backend_dir, db_path)  # creates the schema; not measured
+    samples = [run_once(backend_dir, db_path) for _ in range(runs)]
+    summary = {"heavy_modules": samples[-1]["heavy_modules"]}
+    for key in ("import_ms", "ready_ms", "process_ms"):
+        values = [s[key] for s in samples]
+        summary[key] = {"median": round(statistics.median(values), 1), "min": round(min(values), 1)}
+    print(f"{label:<14} import {summary['import_ms']['median']:8.1f} ms   "
+          f"ready {summary['ready_ms']['median']:8.1f} ms   "
+          f"process {summary['process_ms']['median']:8.1f} ms   (median of {runs})")
+    print(f"{'':<14} loaded: {', '.join(summary['heavy_modules']) or '-'}")
+    return summary
+
+def git(*args: str, cwd: str = BACKEND) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+
+def main() -> int:
+    args = parse_args()
+    report = {"python": sys.version.split()[0], "runs": args.runs, "results": {}}
+
+    head = git("rev-parse", "--short", "HEAD")
+    report["results"][f"working tree ({head})"] = measure("working tree", BACKEND, args.runs)
+
+    if args.ref:
+        repo_root = git("rev-parse", "--show-toplevel")
+        rel = os.path.relpath(BACKEND, repo_root)
+        worktree = tempfile.mkdtemp(prefix="nss-startup-ref-")
+        git("worktree", "add", "--detach", worktree, args.ref, cwd=repo_root)
+        try:
+            ref = git("rev-parse", "--short", args.ref)
+            # .env is untracked; the worktree gets the same one
+            if os.path.exists(os.path.join(BACKEND, ".env")):
+                with open(os.path.join(BACKEND, ".env")) as src, open(os.path.join(worktree, rel, ".env"), "w") as dst:
+                    dst.write(src.read())
+            before = measure(ref, os.path.join(worktree, rel), args.runs)
+            report["results"][ref] = before
+        finally:
+            git("worktree", "remove", "--force", worktree, cwd=repo_root)
+
+        now = report["results"][f"working tree ({head})"]
+        for key in ("import_ms", "ready_ms"):
+            b, a = before[key]["median"], now[key]["median"]
+            print(f"{key:<14} {b:8.1f} -> {a:8.1f} ms  ({(a - b) / b:+.0%})")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+# backend/benchmarks/eval_chat.py
+# Offline evaluation of the chat pipeline.
+#
+# Replays a labelled corpus (benchmarks/data/chat_corpus.jsonl) through the
+# same stages /ai/chat runs - parse_message_regex, intent detection and
+# query_donors - and reports per-field accuracy, per-stage latency
+# percentiles and throughput. No LLM is involved.
+#
+# By default it builds a throwaway sandbox: a temporary SQLite database
+# seeded with generate_data.py and, if fakeredis is installed, an in-memory
+# Redis for the GEO index. Pass --use-configured to run against
+# DATABASE_URL / REDIS_URL instead (seed them with generate_data.py first).
+#
+# In the sandbox the donor searches are then replayed twice more with the
+# GEO index degraded: every location timestamp backdated by two days (donors
+# who haven't updated their profile recently must still be found), and the
+# index emptied (the database fallback must answer).
+#
+# Usage (from backend/):
+#   python benchmarks/eval_chat.py [--donors 20000] [--repeat 5] [--show-misses]
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CORPUS = os.path.join(BACKEND, "benchmarks", "data", "chat_corpus.jsonl")
+sys.path.insert(0, BACKEND)
+
+SEARCH_INTENTS = ("find_donor", "list_donor_names")
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Evaluate parse/intent/query stages of the chat pipeline.")
+    ap.add_argument("--corpus", default=DEFAULT_CORPUS)
+    ap.add_argument("--repeat", type=int, default=5, help="replays of the corpus for latency numbers")
+    ap.add_argument("--donors", type=int, default=20_000, help="donors seeded into the sandbox")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--use-configured", action="store_true", help="use DATABASE_URL/REDIS_URL instead of a sandbox")
+    ap.add_argument("--show-misses", action="store_true")
+    ap.add_argument("--json", dest="json_out", help="also write the report to this file")
+    return ap.parse_args()
+
+def setup_sandbox(args: argparse.Namespace) -> str:
+    """
+    Point the app at a temporary SQLite file and (if available) fakeredis;
+    must run before app imports. Returns a label for the Redis backend.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="nss-eval-"), "eval.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    try:
+        import fakeredis
+    except ImportError:
+        print("⚠️  fakeredis not installed; using REDIS_URL for the GEO index")
+        return "redis"
+    import app.services.cache as cache
+    server = fakeredis.FakeServer()
+
+    class _FakeRedisModule:
+        @staticmethod
+        def from_url(*a, **k):
+            return fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    cache.redis = _FakeRedisModule
+    return "fakeredis"
+
+async def seed(args: argparse.Namespace) -> None:
+    import generate_data
+    await generate_data.generate(argparse.Namespace(
+        donors=args.donors, hospitals=len(generate_data.REAL_HOSPITALS), requests=0,
+        seed=args.seed, anchor_date=date.today(), chunk_size=10_000, reset=True, skip_redis=False,
+    ))
+
+def percentiles(samples: list) -> dict:
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "n": len(ordered),
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+    }
+
+def same_region(expected, got) -> bool:
+    if expected is None or got is None:
+        return expected is None and got is None
+    return expected.strip().lower() == got.strip().lower()
+
+async def evaluate(args: argparse.Namespace) -> dict:
+    from app.ai import intent_router
+    from app.ai.ai_routes import detect_conversation_intent, detect_intent, parse_message_regex, query_donors
+    from app.database import SessionLocal
+    from app.services.hospital_registry import load_hospitals
+
+    with open(args.corpus) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    db = SessionLocal()
+    load_hospitals(db)  # also rebuilds the gazetteer from the hospitals table
+
+    stages = {"parse": [], "intent": [], "query": [], "total": []}
+    correct = {"intent": 0, "blood_group": 0, "region": 0, "all": 0, "donors": 0}
+    expect_donors = sum(1 for r in rows if r.get("expect_donors"))
+    misses = []
+    started = time.perf_counter()
+
+    try:
+        for rep in range(args.repeat):
+            for row in rows:
+                text = row["text"]
+                t0 = time.perf_counter()
+                parsed = parse_message_regex(text)
+                t1 = time.perf_counter()
+                intent_router.classify.cache_clear()  # every message is new to the router
+                intent = detect_conversation_intent(text) or detect_intent(text, parsed=parsed)[0]
+                t2 = time.perf_counter()
+                donors = []
+                if intent in SEARCH_INTENTS:
+                    donors = await query_donors(db, parsed.get("blood_group"), parsed.get("region"), parsed.get("location"))
+                    stages["query"].append((time.perf_counter() - t2) * 1000)
+                t3 = time.perf_counter()
+                stages["parse"].append((t1 - t0) * 1000)
+                stages["intent"].append((t2 - t1) * 1000)
+                stages["total"].append((t3 - t0) * 1000)
+
+                if rep:
+                    continue  # accuracy is deterministic; score the first replay only
+                ok = {
+                    "intent": intent == row["intent"],
+                    "blood_group": parsed.get("blood_group") == row.get("blood_group"),
+                    "region": same_region(row.get("region"), parsed.get("region")),
+                }
+                for field, hit in ok.items():
+                    correct[field] += hit
+                correct["all"] += all(ok.values())
+                if row.get("expect_donors") and donors:
+                    correct["donors"] += 1
+                if not all(ok.values()) or (row.get("expect_donors") and not donors):
+                    misses.append({
+                        "text": text,
+                        "expected": {k: row.get(k) for k in ("intent", "blood_group", "region")},
+                        "got": {"intent": intent, "blood_group": parsed.get("blood_group"),
+                                "region": parsed.get("region"), "donors": len(donors)},
+                    })
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    n = len(rows)
+    return {
+        "corpus": os.path.basename(args.corpus),
+        "messages": n,
+        "accuracy": {
+            "intent": round(correct["intent"] / n, 4),
+            "blood_group": round(correct["blood_group"] / n, 4),
+            "region": round(correct["region"] / n, 4),
+            "all_fields": round(correct["all"] / n, 4),
+            "donors_found": round(correct["donors"] / expect_donors, 4) if expect_donors else None,
+        },
+        "latency": {stage: percentiles(samples) for stage, samples in stages.items()},
+        "throughput_msgs_per_s": round(n * args.repeat / elapsed, 1),
+        "misses": misses,
+    }
+
+async def evaluate_degraded_geo(args: argparse.Namespace) -> dict:
+    """Share of donor searches that still find donors with stale or missing GEO entries"""
+    from app.ai.ai_routes import detect_conversation_intent, detect_intent, parse_message_regex, query_donors
+    from app.database import SessionLocal
+    from app.services.cache import get_redis_client
+    from app.services.geo import GEO_KEY, TS_KEY
+
+    with open(args.corpus) as f:
+        rows = [r for r in (json.loads(line) for line in f if line.strip()) if r.get("expect_donors")]
+    client = await get_redis_client()
+
+    async def found_share() -> float:
+        db = SessionLocal()
+        try:
+            found = 0
+            for row in rows:
+                parsed = parse_message_regex(row["text"])
+                if (detect_conversation_intent(row["text"]) or detect_intent(row["text"], parsed=parsed)[0]) in SEARCH_INTENTS:
+                    found += bool(await query_donors(db, parsed.get("blood_group"), parsed.get("region"), parsed.get("location")))
+            return round(found / len(rows), 4) if rows else None
+        finally:
+            db.close()
+
+    two_days_ago = int(time.time() * 1000) - 2 * 86400 * 1000
+    members = await client.zrange(TS_KEY, 0, -1)
+    for first in range(0, len(members), 10_000):
+        await client.zadd(TS_KEY, {m: two_days_ago for m in members[first:first + 10_000]})
+    stale = await found_share()
+
+    await client.delete(GEO_KEY, TS_KEY)
+    missing = await found_share()
+    return {"donors_found_stale_geo": stale, "donors_found_no_geo": missing}
+
+def print_report(report: dict, show_misses: bool) -> None:
+    print(f"\nCorpus {report['corpus']}: {report['messages']} messages ({report['redis_backend']})")
+    print("Accuracy")
+    for field, value in report["accuracy"].items():
+        print(f"  {field:>12}: {'n/a' if value is None else f'{value:.1%}'}")
+    print("Latency (ms)")
+    for stage, p in report["latency"].items():
+        if p["n"]:
+            print(f"  {stage:>12}: p50 {p['p50_ms']:8.3f}  p95 {p['p95_ms']:8.3f}  p99 {p['p99_ms']:8.3f}  (n={p['n']})")
+    print(f"Throughput: {report['throughput_msgs_per_s']:,} msgs/s (parse + intent + query)")
+    if report["redis_backend"] == "fakeredis":
+        print("Note: fakeredis runs GEOSEARCH in Python (linear in donors); query latency is far lower on a real Redis")
+    if show_misses:
+        for miss in report["misses"]:
+            print(f"  miss {miss['text']!r}\n       expected {miss['expected']}\n       got      {miss['got']}")
+    elif report["misses"]:
+        print(f"{len(report['misses'])} misses (--show-misses to list)")
+
+async def main() -> None:
+    args = parse_args()
+    backend = "redis"
+    if not args.use_configured:
+        backend = setup_sandbox(args)
+        await seed(args)
+    report = await evaluate(args)
+    if not args.use_configured:
+        report["accuracy"].update(await evaluate_degraded_geo(args))  # rewrites the sandbox's GEO index
+    report["redis_backend"] = backend
+    print_report(report, args.show_misses)
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,364 @@
+# backend/benchmarks/socket_load.py
+# Socket.IO load test for app/realtime.py: how many dashboards one worker
+# can serve.
+#
+# Starts the API in a child process (uvicorn, temporary SQLite database,
+# fakeredis; no external services), opens --clients simulated dashboards
+# against /ws, joins them to rooms round-robin, then has the server call
+# broadcast_new_request / broadcast_donor_status_update at the given rates.
+# Every broadcast carries its send time, so clients record delivery
+# latency. Reports connect time, delivery latency percentiles, messages
+# lost, dropped connections and server memory per connection.
+#
+# The clients speak the Engine.IO v4 / Socket.IO v5 websocket protocol
+# directly over aiohttp (a few KB each), so thousands fit in one process.
+#
+# Usage (from backend/):
+#   python benchmarks/socket_load.py --clients 2000 --request-rate 5 --donor-rate 20 --duration 30 [--out socket.json]
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import aiohttp
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+EVENTS = ("new_request", "donor_status_update")
+ROOM_FOR_EVENT = {"new_request": "requests", "donor_status_update": "donors"}
+
+def parse_args() -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Socket.IO load test for the realtime layer.")
+    ap.add_argument("--clients", type=int, default=1000)
+    ap.add_argument("--rooms", nargs="+", default=["donors", "requests", "general"], help="rooms assigned round-robin")
+    ap.add_argument("--connect-rate", type=float, default=500, help="new connections per second")
+    ap.add_argument("--request-rate", type=float, default=5, help="broadcast_new_request calls per second")
+    ap.add_argument("--donor-rate", type=float, default=20, help="broadcast_donor_status_update calls per second")
+    ap.add_argument("--duration", type=float, default=20, help="seconds of broadcasting")
+    ap.add_argument("--drain", type=float, default=5, help="seconds to wait for in-flight messages")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--out", help="write the report as JSON")
+    ap.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)  # child process mode
+    return ap.parse_args()
+
+def raise_fd_limit() -> None:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def rss_kb() -> Optional[int]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "n": len(ordered),
+        "p50_ms": round(pick(0.50), 2),
+        "p95_ms": round(pick(0.95), 2),
+        "p99_ms": round(pick(0.99), 2),
+        "max_ms": round(ordered[-1], 2),
+    }
+
+# ============ Server (child process) ============
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the API with a control router that drives broadcasts"""
+    path = os.path.join(tempfile.mkdtemp(prefix="nss-socket-load-"), "load.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ["LLM_PROVIDER"] = "none"
+    os.environ["LOG_LEVEL"] = "WARNING"  # no per-connect/broadcast records
+    raise_fd_limit()
+
+    import fakeredis
+    import app.services.cache as cache
+    server = fakeredis.FakeServer()
+
+    class _FakeRedisModule:
+        @staticmethod
+        def from_url(*a, **k):
+            return fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+
+    cache.redis = _FakeRedisModule
+
+    import uvicorn
+    from fastapi import APIRouter
+    from app.main import app
+    from app.realtime import broadcast_donor_status_update, broadcast_new_request, get_connected_clients
+
+    emitted: Dict[str, int] = {event: 0 for event in EVENTS}
+    state = {"task": None, "done": False}
+    control = APIRouter()
+
+    async def pace(rate: float, duration: float, fire) -> None:
+        if rate <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i in range(int(rate * duration)):
+            delay = start + i / rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await fire(i)
+
+    async def new_request(i: int) -> None:
+        await broadcast_new_request({
+            "id": i, "hospital_id": 1, "blood_type": "O+", "urgency": "Critical", "status": "Pending",
+            "sent_at_ms": time.time() * 1000,
+        })
+        emitted["new_request"] += 1
+
+    async def donor_update(i: int) -> None:
+        await broadcast_donor_status_update({
+            "id": i, "name": f"Donor {i}", "blood_group": "O+", "available": bool(i % 2),
+            "sent_at_ms": time.time() * 1000,
+        })
+        emitted["donor_status_update"] += 1
+
+    async def drive(request_rate: float, donor_rate: float, duration: float) -> None:
+        await asyncio.gather(pace(request_rate, duration, new_request), pace(donor_rate, duration, donor_update))
+        state["done"] = True
+
+    @control.post("/_load/start")
+    async def start(request_rate: float, donor_rate: float, duration: float):
+        state["task"] = asyncio.create_task(drive(request_rate, donor_rate, duration))
+        return {"started": True}
+
+    @control.get("/_load/stats")
+    async def stats():
+        return {
+            "emitted": emitted,
+            "done": state["done"],
+            "connected": len(await get_connected_clients()),
+            "rss_kb": rss_kb(),
+        }
+
+    app.include_router(control)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+# ============ Clients ============
+
+class Client:
+    """Minimal Socket.IO v5 websocket client recording event delivery latency"""
+
+    def __init__(self, index: int, room: str):
+        self.index = index
+        self.room = room
+        self.connected = False
+        self.dropped = False
+        self.error: Optional[str] = None
+        self.connect_ms: Optional[float] = None
+        self.received: Dict[str, int] = {event: 0 for event in EVENTS}
+        self.latencies: List[float] = []
+
+    async def run(self, session, url: str, stop: asyncio.Event) -> None:
+        start = time.perf_counter()
+        try:
+            async with session.ws_connect(url, heartbeat=None, max_msg_size=0) as ws:
+                opened = await ws.receive_str()          # Engine.IO open: 0{"sid":...}
+                if not opened.startswith("0"):
+                    raise RuntimeError(f"unexpected open packet {opened[:40]!r}")
+                await ws.send_str("40")                  # Socket.IO connect, default namespace
+                while True:
+                    msg = await ws.receive_str()
+                    if msg.startswith("40"):
+                        break
+                    if msg == "2":
+                        await ws.send_str("3")
+                await ws.send_str("42" + json.dumps(["join_room", {"room": self.room}]))
+                self.connect_ms = (time.perf_counter() - start) * 1000
+                self.connected = True
+
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    if msg.data == "2":
+                        await ws.send_str("3")           # Engine.IO pong
+                    else:
+                        self.handle(msg.data)
+                # the server closed the socket before the run ended
+                if not stop.is_set():
+                    self.dropped = True
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            if self.connected:
+                self.dropped = True
+            self.error = f"{type(e).__name__}: {e}"
+
+    def handle(self, data: str) -> None:
+        if not data.startswith("42"):
+            return
+        now_ms = time.time() * 1000
+        event, payload = json.loads(data[2:])[:2]
+        if event in self.received:
+            self.received[event] += 1
+            sent = (payload.get("data") or {}).get("sent_at_ms")
+            if sent:
+                self.latencies.append(now_ms - sent)
+
+async def wait_ready(session, base: str, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base}/health") as r:
+                if r.status == 200:
+                    return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+async def get_stats(session, base: str) -> dict:
+    async with session.get(f"{base}/_load/stats") as r:
+        return await r.json()
+
+async def run_load(args: argparse.Namespace) -> dict:
+    base = f"http://127.0.0.1:{args.port}"
+    ws_url = f"ws://127.0.0.1:{args.port}/ws/socket.io/?EIO=4&transport=websocket"
+    clients = [Client(i, args.rooms[i % len(args.rooms)]) for i in range(args.clients)]
+    stop = asyncio.Event()
+
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await wait_ready(session, base)
+        idle = await get_stats(session, base)
+
+        print(f"Connecting {args.clients} clients at {args.connect_rate:.0f}/s...")
+        tasks = []
+        for i, client in enumerate(clients):
+            tasks.append(asyncio.create_task(client.run(session, ws_url, stop)))
+            if args.connect_rate > 0 and i % max(int(args.connect_rate / 20), 1) == 0:
+                await asyncio.sleep(1 / 20)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if sum(c.connected or c.error is not None for c in clients) == len(clients):
+                break
+            await asyncio.sleep(0.2)
+        await asyncio.sleep(1)  # let join_room land before broadcasting
+        loaded = await get_stats(session, base)
+        connected = sum(c.connected for c in clients)
+        print(f"Connected {connected}/{args.clients} (server sees {loaded['connected']})")
+
+        print(f"Broadcasting for {args.duration:.0f}s: {args.request_rate}/s new_request, "
+              f"{args.donor_rate}/s donor_status_update")
+        params = {"request_rate": args.request_rate, "donor_rate": args.donor_rate, "duration": args.duration}
+        async with session.post(f"{base}/_load/start", params=params) as r:
+            r.raise_for_status()
+        started = time.monotonic()
+        while not (await get_stats(session, base))["done"]:
+            if time.monotonic() - started > args.duration * 3 + 30:
+                print("⚠️  server could not keep up with the requested broadcast rate")
+                break
+            await asyncio.sleep(0.5)
+        lag_s = time.monotonic() - started - args.duration
+        await asyncio.sleep(args.drain)
+        final = await get_stats(session, base)
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    emitted = final["emitted"]
+    expected = received = 0
+    latencies: List[float] = []
+    for c in clients:
+        if not c.connected:
+            continue
+        latencies.extend(c.latencies)
+        for event in EVENTS:
+            # every broadcast goes to all clients, and once more to the event's room
+            expected += emitted[event] * (2 if c.room == ROOM_FOR_EVENT[event] else 1)
+            received += c.received[event]
+
+    rss_idle, rss_loaded = idle.get("rss_kb"), loaded.get("rss_kb")
+    per_conn = (rss_loaded - rss_idle) / connected if rss_idle and rss_loaded and connected else None
+    errors: Dict[str, int] = {}
+    for c in clients:
+        if c.error:
+            errors[c.error[:80]] = errors.get(c.error[:80], 0) + 1
+    return {
+        "config": {k: v for k, v in vars(args).items() if k not in ("serve", "out")},
+        "clients": {
+            "requested": args.clients,
+            "connected": connected,
+            "failed_to_connect": sum(not c.connected for c in clients),
+            "dropped": sum(c.dropped for c in clients),
+            "server_connected": loaded["connected"],
+            "connect_time": percentiles([c.connect_ms for c in clients if c.connect_ms is not None]),
+            "errors": errors,
+        },
+        "broadcasts": {
+            "emitted": emitted,
+            "broadcast_lag_s": round(max(lag_s, 0.0), 2),   # time the server fell behind the schedule
+            "deliveries_expected": expected,
+            "deliveries_received": received,
+            "deliveries_lost": expected - received,
+            "latency": percentiles(latencies),
+        },
+        "server_memory": {
+            "rss_idle_kb": rss_idle,
+            "rss_loaded_kb": rss_loaded,
+            "kb_per_connection": round(per_conn, 1) if per_conn is not None else None,
+        },
+    }
+
+def print_report(report: dict) -> None:
+    c, b, m = report["clients"], report["broadcasts"], report["server_memory"]
+    ct, lat = c["connect_time"], b["latency"]
+    print(f"\nClients: {c['connected']}/{c['requested']} connected, {c['failed_to_connect']} failed, "
+          f"{c['dropped']} dropped")
+    if ct["n"]:
+        print(f"  connect time  p50 {ct['p50_ms']} ms  p99 {ct['p99_ms']} ms")
+    for error, n in c["errors"].items():
+        print(f"  {n}x {error}")
+    print(f"Broadcasts: {b['emitted']} (schedule lag {b['broadcast_lag_s']} s)")
+    print(f"  deliveries {b['deliveries_received']:,}/{b['deliveries_expected']:,} ({b['deliveries_lost']:,} lost)")
+    if lat["n"]:
+        print(f"  latency  p50 {lat['p50_ms']} ms  p95 {lat['p95_ms']} ms  p99 {lat['p99_ms']} ms  max {lat['max_ms']} ms")
+    if m["kb_per_connection"] is not None:
+        print(f"Server RSS {m['rss_idle_kb'] / 1024:.1f} MB idle -> {m['rss_loaded_kb'] / 1024:.1f} MB "
+              f"connected ({m['kb_per_connection']} KB per connection)")
+
+def main() -> None:
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        return
+
+    raise_fd_limit()
+    child = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(args.port)],
+        cwd=BACKEND, stdout=subprocess.DEVNULL,
+    )
+    try:
+        report = asyncio.run(run_load(args))
+    finally:
+        child.terminate()
+        try:
+            child.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            child.kill()
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# backend/benchmarks/trace_report.py
+# Offline tail-latency analysis of spans written by app.services.tracing
+# (run the API with TRACE_FILE=traces.jsonl).
+#
+# Prints latency percentiles per span name and, for the slowest root spans
+# (requests), where their time went: the child spans grouped by name.
+#
+# Usage (from backend/):
+#   python benchmarks/trace_report.py traces.jsonl [--route "/donors/nearby"] [--slowest 5]
+import argparse
+import json
+from collections import defaultdict
+
+def pct(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def load(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarize a TRACE_FILE span log.")
+    ap.add_argument("trace_file")
+    ap.add_argument("--route", help="only requests whose http.route equals this")
+    ap.add_argument("--slowest", type=int, default=5, help="slowest requests to break down")
+    args = ap.parse_args()
+
+    spans = load(args.trace_file)
+    roots = [s for s in spans if s["kind"] == "SERVER"]
+    if args.route:
+        roots = [s for s in roots if s["attributes"].get("http.route") == args.route]
+        keep = {s["traceId"] for s in roots}
+        spans = [s for s in spans if s["traceId"] in keep]
+
+    by_name = defaultdict(list)
+    for s in spans:
+        by_name[s["name"]].append(s["durationMs"])
+    print(f"{len(spans)} spans, {len(roots)} requests\n")
+    print(f"{'span':<44} {'n':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, samples in sorted(by_name.items(), key=lambda kv: -sum(kv[1])):
+        samples.sort()
+        print(f"{name[:44]:<44} {len(samples):>7} {pct(samples, .5):>9.2f} {pct(samples, .95):>9.2f} "
+              f"{pct(samples, .99):>9.2f} {samples[-1]:>9.2f}")
+
+    children = defaultdict(list)
+    for s in spans:
+        if s["kind"] != "SERVER":
+            children[s["traceId"]].append(s)
+    for root in sorted(roots, key=lambda s: -s["durationMs"])[:args.slowest]:
+        print(f"\n{root['name']}  {root['durationMs']:.2f} ms  trace {root['traceId']}  "
+              f"status {root['attributes'].get('http.status_code')}")
+        grouped = defaultdict(lambda: [0.0, 0])
+        for c in children[root["traceId"]]:
+            grouped[c["name"]][0] += c["durationMs"]
+            grouped[c["name"]][1] += 1
+        for name, (ms, n) in sorted(grouped.items(), key=lambda kv: -kv[1][0]):
+            print(f"    {name[:50]:<50} {ms:>9.2f} ms  x{n}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Synthetic data generator for load testing.
+
+Produces realistic hospitals, donors and blood requests at any scale and
+bulk-loads them into the configured database (SQLite or Postgres) and the
+Redis availability cache + GEO index. Output is fully determined by --seed
+and --anchor-date, so benchmark runs can be reproduced exactly.
+
+Donors are clustered around real Delhi NCR hospital coordinates, follow the
+Indian blood group distribution and carry plausible donation histories.
+
+Usage:
+    python generate_data.py --donors 1000000 --requests 200000 --seed 42 --reset
+    python generate_data.py --donors 50000 --skip-redis
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import func, insert, text
+from sqlalchemy.orm import Session
+
+from app.database.database import SessionLocal, engine
+from app.models.models import Donor, Hospital, Request, ArchivedRequest, UrgencyLevel, RequestStatus
+from app.services.db_utils import init_db
+
+# Real Delhi NCR hospitals (approximate coordinates) used as cluster centres
+REAL_HOSPITALS = [
+    {"name": "AIIMS", "location": "Ansari Nagar, Delhi", "lat": 28.5672, "lng": 77.2100},
+    {"name": "Safdarjung Hospital", "location": "Ansari Nagar West, Delhi", "lat": 28.5679, "lng": 77.2058},
+    {"name": "Apollo Hospital", "location": "Sarita Vihar, Delhi", "lat": 28.5410, "lng": 77.2830},
+    {"name": "Max Hospital", "location": "Saket, Delhi", "lat": 28.5275, "lng": 77.2120},
+    {"name": "Fortis Hospital", "location": "Vasant Kunj, Delhi", "lat": 28.5203, "lng": 77.1587},
+    {"name": "BLK Hospital", "location": "Pusa Road, Delhi", "lat": 28.6430, "lng": 77.1800},
+    {"name": "Sir Ganga Ram Hospital", "location": "Rajinder Nagar, Delhi", "lat": 28.6385, "lng": 77.1894},
+    {"name": "Lok Nayak Hospital", "location": "Daryaganj, Delhi", "lat": 28.6390, "lng": 77.2390},
+    {"name": "RML Hospital", "location": "Connaught Place, Delhi", "lat": 28.6260, "lng": 77.2000},
+    {"name": "Lady Hardinge Hospital", "location": "Connaught Place, Delhi", "lat": 28.6353, "lng": 77.2089},
+    {"name": "GTB Hospital", "location": "Dilshad Garden, Delhi", "lat": 28.6860, "lng": 77.3100},
+    {"name": "Hindu Rao Hospital", "location": "Malka Ganj, Delhi", "lat": 28.6700, "lng": 77.2150},
+    {"name": "Deen Dayal Upadhyay Hospital", "location": "Hari Nagar, Delhi", "lat": 28.6270, "lng": 77.1120},
+    {"name": "Batra Hospital", "location": "Tughlakabad, Delhi", "lat": 28.5030, "lng": 77.2370},
+    {"name": "Holy Family Hospital", "location": "Okhla, Delhi", "lat": 28.5610, "lng": 77.2770},
+    {"name": "Max Hospital Patparganj", "location": "Patparganj, Delhi", "lat": 28.6320, "lng": 77.3040},
+    {"name": "Jaipur Golden Hospital", "location": "Rohini, Delhi", "lat": 28.7130, "lng": 77.1190},
+    {"name": "Venkateshwar Hospital", "location": "Dwarka, Delhi", "lat": 28.5920, "lng": 77.0400},
+    {"name": "Medanta", "location": "Sector 38, Gurgaon", "lat": 28.4394, "lng": 77.0407},
+    {"name": "Fortis Hospital Noida", "location": "Sector 62, Noida", "lat": 28.6185, "lng": 77.3726},
+]
+
+# Approximate blood group distribution in India
+BLOOD_GROUP_WEIGHTS = {
+    "O+": 0.350, "B+": 0.320, "A+": 0.220, "AB+": 0.070,
+    "O-": 0.015, "B-": 0.010, "A-": 0.010, "AB-": 0.005,
+}
+
+URGENCY_WEIGHTS = {
+    UrgencyLevel.LOW: 0.20, UrgencyLevel.MEDIUM: 0.40,
+    UrgencyLevel.HIGH: 0.28, UrgencyLevel.CRITICAL: 0.12,
+}
+
+FIRST_NAMES = [
+    "Aarav", "Aditi", "Akash", "Ananya", "Anjali", "Arjun", "Aryan", "Deepak", "Divya", "Gaurav",
+    "Ishaan", "Kabir", "Karan", "Kavya", "Meera", "Neha", "Nikhil", "Pooja", "Priya", "Rahul",
+    "Riya", "Rohan", "Sahil", "Simran", "Sneha", "Tanvi", "Varun", "Vikram", "Yash", "Zoya",
+]
+LAST_NAMES = [
+    "Agarwal", "Bansal", "Chauhan", "Das", "Gupta", "Iyer", "Jain", "Kapoor", "Khan", "Kumar",
+    "Malhotra", "Mehta", "Nair", "Patel", "Rao", "Reddy", "Saxena", "Sharma", "Singh", "Verma",
+]
+
+KM_PER_DEG_LAT = 111.32
+
+def _weighted(weights: Dict) -> Tuple[List, List[float]]:
+    """Return (population, cumulative weights) for fast rng.choices"""
+    return list(weights.keys()), list(_cumulative(weights.values()))
+
+def _cumulative(values) -> Iterator[float]:
+    total = 0.0
+    for v in values:
+        total += v
+        yield total
+
+def _jitter(rng: random.Random, lat: float, lng: float, sigma_km: float) -> Tuple[float, float]:
+    """Gaussian offset of `sigma_km` around (lat, lng)"""
+    dlat = rng.gauss(0.0, sigma_km) / KM_PER_DEG_LAT
+    dlng = rng.gauss(0.0, sigma_km) / (KM_PER_DEG_LAT * math.cos(math.radians(lat)))
+    return round(lat + dlat, 6), round(lng + dlng, 6)
+
+# ============ Row Generators ============
+
+def generate_hospitals(rng: random.Random, count: int) -> List[dict]:
+    """Real hospitals first, then synthetic branches near them"""
+    rows = [dict(h) for h in REAL_HOSPITALS[:count]]
+    branch = 1
+    while len(rows) < count:
+        base = REAL_HOSPITALS[(len(rows) - len(REAL_HOSPITALS)) % len(REAL_HOSPITALS)]
+        lat, lng = _jitter(rng, base["lat"], base["lng"], sigma_km=4.0)
+        rows.append({
+            "name": f"{base['name']} Branch {branch}",
+            "location": base["location"],
+            "lat": lat,
+            "lng": lng,
+        })
+        branch += 1
+    return rows
+
+def generate_donors(
+    rng: random.Random,
+    count: int,
+    centres: List[Tuple[float, float]],
+    anchor: datetime,
+    chunk_size: int,
+) -> Iterator[List[dict]]:
+    """Yield donor rows in chunks, clustered around `centres`"""
+    groups, group_cum = _weighted(BLOOD_GROUP_WEIGHTS)
+    # Bigger hospitals attract bigger clusters (Zipf-like weights)
+    centre_cum = list(_cumulative(1.0 / (i + 1) for i in range(len(centres))))
+
+    chunk: List[dict] = []
+    for i in range(count):
+        c_lat, c_lng = rng.choices(centres, cum_weights=centre_cum)[0]
+        lat, lng = _jitter(rng, c_lat, c_lng, sigma_km=rng.choice((1.5, 3.0, 6.0)))
+
+        # ~30% first-time donors; the rest donated within the last two years
+        if rng.random() < 0.30:
+            last_donation = None
+            available = rng.random() < 0.90
+        else:
+            days_ago = rng.randint(1, 730)
+            last_donation = anchor - timedelta(days=days_ago, minutes=rng.randint(0, 1439))
+            # Donors are deferred for ~90 days after a whole-blood donation
+            available = days_ago >= 90 and rng.random() < 0.85
+
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        chunk.append({
+            "name": f"{first} {last}",
+            "blood_group": rng.choices(groups, cum_weights=group_cum)[0],
+            "lat": lat,
+            "lng": lng,
+            "available": available,
+            "last_donation_date": last_donation,
+            "email": f"{first}.{last}.{i}@example.com".lower() if rng.random() < 0.70 else None,
+            "phone": f"+91{rng.randint(7000000000, 9999999999)}" if rng.random() < 0.80 else None,
+        })
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def generate_requests(
+    rng: random.Random,
+    count: int,
+    hospital_ids: List[int],
+    anchor: datetime,
+    chunk_size: int,
+) -> Iterator[List[dict]]:
+    """Yield request rows in chunks; older requests are mostly closed"""
+    groups, group_cum = _weighted(BLOOD_GROUP_WEIGHTS)
+    urgencies, urgency_cum = _weighted(URGENCY_WEIGHTS)
+    hospital_cum = list(_cumulative(1.0 / (i + 1) for i in range(len(hospital_ids))))
+
+    chunk: List[dict] = []
+    for _ in range(count):
+        age_days = rng.expovariate(1 / 60.0)  # skewed towards recent requests
+        created = anchor - timedelta(days=min(age_days, 730), minutes=rng.randint(0, 1439))
+        if age_days < 2:
+            status = rng.choice((RequestStatus.PENDING, RequestStatus.ACTIVE))
+        elif age_days < 7:
+            status = rng.choices(
+                (RequestStatus.PENDING, RequestStatus.ACTIVE, RequestStatus.FULFILLED, RequestStatus.CANCELLED),
+                weights=(0.2, 0.2, 0.5, 0.1),
+            )[0]
+        else:
+            status = RequestStatus.FULFILLED if rng.random() < 0.85 else RequestStatus.CANCELLED
+
+        chunk.append({
+            "hospital_id": rng.choices(hospital_ids, cum_weights=hospital_cum)[0],
+            "blood_type": rng.choices(groups, cum_weights=group_cum)[0],
+            "urgency": rng.choices(urgencies, cum_weights=urgency_cum)[0],
+            "status": status,
+            "created_at": created,
+            "updated_at": created,
+        })
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+# ============ Bulk Loading ============
+
+def next_id(db: Session, model) -> int:
+    return (db.query(func.max(model.id)).scalar() or 0) + 1
+
+def bulk_insert(db: Session, model, rows: List[dict], first_id: int) -> List[int]:
+    """
+    Multi-row INSERT with client-assigned ids.
+
+    Assigning ids up front avoids a per-row RETURNING round-trip (which
+    SQLite executes one statement at a time) while still giving us the ids
+    needed for the Redis sync.
+    """
+    ids = list(range(first_id, first_id + len(rows)))
+    for row_id, row in zip(ids, rows):
+        row["id"] = row_id
+    db.execute(insert(model), rows)
+    db.commit()
+    return ids
+
+def sync_sequences(db: Session) -> None:
+    """Move Postgres id sequences past the client-assigned ids"""
+    if engine.dialect.name != "postgresql":
+        return
+    for model in (Hospital, Donor, Request):
+        table = model.__tablename__
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {table}), 1))"
+        ))
+    db.commit()
+
+async def sync_chunk_to_redis(donor_ids: List[int], rows: List[dict], now_ms: int, chunk_size: int) -> None:
+    from app.services.cache import sync_all_donors_to_cache
+    from app.services.geo import bulk_upsert_donor_geo
+
+    await sync_all_donors_to_cache([
+        {"id": donor_id, "available": row["available"]} for donor_id, row in zip(donor_ids, rows)
+    ])
+    await bulk_upsert_donor_geo(
+        ((donor_id, row["lat"], row["lng"]) for donor_id, row in zip(donor_ids, rows)),
+        now_ms=now_ms,
+        chunk_size=chunk_size,
+    )
+
+async def generate(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    anchor = datetime.combine(args.anchor_date, datetime.min.time())
+    now_ms = int(time.time() * 1000)
+    use_redis = not args.skip_redis
+
+    print(f"🌱 Generating data (seed={args.seed}, anchor={args.anchor_date}) into {engine.url.render_as_string(hide_password=True)}")
+    init_db()
+
+    if use_redis:
+        try:
+            from app.services.cache import get_redis_client
+            await get_redis_client()
+        except Exception as e:
+            print(f"⚠️  Redis unavailable, loading SQL only: {e}")
+            use_redis = False
+
+    db: Session = SessionLocal()
+    try:
+        if args.reset:
+            print("🗑️  Clearing existing data...")
+            db.query(Request).delete()
+            db.query(ArchivedRequest).delete()
+            db.query(Donor).delete()
+            db.query(Hospital).delete()
+            db.commit()
+            if use_redis:
+                from app.services.cache import clear_all_donor_cache, get_redis_client
+                from app.services.geo import GEO_KEY, TS_KEY
+                await clear_all_donor_cache()  # also drops donor:meta:* hashes
+                await (await get_redis_client()).delete(GEO_KEY, TS_KEY)
+
+        started = time.perf_counter()
+        hospital_rows = generate_hospitals(rng, args.hospitals)
+        hospital_ids = bulk_insert(db, Hospital, hospital_rows, next_id(db, Hospital))
+        centres = [(h["lat"], h["lng"]) for h in hospital_rows]
+        print(f"🏥 Inserted {len(hospital_ids)} hospitals")
+
+        loaded, donor_id = 0, next_id(db, Donor)
+        for rows in generate_donors(rng, args.donors, centres, anchor, args.chunk_size):
+            donor_ids = bulk_insert(db, Donor, rows, donor_id)
+            donor_id += len(rows)
+            if use_redis:
+                await sync_chunk_to_redis(donor_ids, rows, now_ms, args.chunk_size)
+            loaded += len(rows)
+            rate = loaded / max(time.perf_counter() - started, 1e-9)
+            print(f"👥 Donors: {loaded}/{args.donors} ({rate:,.0f} rows/s)")
+
+        loaded, request_id = 0, next_id(db, Request)
+        for rows in generate_requests(rng, args.requests, hospital_ids, anchor, args.chunk_size):
+            bulk_insert(db, Request, rows, request_id)
+            request_id += len(rows)
+            loaded += len(rows)
+        print(f"🩸 Inserted {loaded} requests")
+        sync_sequences(db)
+
+        if use_redis:
+            from app.services.insights import reconcile_insights
+            await reconcile_insights()
+            print("📊 Insights counters reconciled")
+
+        print(f"✅ Done in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error generating data: {e}")
+        raise
+    finally:
+        db.close()
+        if use_redis:
+            from app.services.cache import close_redis
+            await close_redis()
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate synthetic NSS BloodLink data for load testing.")
+    parser.add_argument("--donors", type=int, default=100_000, help="number of donors (default: 100000)")
+    parser.add_argument("--hospitals", type=int, default=len(REAL_HOSPITALS), help="number of hospitals")
+    parser.add_argument("--requests", type=int, default=20_000, help="number of blood requests")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for reproducible output")
+    parser.add_argument("--anchor-date", type=date.fromisoformat, default=date.today(),
+                        help="date that donation/request ages are relative to (YYYY-MM-DD, default: today)")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="rows per INSERT and Redis pipeline")
+    parser.add_argument("--reset", action="store_true", help="delete existing hospitals, donors and requests first")
+    parser.add_argument("--skip-redis", action="store_true", help="only load the SQL database")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    asyncio.run(generate(parse_args()))
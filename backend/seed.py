@@ -10,7 +10,7 @@ import asyncio
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.database.database import SessionLocal, engine, Base
-from app.models.models import Donor, Hospital, Request, UrgencyLevel, RequestStatus
+from app.models.models import Donor, Hospital, Request, ArchivedRequest, UrgencyLevel, RequestStatus
 from app.services.db_utils import init_db
 from app.services.cache import sync_all_donors_to_cache
 
@@ -143,6 +143,7 @@ def seed_database():
         # Clear existing data (optional - comment out if you want to keep existing data)
         print("🗑️  Clearing existing data...")
         db.query(Request).delete()
+        db.query(ArchivedRequest).delete()
         db.query(Donor).delete()
         db.query(Hospital).delete()
         db.commit()
@@ -180,11 +181,14 @@ def seed_database():
         # Sync donors to Redis cache + GEO index
         print("🔄 Syncing donors to Redis cache and GEO index...")
         try:
-            from app.services.cache import set_donor_availability
-            from app.services.geo import upsert_donor_geo
-            for donor in donors:
-                asyncio.run(set_donor_availability(donor.id, donor.available))
-                asyncio.run(upsert_donor_geo(donor.id, donor.lat, donor.lng))
+            from app.services.geo import bulk_upsert_donor_geo
+
+            async def sync_redis():
+                # One event loop and one pipeline per index instead of two loops per donor
+                await sync_all_donors_to_cache([{"id": d.id, "available": d.available} for d in donors])
+                await bulk_upsert_donor_geo([(d.id, d.lat, d.lng) for d in donors])
+
+            asyncio.run(sync_redis())
             print(f"✅ Synced {len(donors)} donors to Redis cache and GEO index")
         except Exception as e:
             print(f"⚠️  Warning: Could not sync to Redis/Geo: {e}")
@@ -24,10 +24,11 @@ export function SocketProvider({ children }: SocketProviderProps) {
 
   useEffect(() => {
     // Connect to Socket.IO server
-    // The backend mounts Socket.IO at /ws, so we need to connect with the path
+    // The backend mounts Socket.IO at /ws, so the Engine.IO path is /ws/socket.io
+    // (default namespace; "/ws" in the URL would select a namespace instead)
     const socketUrl = import.meta.env.VITE_API_URL || "http://localhost:8000"
-    const socketInstance = io(`${socketUrl}/ws`, {
-      path: "/socket.io", // Socket.IO default path
+    const socketInstance = io(socketUrl, {
+      path: "/ws/socket.io",
       transports: ["websocket", "polling"],
       reconnection: true,
       reconnectionDelay: 1000,